@@ -0,0 +1,213 @@
+from datetime import date, timedelta
+from decimal import Decimal, InvalidOperation
+from typing import Dict, List, Optional, Tuple
+import re
+from schemas.transaction import TransactionParsed
+
+MONTHS = {
+    "jan": 1, "january": 1, "feb": 2, "february": 2, "mar": 3, "march": 3,
+    "apr": 4, "april": 4, "may": 5, "jun": 6, "june": 6, "jul": 7, "july": 7,
+    "aug": 8, "august": 8, "sep": 9, "sept": 9, "september": 9, "oct": 10, "october": 10,
+    "nov": 11, "november": 11, "dec": 12, "december": 12,
+}
+
+WEEKDAYS = {
+    "monday": 0, "tuesday": 1, "wednesday": 2, "thursday": 3,
+    "friday": 4, "saturday": 5, "sunday": 6,
+}
+
+# Keyword -> category, mirrors the hints given to the categorizer agent
+CATEGORY_KEYWORDS = {
+    "Food": [
+        "grocery", "groceries", "supermarket", "food", "coffee", "cafe", "starbucks", "dinner",
+        "lunch", "breakfast", "restaurant", "pizza", "burger", "snack", "snacks", "chipotle",
+        "mcdonalds", "kfc", "subway", "bakery", "tea", "meal", "takeout", "dining",
+    ],
+    "Transportation": [
+        "uber", "lyft", "taxi", "cab", "ride", "bus", "train", "metro", "subway ticket",
+        "fuel", "gas", "petrol", "diesel", "parking", "toll", "flight", "airline",
+    ],
+    "Entertainment": [
+        "movie", "movies", "cinema", "netflix", "spotify", "concert", "game", "games",
+        "theatre", "theater", "show", "tickets", "bowling", "museum",
+    ],
+    "Shopping": [
+        "shopping", "clothes", "shoes", "shirt", "jeans", "amazon", "mall", "electronics",
+        "gadget", "phone", "laptop", "book", "books", "gift", "furniture",
+    ],
+    "Bills": [
+        "bill", "bills", "electricity", "water", "internet", "wifi", "rent", "phone bill",
+        "insurance", "subscription", "utility", "utilities", "recharge", "emi",
+    ],
+}
+
+_NUMBER = r"\d{1,3}(?:,\d{3})+(?:\.\d+)?|\d+(?:\.\d+)?"
+_CURRENCY_WORDS = r"dollars?|bucks?|usd|rs\.?|rupees?|inr|eur|euros?"
+
+_CURRENCY_AMOUNT_PATTERNS = [
+    re.compile(rf"[$₹€£]\s?(?P<num>{_NUMBER})"),
+    re.compile(rf"(?P<num>{_NUMBER})\s?[$₹€£]"),
+    re.compile(rf"(?P<num>{_NUMBER})\s?(?:{_CURRENCY_WORDS})\b"),
+]
+_BARE_NUMBER = re.compile(rf"(?<![\w.,/-])(?P<num>{_NUMBER})(?!\w|[.,/-]\d)")
+
+_ORDINAL = r"(?:st|nd|rd|th)?"
+_MONTH_NAMES = "|".join(sorted(MONTHS, key=len, reverse=True))
+_DATE_PATTERNS = [
+    ("iso", re.compile(r"\b(?P<y>\d{4})-(?P<m>\d{1,2})-(?P<d>\d{1,2})\b")),
+    ("slash", re.compile(r"\b(?P<m>\d{1,2})/(?P<d>\d{1,2})(?:/(?P<y>\d{2,4}))?\b")),
+    ("month_day", re.compile(rf"\b(?P<mon>{_MONTH_NAMES})\.?\s+(?P<d>\d{{1,2}}){_ORDINAL}(?:,?\s+(?P<y>\d{{4}}))?\b")),
+    ("day_month", re.compile(rf"\b(?P<d>\d{{1,2}}){_ORDINAL}\s+(?:of\s+)?(?P<mon>{_MONTH_NAMES})\.?(?:,?\s+(?P<y>\d{{4}}))?\b")),
+]
+_RELATIVE_DATE_PATTERNS = [
+    (re.compile(r"\bday before yesterday\b"), lambda today, m: today - timedelta(days=2)),
+    (re.compile(r"\byesterday\b"), lambda today, m: today - timedelta(days=1)),
+    (re.compile(r"\btoday\b|\btonight\b|\bthis morning\b"), lambda today, m: today),
+    (re.compile(r"\b(?P<n>\d{1,2}) days? ago\b"), lambda today, m: today - timedelta(days=int(m.group("n")))),
+    (re.compile(r"\ba week ago\b|\blast week\b"), lambda today, m: today - timedelta(days=7)),
+    (
+        re.compile(rf"\blast (?P<wd>{'|'.join(WEEKDAYS)})\b"),
+        lambda today, m: today - timedelta(days=(today.weekday() - WEEKDAYS[m.group("wd")]) % 7 or 7),
+    ),
+    (
+        re.compile(rf"\bon (?P<wd>{'|'.join(WEEKDAYS)})\b"),
+        lambda today, m: today - timedelta(days=(today.weekday() - WEEKDAYS[m.group("wd")]) % 7),
+    ),
+]
+
+_MERCHANT_STOP_WORDS = {
+    "today", "yesterday", "tonight", "on", "for", "of", "last", "this", "at", "from", "in",
+    "and", "with", "worth", "day", "the", "a", "an", "via", "using", "by", "to",
+} | set(MONTHS) | set(WEEKDAYS)
+_MERCHANT_PATTERN = re.compile(r"\b(?:at|from)\s+(?P<merchant>[A-Za-z&'][\w&'.-]*(?:\s+[A-Za-z&'][\w&'.-]*){0,3})")
+_UNPARSED_DATE_HINT = re.compile(rf"\b(?:{_MONTH_NAMES}|next|ago|week|month|weekend|\d{{1,2}}(?:st|nd|rd|th))\b")
+# Money coming in rather than going out; the crew decides how to record it
+_CREDIT_HINT = re.compile(r"\b(?:refund(?:s|ed)?|reimburse(?:d|ment)?|cash ?back|credit(?:ed)?(?! card)|salary|got paid|returned)\b")
+
+# Confidence weights; a result needs all three parts to clear the default threshold of 0.8
+# (a currency amount and a category alone make 0.75, so an unresolved date still goes to the crew)
+AMOUNT_WITH_CURRENCY = 0.45
+AMOUNT_BARE = 0.35
+DATE_RESOLVED = 0.25
+CATEGORY_MATCHED = 0.3
+CREDIT_PENALTY = 0.5
+
+
+class FastTransactionParser:
+    """Rule-based parser for common transaction phrasings, used before falling back to the crew"""
+
+    def __init__(self, category_keywords: Optional[Dict[str, List[str]]] = None):
+        keywords = category_keywords or CATEGORY_KEYWORDS
+        # Longest keywords first so "phone bill" wins over "phone"
+        self.keyword_index: List[Tuple[re.Pattern, str]] = [
+            (re.compile(rf"\b{re.escape(keyword)}\b"), category)
+            for category, words in keywords.items()
+            for keyword in words
+        ]
+        self.keyword_index.sort(key=lambda item: len(item[0].pattern), reverse=True)
+
+    def parse(self, input_text: str, categories: List[str], today: Optional[date] = None,
+              known_category: Optional[str] = None) -> Optional[Tuple[TransactionParsed, float]]:
+        """Return the parsed transaction and a confidence score in [0, 1], or None if no amount was found.
+
+        known_category, e.g. from the user's own history, takes precedence over keyword matching.
+        """
+        today = today or date.today()
+        text = " ".join(input_text.lower().split())
+
+        transaction_date, date_span, date_confidence = self._parse_date(text, today)
+        amount, amount_confidence = self._parse_amount(text, date_span)
+        if amount is None:
+            return None
+
+        merchant = self.parse_merchant(input_text)
+        category = known_category or self.match_category(text, categories)
+        category_confidence = CATEGORY_MATCHED if category else 0.0
+
+        parsed = TransactionParsed(
+            amount=amount,
+            merchant=merchant,
+            transaction_date=transaction_date,
+            category=category or "Other",
+        )
+        confidence = amount_confidence + date_confidence + category_confidence
+        if _CREDIT_HINT.search(text):
+            confidence = max(confidence - CREDIT_PENALTY, 0.0)
+        confidence = round(confidence, 2)
+        return parsed, confidence
+
+    def _parse_amount(self, text: str, date_span: Optional[Tuple[int, int]]) -> Tuple[Optional[Decimal], float]:
+        def outside_date(match: re.Match) -> bool:
+            return not date_span or match.end() <= date_span[0] or match.start() >= date_span[1]
+
+        for pattern in _CURRENCY_AMOUNT_PATTERNS:
+            matches = [m for m in pattern.finditer(text) if outside_date(m)]
+            if len(matches) == 1:
+                return self._to_decimal(matches[0].group("num")), AMOUNT_WITH_CURRENCY
+            if len(matches) > 1:
+                return None, 0.0
+
+        matches = [m for m in _BARE_NUMBER.finditer(text) if outside_date(m)]
+        # "3 days ago" style numbers belong to the date, not the amount
+        matches = [m for m in matches if not re.match(r"\s*days?\b", text[m.end():])]
+        if len(matches) == 1:
+            return self._to_decimal(matches[0].group("num")), AMOUNT_BARE
+        return None, 0.0
+
+    def _to_decimal(self, raw: str) -> Optional[Decimal]:
+        try:
+            amount = Decimal(raw.replace(",", "")).quantize(Decimal("0.01"))
+        except InvalidOperation:
+            return None
+        return amount if amount > 0 else None
+
+    def _parse_date(self, text: str, today: date) -> Tuple[date, Optional[Tuple[int, int]], float]:
+        for kind, pattern in _DATE_PATTERNS:
+            match = pattern.search(text)
+            if not match:
+                continue
+            try:
+                if kind in ("iso", "slash"):
+                    month = int(match.group("m"))
+                else:
+                    month = MONTHS[match.group("mon").rstrip(".")]
+                day = int(match.group("d"))
+                year = int(match.group("y")) if match.group("y") else today.year
+                if year < 100:
+                    year += 2000
+                parsed = date(year, month, day)
+                # "on March 3rd" or "on 5/13" with no year means the most recent such day
+                if not match.group("y") and parsed > today:
+                    parsed = parsed.replace(year=year - 1)
+                return parsed, match.span(), DATE_RESOLVED
+            except ValueError:
+                return today, match.span(), 0.0
+
+        for pattern, resolve in _RELATIVE_DATE_PATTERNS:
+            match = pattern.search(text)
+            if match:
+                return resolve(today, match), match.span(), DATE_RESOLVED
+
+        # A date-like word we could not resolve means the default of today is a guess
+        if _UNPARSED_DATE_HINT.search(text):
+            return today, None, 0.0
+        return today, None, DATE_RESOLVED
+
+    def parse_merchant(self, input_text: str) -> Optional[str]:
+        match = _MERCHANT_PATTERN.search(input_text)
+        if not match:
+            return None
+        words = []
+        for word in match.group("merchant").split():
+            if word.lower() in _MERCHANT_STOP_WORDS or re.match(r"\d", word):
+                break
+            words.append(word)
+        return " ".join(words).strip(".,") or None
+
+    def match_category(self, text: str, categories: List[str]) -> Optional[str]:
+        """Keyword lookup restricted to the user's categories; text must already be lowercased"""
+        allowed = {c.lower(): c for c in categories}
+        for pattern, category in self.keyword_index:
+            if category.lower() in allowed and pattern.search(text):
+                return allowed[category.lower()]
+        return None
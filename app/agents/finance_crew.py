@@ -1,33 +1,55 @@
 from crewai import Agent, Task, Crew, Process
 from langchain_groq import ChatGroq
-from langchain.prompts import PromptTemplate
 from sqlalchemy.ext.asyncio import AsyncSession
 from datetime import date, datetime
 from decimal import Decimal
-from typing import Dict, Optional, List
+from typing import AsyncIterator, Dict, Optional, List
+import asyncio
+import httpx
 import json
 import re
+import time
 from config.setting import Config
 from config.logger import logger
-from prompts.prompt import TRANSACTION_PARSE_PROMPT, TRANSACTION_CATEGORIZATION_PROMPT, SEARCH_PARSE_PROMPT, RECOMMENDATION_PROMPT
+from prompts.rendering import PromptRenderer, compact_text
 from services.user_service import UserService
+from services.category_memo import category_memo
 from schemas.transaction import TransactionParsed
 from schemas.analysis import Recommendation, SpendingAnalysis
+from agents.fast_parser import CATEGORY_KEYWORDS, FastTransactionParser
+from agents.llm_cache import llm_cache
+from agents.llm_recorder import llm_recorder
+from agents.llm_governor import llm_governor
+from agents.llm_hedging import llm_hedger
+from utils.deadline import DeadlineExceeded, within_deadline
+from utils.metrics import LLM_DEADLINE_FALLBACKS, LLMCall, llm_cache_hit, llm_call, on_llm_http_request
+from agents.search_cache import search_cache
+from agents.json_stream import JsonArrayStreamParser
+
+# "over 50", "more than $50", "under 20 dollars": the amount bounds a search can state without the LLM
+_MIN_AMOUNT = re.compile(r"\b(?:over|above|more than|greater than|at least)\s+\$?(\d+(?:\.\d+)?)")
+_MAX_AMOUNT = re.compile(r"\b(?:under|below|less than|at most|up to)\s+\$?(\d+(?:\.\d+)?)")
 
 class FinanceCrew:
-    def __init__(self):
-        # LLM Configuration
+    def __init__(self, http_async_client: Optional[httpx.AsyncClient] = None):
+        # LLM Configuration. crewai only reads the model settings from this client and calls the
+        # provider through its own litellm client, so crew runs do not use the shared pool
         self.crewai_llm = ChatGroq(
             model="groq/llama-3.3-70b-versatile",  # Fixed model name
             api_key=Config.groq_api_key,
             temperature=0.1,
         )
 
-        self.llm = ChatGroq(
+        # Plain LLM calls go through the shared keep-alive pool when given.
+        # Wrapped for record/replay when enabled; crews only read settings from crewai_llm, see _kickoff
+        self.llm = llm_recorder.wrap(ChatGroq(
             model="llama-3.3-70b-versatile",  # Fixed model name
             api_key=Config.groq_api_key,
             temperature=0.1,
-        )
+            http_async_client=http_async_client,
+        ))
+        # Same client constrained to emit a JSON object, for single-call structured output
+        self.json_llm = self.llm.bind(response_format={"type": "json_object"})
 
         # Transaction Parser Agent
         self.transaction_agent = Agent(
@@ -57,101 +79,243 @@ class FinanceCrew:
             verbose=False
         )
 
-        # Prompts
-        self.transaction_prompt = PromptTemplate(
-            input_variables=["input_text", "current_date"],
-            template=TRANSACTION_PARSE_PROMPT 
-        )
+        # Prompts, each full or compact as set in Config.prompt_modes
+        self.transaction_prompt = PromptRenderer("transaction_parse")
+        self.transaction_categorization_prompt = PromptRenderer("transaction_categorization")
+        self.transaction_single_shot_prompt = PromptRenderer("transaction_single_shot")
+        self.transaction_batch_prompt = PromptRenderer("transaction_batch")
+        self.search_prompt = PromptRenderer("search")
+        self.recommendation_prompt = PromptRenderer("recommendation")
 
-        self.transaction_categorization_prompt = PromptTemplate(
-            input_variables=["input_text", "current_date", "categories", "parsed_data"],
-            template=TRANSACTION_CATEGORIZATION_PROMPT
-        )
-        
-        self.search_prompt = PromptTemplate(
-            input_variables=["query", "current_date"],
-            template=SEARCH_PARSE_PROMPT
-        )
+        # Rule-based parser for common phrasings, checked before the crew
+        self.fast_parser = FastTransactionParser()
 
-        self.recommendation_prompt = PromptTemplate(
-            input_variables=["user_id", "spending_analysis", "monthly_trend", "goal_progress", "budget_comparison", "top_merchants"],
-            template=RECOMMENDATION_PROMPT
-        )
+    async def warm_up(self) -> None:
+        """Open the pooled connection to Groq ahead of the first request"""
+        try:
+            started = time.perf_counter()
+            await self.llm.ainvoke("ping")
+            logger.info(f"LLM warm-up completed in {time.perf_counter() - started:.2f}s")
+        except Exception as e:
+            logger.warning(f"LLM warm-up failed: {e}")
 
     async def parse_transaction(self, input_text: str, user_id: str, db: AsyncSession) -> Optional[TransactionParsed]:
-        """Parse and categorize natural language transaction input using CrewAI"""
+        """Parse and categorize natural language transaction input using CrewAI; raises DeadlineExceeded when
+        only a low-confidence local parse is available in time"""
         try:
-            # Fetch user preferences
-            user_prefs = await UserService().get_user_preferences(db, user_id)
-            categories = (
-                user_prefs.preferences.get("default_categories", ["Food", "Transportation", "Entertainment", "Shopping", "Bills"])
-                if user_prefs
-                else ["Food", "Transportation", "Entertainment", "Shopping", "Bills"]
-            )
+            categories = await UserService().get_categories(db, user_id)
 
-            # Create task
-            current_date = date.today().isoformat()
-            parse_task = Task(
-                description=self.transaction_prompt.format(
-                    input_text=input_text,
-                    current_date=current_date,
-                ),
-                agent=self.transaction_agent,
-                expected_output="Valid JSON with amount (decimal), merchant (string or null), transaction_date (YYYY-MM-DD), category (string)"
-            )
-            
-            categorize_task = Task(
-                description=self.transaction_categorization_prompt.format(
-                    input_text=input_text,
-                    current_date=current_date,
-                    categories=categories,
-                    parsed_data=parse_task.output
-                ),
-                agent=self.categorizer_agent,
-                expected_output="Complete JSON with amount, merchant, transaction_date, and category",
-                context=[parse_task]  # Sequential dependency
+            # The user's own history decides the category when it is unambiguous
+            memo_category = await category_memo.lookup(
+                db, user_id, self.fast_parser.parse_merchant(input_text), input_text, categories
             )
-            crew = Crew(
-                agents=[self.transaction_agent, self.categorizer_agent],
-                tasks=[parse_task, categorize_task],
-                process=Process.sequential,
-                verbose=False
-            )
-            result = await crew.kickoff_async()
 
-            json_data = self._extract_json(str(result))
+            # Try the local parser first; only low-confidence inputs go to the LLM
+            parsed = self._fast_parse(input_text, user_id, categories, memo_category)
+            if parsed:
+                return parsed
+
+            current_date = date.today().isoformat()
+            json_data = None
+            try:
+                if Config.transaction_parse_mode == "single_shot":
+                    try:
+                        json_data = await self._parse_single_shot(input_text, categories, current_date, user_id)
+                    except DeadlineExceeded:
+                        raise
+                    except Exception as e:
+                        logger.warning(f"Single-shot parse error for user {user_id}: {e}")
+                    if not json_data:
+                        logger.warning(f"Single-shot parse failed for user {user_id}, falling back to crew")
+                if not json_data:
+                    json_data = await self._parse_with_crew(input_text, categories, current_date, memo_category, user_id)
+            except DeadlineExceeded as e:
+                # The local parse was already below fast_parse_min_confidence; storing it would record a
+                # guess as a real transaction, so the caller reports the timeout instead
+                LLM_DEADLINE_FALLBACKS.labels("parse_transaction").inc()
+                logger.warning(f"LLM parse out of time for user {user_id} ({e}), leaving the input unparsed")
+                raise
             if not json_data:
                 return None
 
-            category = json_data.get("category", "Other")
-            if category not in categories:
-                logger.warning(f"Invalid category '{category}' for transaction: {input_text}. Defaulting to 'Other'.")
-                category = "Other"
-
-            parsed = TransactionParsed(
-                amount=Decimal(str(json_data.get('amount', 0))),
-                merchant=json_data.get('merchant') if json_data.get('merchant') != 'null' else None,
-                transaction_date=datetime.strptime(json_data.get('transaction_date', current_date), '%Y-%m-%d').date(),
-                category=category
-            )
-            logger.info(f"Parsed and categorized transaction for user {user_id}: {input_text} -> {category}")
+            parsed = self._to_parsed(json_data, input_text, categories, current_date, memo_category)
+            logger.info(f"Parsed and categorized transaction for user {user_id}: {input_text} -> {parsed.category}")
             return parsed
 
+        except DeadlineExceeded:
+            raise
         except Exception as e:
             logger.error(f"Error parsing transaction input '{input_text}' for user {user_id}: {e}")
             return None
 
-    async def parse_search_query(self, query: str) -> Dict:
+    async def parse_transactions_batch(self, texts: List[str], user_id: str, db: AsyncSession) -> List[Optional[TransactionParsed]]:
+        """Parse many inputs at once: local rules first, the rest in chunked JSON-mode LLM calls"""
+        categories = await UserService().get_categories(db, user_id)
+        current_date = date.today().isoformat()
+        results: List[Optional[TransactionParsed]] = [None] * len(texts)
+        memo_categories: List[Optional[str]] = [None] * len(texts)
+        pending = []
+
+        for i, text in enumerate(texts):
+            memo_categories[i] = await category_memo.lookup(
+                db, user_id, self.fast_parser.parse_merchant(text), text, categories
+            )
+            results[i] = self._fast_parse(text, user_id, categories, memo_categories[i])
+            if results[i] is None:
+                pending.append(i)
+
+        size = Config.batch_parse_chunk_size
+        chunks = [pending[start:start + size] for start in range(0, len(pending), size)]
+        chunk_results = await asyncio.gather(
+            *(self._parse_batch_chunk([texts[i] for i in chunk], categories, current_date, user_id) for chunk in chunks),
+            return_exceptions=True
+        )
+        for chunk, items in zip(chunks, chunk_results):
+            if isinstance(items, DeadlineExceeded):
+                LLM_DEADLINE_FALLBACKS.labels("parse_batch_chunk").inc()
+                # Left unparsed like a failed chunk, rather than stored from low-confidence local guesses
+                logger.warning(f"Batch parse chunk of {len(chunk)} out of time for user {user_id}, leaving it unparsed")
+                continue
+            if isinstance(items, Exception):
+                logger.error(f"Batch parse chunk of {len(chunk)} failed for user {user_id}: {items}")
+                continue
+            for i, json_data in zip(chunk, items):
+                if not json_data:
+                    continue
+                try:
+                    results[i] = self._to_parsed(json_data, texts[i], categories, current_date, memo_categories[i])
+                except (ValueError, ArithmeticError) as e:
+                    logger.warning(f"Invalid batch parse output for '{texts[i]}' (user {user_id}): {e}")
+
+        logger.info(f"Batch parsed {sum(r is not None for r in results)}/{len(texts)} transactions for user {user_id} "
+                    f"({len(texts) - len(pending)} local, {len(chunks)} LLM calls)")
+        return results
+
+    def _fast_parse(self, input_text: str, user_id: str, categories: List[str], memo_category: Optional[str]) -> Optional[TransactionParsed]:
+        """Return the rule-based parse when it is confident enough to skip the LLM"""
+        fast_result = self.fast_parser.parse(input_text, categories, known_category=memo_category)
+        if not fast_result:
+            return None
+        parsed, confidence = fast_result
+        if confidence >= Config.fast_parse_min_confidence:
+            logger.info(f"Fast-parsed transaction for user {user_id} (confidence {confidence}): {input_text} -> {parsed.category}")
+            return parsed
+        logger.debug(f"Fast parse confidence {confidence} below threshold for user {user_id}, using LLM")
+        return None
+
+    def _to_parsed(self, json_data: Dict, input_text: str, categories: List[str], current_date: str,
+                   memo_category: Optional[str] = None) -> TransactionParsed:
+        category = memo_category or json_data.get("category", "Other")
+        if category not in categories:
+            logger.warning(f"Invalid category '{category}' for transaction: {input_text}. Defaulting to 'Other'.")
+            category = "Other"
+
+        return TransactionParsed(
+            amount=Decimal(str(json_data.get('amount', 0))),
+            merchant=json_data.get('merchant') if json_data.get('merchant') != 'null' else None,
+            transaction_date=datetime.strptime(json_data.get('transaction_date') or current_date, '%Y-%m-%d').date(),
+            category=category
+        )
+
+    async def _parse_batch_chunk(self, texts: List[str], categories: List[str], current_date: str,
+                                 user_id: Optional[str] = None) -> List[Optional[Dict]]:
+        """Parse a chunk of inputs with one JSON-mode LLM call, returning results aligned with texts"""
+        prompt = self.transaction_batch_prompt.format(
+            inputs=[{"index": i, "text": text} for i, text in enumerate(texts)],
+            current_date=current_date,
+            categories=categories
+        )
+        response = await self._invoke_llm(prompt, "parse_batch_chunk", json_mode=True, user_id=user_id)
+        data = json.loads(response)
+        # JSON mode asks for {"transactions": [...]}, but a bare list is sometimes returned instead
+        items = data.get("transactions", []) if isinstance(data, dict) else data
+        if not isinstance(items, list):
+            items = []
+
+        aligned: List[Optional[Dict]] = [None] * len(texts)
+        for item in items:
+            index = item.get("index") if isinstance(item, dict) else None
+            if isinstance(index, int) and 0 <= index < len(texts):
+                aligned[index] = item
+        return aligned
+
+    async def _parse_single_shot(self, input_text: str, categories: List[str], current_date: str,
+                                 user_id: Optional[str] = None) -> Optional[Dict]:
+        """Extract amount, merchant, date and category with one JSON-mode LLM call"""
+        prompt = self.transaction_single_shot_prompt.format(
+            input_text=input_text,
+            current_date=current_date,
+            categories=categories
+        )
+        response = await self._invoke_llm(prompt, "parse_single_shot", json_mode=True, user_id=user_id)
+        return self._extract_json(response)
+
+    async def _parse_with_crew(self, input_text: str, categories: List[str], current_date: str,
+                               memo_category: Optional[str] = None, user_id: Optional[str] = None) -> Optional[Dict]:
+        """Run the sequential parser + categorizer crew; the categorizer is skipped when the category is known"""
+        parse_task = Task(
+            description=self.transaction_prompt.format(
+                input_text=input_text,
+                current_date=current_date,
+            ),
+            agent=self.transaction_agent,
+            expected_output="Valid JSON with amount (decimal), merchant (string or null), transaction_date (YYYY-MM-DD), category (string)"
+        )
+        
+        categorize_task = Task(
+            description=self.transaction_categorization_prompt.format(
+                input_text=input_text,
+                current_date=current_date,
+                categories=categories,
+                parsed_data=parse_task.output
+            ),
+            agent=self.categorizer_agent,
+            expected_output="Complete JSON with amount, merchant, transaction_date, and category",
+            context=[parse_task]  # Sequential dependency
+        )
+        if memo_category:
+            # Category already known, only the parser agent is needed
+            crew = Crew(
+                agents=[self.transaction_agent],
+                tasks=[parse_task],
+                process=Process.sequential,
+                verbose=False
+            )
+        else:
+            crew = Crew(
+                agents=[self.transaction_agent, self.categorizer_agent],
+                tasks=[parse_task, categorize_task],
+                process=Process.sequential,
+                verbose=False
+            )
+        result = await self._kickoff(crew, "parse_with_crew", user_id)
+        return self._extract_json(result)
+
+    async def parse_search_query(self, query: str, user_id: Optional[str] = None) -> Dict:
         """Parse natural language search query into filters using LLM"""
         try:
-            current_date = date.today().isoformat()
+            today = date.today()
+            cached = search_cache.get(query, today)
+            if cached is not None:
+                logger.info(f"Search query served from cache: {query}")
+                return cached
+
+            current_date = today.isoformat()
             prompt = self.search_prompt.format(query=query, current_date=current_date)
-            response = await self.llm.ainvoke(prompt)
-            json_data = self._extract_json(str(response.content))
+            try:
+                response = await self._invoke_llm(prompt, "parse_search_query", user_id=user_id)
+            except DeadlineExceeded as e:
+                # Not cached: the LLM should get another chance at this query
+                LLM_DEADLINE_FALLBACKS.labels("parse_search_query").inc()
+                logger.warning(f"Search query parse out of time ({e}), using local filters: {query}")
+                return self._local_filters(query)
+            json_data = self._extract_json(response)
             if not json_data:
                 return {}
 
             cleaned = self._clean_filters(json_data)
+            if cleaned:
+                search_cache.put(query, cleaned, today)
             logger.info(f"Parsed search query: {query}")
             return cleaned
 
@@ -159,6 +323,20 @@ class FinanceCrew:
             logger.error(f"Error parsing search query '{query}': {e}")
             return {}
 
+    def _local_filters(self, query: str) -> Dict:
+        """Category and amount bounds recognisable without the LLM; dates are left to the LLM parse"""
+        text = " ".join(query.lower().split())
+        filters = {}
+        category = self.fast_parser.match_category(text, list(CATEGORY_KEYWORDS))
+        if category:
+            filters["category"] = category
+        minimum, maximum = _MIN_AMOUNT.search(text), _MAX_AMOUNT.search(text)
+        if minimum:
+            filters["min_amount"] = minimum.group(1)
+        if maximum:
+            filters["max_amount"] = maximum.group(1)
+        return self._clean_filters(filters)
+
     async def generate_recommendations(self,
         user_id: str,
         spending_analysis: SpendingAnalysis,
@@ -167,21 +345,11 @@ class FinanceCrew:
         budget_comparison: Dict, 
         top_merchants: List[Dict],
         db: AsyncSession = None) -> List[Recommendation]:
-        """Generate financial recommendations"""
+        """Generate financial recommendations; raises DeadlineExceeded so the caller can fall back to local ones"""
         try:
-            spending_analysis_json = json.dumps(spending_analysis.dict(), default=str)
-            goal_progress_json = json.dumps(goal_progress, default=str)
-            budget_comparison_json = json.dumps(budget_comparison, default=str)
-            top_merchants_json = json.dumps(top_merchants, default=str)
-
             recommendation_task = Task(
-                description=self.recommendation_prompt.format(
-                    user_id=user_id,
-                    spending_analysis=spending_analysis_json,
-                    monthly_trend=monthly_trend,
-                    goal_progress=goal_progress_json,
-                    budget_comparison=budget_comparison_json,
-                    top_merchants=top_merchants_json
+                description=self._render_recommendation_prompt(
+                    user_id, spending_analysis, monthly_trend, goal_progress, budget_comparison, top_merchants
                 ),
                 agent=self.recommendation_agent,
                 expected_output="JSON array of recommendations with text, category, and priority"
@@ -193,10 +361,10 @@ class FinanceCrew:
                 process=Process.sequential,
                 verbose=False
             )
-            result = await crew.kickoff_async()
+            result = await self._kickoff(crew, "generate_recommendations", user_id)
 
             try:
-                result_str = str(result)
+                result_str = result
                 json_match = re.search(r'\[\s*\{.*\}\s*\]', result_str, re.DOTALL)
                 if json_match:
                     result_str = json_match.group()
@@ -205,25 +373,157 @@ class FinanceCrew:
                 if not isinstance(recommendations, list):
                     raise ValueError("Expected a list of recommendations")
                 
-                validated = [
-                    Recommendation(
-                        text=r["text"],
-                        category=r["category"],
-                        priority=r["priority"]
-                    )
-                    for r in recommendations
-                    if isinstance(r, dict) and "text" in r and "category" in r and "priority" in r
-                ]
+                validated = [r for r in map(self._to_recommendation, recommendations) if r]
                 logger.info(f"Generated {len(validated)} recommendations for user {user_id}")
                 return validated
             except (json.JSONDecodeError, ValueError, KeyError) as e:
                 logger.warning(f"Invalid recommendation format for user {user_id}: {e}")
                 return []
 
+        except DeadlineExceeded:
+            raise
         except Exception as e:
             logger.error(f"Error generating recommendations for user {user_id}: {e}")
             return []
 
+    async def stream_recommendations(self,
+        user_id: str,
+        spending_analysis: SpendingAnalysis,
+        monthly_trend: str,
+        goal_progress: Dict,
+        budget_comparison: Dict,
+        top_merchants: List[Dict]) -> AsyncIterator[Recommendation]:
+        """Yield each recommendation as soon as its JSON object is complete in the token stream"""
+        prompt = self._render_recommendation_prompt(
+            user_id, spending_analysis, monthly_trend, goal_progress, budget_comparison, top_merchants
+        )
+        parser = JsonArrayStreamParser()
+        count = 0
+        started = time.perf_counter()
+        async for chunk in self._stream_llm(prompt, "stream_recommendations", user_id):
+            for item in parser.feed(chunk):
+                recommendation = self._to_recommendation(item)
+                if recommendation:
+                    count += 1
+                    if count == 1:
+                        logger.info(f"First recommendation for user {user_id} after {time.perf_counter() - started:.2f}s")
+                    yield recommendation
+        logger.info(f"Streamed {count} recommendations for user {user_id} in {time.perf_counter() - started:.2f}s")
+
+    def _render_recommendation_prompt(self, user_id: str, spending_analysis: SpendingAnalysis, monthly_trend: str,
+                                      goal_progress: Dict, budget_comparison: Dict, top_merchants: List[Dict]) -> str:
+        return self.recommendation_prompt.format(
+            user_id=user_id,
+            spending_analysis=spending_analysis,
+            monthly_trend=compact_text(monthly_trend) if self.recommendation_prompt.compact else monthly_trend,
+            goal_progress=goal_progress,
+            budget_comparison=budget_comparison,
+            top_merchants=top_merchants
+        )
+
+    def _to_recommendation(self, item) -> Optional[Recommendation]:
+        if isinstance(item, dict) and "text" in item and "category" in item and "priority" in item:
+            return Recommendation(text=item["text"], category=item["category"], priority=item["priority"])
+        return None
+
+    async def _invoke_llm(self, prompt: str, method: str, json_mode: bool = False, user_id: Optional[str] = None) -> str:
+        """Call the plain LLM through the response cache and the governor; method labels the call's metrics"""
+        model = f"{self.llm.model_name}:json" if json_mode else self.llm.model_name
+        key = llm_cache.make_key(model, self.llm.temperature, prompt)
+        cached = await llm_cache.get(key)
+        if cached is not None:
+            llm_cache_hit(method)
+            return cached
+
+        llm = self.json_llm if json_mode else self.llm
+
+        async def invoke() -> str:
+            started = time.perf_counter()
+            with llm_call(method) as call:
+                # A duplicate goes out past the method's p95 only on a free slot of its own, so it never queues other users' calls
+                response = await llm_hedger.run(method, lambda: llm.ainvoke(prompt),
+                                                llm_governor.try_acquire, llm_governor.release)
+                usage = getattr(response, "usage_metadata", None) or {}
+                call.usage(usage.get("input_tokens"), usage.get("output_tokens"))
+            content = str(response.content)
+            if content:
+                await llm_cache.set(key, content, time.perf_counter() - started)
+            return content
+
+        return await llm_governor.run(key, user_id, method, invoke)
+
+    async def _stream_llm(self, prompt: str, method: str, user_id: Optional[str] = None) -> AsyncIterator[str]:
+        """Stream the plain LLM's tokens under a governor slot; a cached completion is replayed as a single chunk"""
+        key = llm_cache.make_key(self.llm.model_name, self.llm.temperature, prompt)
+        cached = await llm_cache.get(key)
+        if cached is not None:
+            llm_cache_hit(method)
+            yield cached
+            return
+
+        # Streams are not coalesced: recommendation_jobs already runs one per user and period
+        async with llm_governor.slot(user_id, method):
+            # Timed without llm_call: a context variable set here would leak into the consumer between chunks
+            call = LLMCall(method)
+            call.upstream_requests(1)
+            started = time.perf_counter()
+            chunks = []
+            try:
+                async for message in self.llm.astream(prompt):
+                    usage = getattr(message, "usage_metadata", None)
+                    if usage:
+                        call.usage(usage.get("input_tokens"), usage.get("output_tokens"))
+                    content = str(message.content)
+                    if content:
+                        chunks.append(content)
+                        yield content
+            except Exception:
+                call.finish("error")
+                raise
+            call.finish("ok")
+        completion = "".join(chunks)
+        if completion:
+            await llm_cache.set(key, completion, time.perf_counter() - started)
+
+    async def _kickoff(self, crew: Crew, method: str, user_id: Optional[str] = None) -> str:
+        """Run a crew through the response cache and the governor, keyed on its agents and rendered task prompts"""
+        prompt = "\n\n".join(f"{task.agent.role}\n{task.description}" for task in crew.tasks)
+        key = llm_cache.make_key(self.crewai_llm.model_name, self.crewai_llm.temperature, prompt)
+        cached = await llm_cache.get(key)
+        if cached is not None:
+            llm_cache_hit(method)
+            return cached
+
+        async def kickoff() -> str:
+            started = time.perf_counter()
+            with llm_call(method) as call:
+                usage: Dict = {}
+
+                async def run() -> str:
+                    # crewai calls the provider itself, so usage comes from the crew's own totals
+                    # Crews run several provider calls in sequence and are not hedged, only bounded by the deadline.
+                    # crewai runs them in a thread that a timeout cannot stop, so past the deadline the request
+                    # falls back while the thread keeps its governor slot until it finishes
+                    running = asyncio.ensure_future(crew.kickoff_async())
+                    llm_governor.hold_until(running)
+                    output = await within_deadline(asyncio.shield(running))
+                    totals = getattr(output, "token_usage", None)
+                    if totals:
+                        usage.update(input_tokens=totals.prompt_tokens, output_tokens=totals.completion_tokens,
+                                     upstream_requests=totals.successful_requests)
+                    return str(output)
+
+                # Usage is recorded with the completion, so replayed crews still report their tokens
+                result = await llm_recorder.complete(self.crewai_llm.model_name, prompt, run, usage)
+                if usage:
+                    call.usage(usage["input_tokens"], usage["output_tokens"])
+                    call.upstream_requests(usage["upstream_requests"])
+            if result:
+                await llm_cache.set(key, result, time.perf_counter() - started)
+            return result
+
+        return await llm_governor.run(key, user_id, method, kickoff)
+
     def _extract_json(self, text: str) -> Optional[Dict]:
         try:
             json_match = re.search(r'\{[^{}]*\}', text)
@@ -255,4 +555,41 @@ class FinanceCrew:
             if cleaned.get("min_amount") and cleaned["max_amount"] and cleaned["min_amount"] > cleaned["max_amount"]:
                 cleaned["min_amount"], cleaned["max_amount"] = cleaned["max_amount"], cleaned["min_amount"]
 
-        return cleaned
\ No newline at end of file
+        return cleaned
+
+
+# Process-wide crew, created once in the FastAPI lifespan
+_finance_crew: Optional[FinanceCrew] = None
+_http_async_client: Optional[httpx.AsyncClient] = None
+
+async def init_finance_crew() -> FinanceCrew:
+    global _finance_crew, _http_async_client
+    _http_async_client = httpx.AsyncClient(
+        limits=httpx.Limits(
+            max_connections=Config.llm_max_connections,
+            max_keepalive_connections=Config.llm_max_connections,
+            keepalive_expiry=Config.llm_keepalive_seconds,
+        ),
+        timeout=httpx.Timeout(Config.llm_timeout_seconds),
+        event_hooks={"request": [on_llm_http_request]},
+    )
+    _finance_crew = FinanceCrew(http_async_client=_http_async_client)
+    if Config.llm_warmup:
+        await _finance_crew.warm_up()
+    logger.info("FinanceCrew initialized")
+    return _finance_crew
+
+def get_finance_crew() -> FinanceCrew:
+    """Return the shared crew, building one lazily when running outside the app lifespan"""
+    global _finance_crew
+    if _finance_crew is None:
+        _finance_crew = FinanceCrew()
+    return _finance_crew
+
+async def close_finance_crew() -> None:
+    global _finance_crew, _http_async_client
+    if _http_async_client is not None:
+        await _http_async_client.aclose()
+    _finance_crew = None
+    _http_async_client = None
+    logger.info("FinanceCrew closed")
@@ -0,0 +1,65 @@
+from typing import Dict, List
+import json
+
+
+class JsonArrayStreamParser:
+    """Incrementally extracts the objects of a JSON array from streamed LLM text.
+
+    Text before the array (prose, code fences) is skipped. Each top-level object
+    is returned from feed() as soon as its closing brace arrives.
+    """
+
+    def __init__(self):
+        self._in_array = False
+        self._depth = 0
+        self._in_string = False
+        self._escaped = False
+        self._buffer: List[str] = []
+        self.objects_found = 0
+
+    def feed(self, chunk: str) -> List[Dict]:
+        """Consume the next piece of text and return the objects it completed"""
+        completed = []
+        for char in chunk:
+            if not self._in_array:
+                if char == "[":
+                    self._in_array = True
+                continue
+
+            if self._depth == 0:
+                # Between objects: skip commas and whitespace until the next object or the end
+                if char == "{":
+                    self._depth = 1
+                    self._buffer = [char]
+                elif char == "]":
+                    # End of the array; a later one (e.g. after "[note]" prose) is still picked up
+                    self._in_array = False
+                continue
+
+            self._buffer.append(char)
+            if self._in_string:
+                if self._escaped:
+                    self._escaped = False
+                elif char == "\\":
+                    self._escaped = True
+                elif char == '"':
+                    self._in_string = False
+            elif char == '"':
+                self._in_string = True
+            elif char == "{":
+                self._depth += 1
+            elif char == "}":
+                self._depth -= 1
+                if self._depth == 0:
+                    parsed = self._load("".join(self._buffer))
+                    if parsed is not None:
+                        self.objects_found += 1
+                        completed.append(parsed)
+        return completed
+
+    def _load(self, text: str):
+        try:
+            parsed = json.loads(text)
+        except json.JSONDecodeError:
+            return None
+        return parsed if isinstance(parsed, dict) else None
@@ -0,0 +1,119 @@
+from collections import OrderedDict
+from typing import Dict, Optional, Tuple
+import asyncio
+import hashlib
+import os
+import sqlite3
+import time
+from config.setting import Config
+from config.logger import logger
+
+
+class LLMCache:
+    """Content-addressed cache of LLM completions with an in-memory LRU and an optional SQLite tier"""
+
+    def __init__(self, max_entries: int = 512, ttl_seconds: int = 86400, db_path: Optional[str] = None):
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        self.db_path = db_path
+        # key -> (stored_at, completion), least recently used first
+        self._entries: "OrderedDict[str, Tuple[float, str]]" = OrderedDict()
+        self.hits = 0
+        self.disk_hits = 0
+        self.misses = 0
+        self.saved_seconds = 0.0
+        self._miss_seconds = 0.0
+        if self.db_path:
+            self._init_disk()
+
+    def make_key(self, model: str, temperature: float, prompt: str) -> str:
+        payload = f"{model}\x00{temperature}\x00{prompt}".encode("utf-8")
+        return hashlib.sha256(payload).hexdigest()
+
+    async def get(self, key: str) -> Optional[str]:
+        entry = self._entries.get(key)
+        if entry and not self._expired(entry[0]):
+            self._entries.move_to_end(key)
+            self._record_hit()
+            return entry[1]
+        if entry:
+            del self._entries[key]
+
+        if self.db_path:
+            entry = await asyncio.to_thread(self._disk_get, key)
+            if entry and not self._expired(entry[0]):
+                self._remember(key, entry)
+                self.disk_hits += 1
+                self._record_hit()
+                return entry[1]
+
+        self.misses += 1
+        return None
+
+    async def set(self, key: str, completion: str, elapsed: float = 0.0) -> None:
+        """Store a completion; elapsed is the upstream latency, used to estimate time saved by hits"""
+        self._miss_seconds += elapsed
+        entry = (time.time(), completion)
+        self._remember(key, entry)
+        if self.db_path:
+            await asyncio.to_thread(self._disk_set, key, entry)
+
+    def stats(self) -> Dict:
+        lookups = self.hits + self.misses
+        return {
+            "entries": len(self._entries),
+            "hits": self.hits,
+            "disk_hits": self.disk_hits,
+            "misses": self.misses,
+            "hit_rate": round(self.hits / lookups, 4) if lookups else 0.0,
+            "saved_seconds": round(self.saved_seconds, 3),
+        }
+
+    def clear(self) -> None:
+        self._entries.clear()
+        if self.db_path:
+            with sqlite3.connect(self.db_path) as conn:
+                conn.execute("DELETE FROM llm_cache")
+
+    def _record_hit(self) -> None:
+        self.hits += 1
+        # Each hit saves roughly one average upstream call
+        if self.misses:
+            self.saved_seconds += self._miss_seconds / self.misses
+
+    def _remember(self, key: str, entry: Tuple[float, str]) -> None:
+        self._entries[key] = entry
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+
+    def _expired(self, stored_at: float) -> bool:
+        return self.ttl_seconds > 0 and time.time() - stored_at > self.ttl_seconds
+
+    def _init_disk(self) -> None:
+        os.makedirs(os.path.dirname(self.db_path) or ".", exist_ok=True)
+        with sqlite3.connect(self.db_path) as conn:
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS llm_cache (key TEXT PRIMARY KEY, stored_at REAL NOT NULL, completion TEXT NOT NULL)"
+            )
+        logger.info(f"LLM cache disk tier at {self.db_path}")
+
+    def _disk_get(self, key: str) -> Optional[Tuple[float, str]]:
+        with sqlite3.connect(self.db_path) as conn:
+            row = conn.execute("SELECT stored_at, completion FROM llm_cache WHERE key = ?", (key,)).fetchone()
+        return (row[0], row[1]) if row else None
+
+    def _disk_set(self, key: str, entry: Tuple[float, str]) -> None:
+        with sqlite3.connect(self.db_path) as conn:
+            conn.execute(
+                "INSERT OR REPLACE INTO llm_cache (key, stored_at, completion) VALUES (?, ?, ?)",
+                (key, entry[0], entry[1]),
+            )
+
+
+# Shared by every FinanceCrew so repeated prompts hit across requests
+llm_cache = LLMCache(
+    max_entries=Config.llm_cache_size,
+    ttl_seconds=Config.llm_cache_ttl_seconds,
+    db_path=Config.llm_cache_path,
+)
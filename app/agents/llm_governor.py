@@ -0,0 +1,144 @@
+from collections import OrderedDict, deque
+from contextlib import asynccontextmanager
+from contextvars import ContextVar
+from typing import AsyncIterator, Awaitable, Callable, Deque, Dict, List, Optional
+import asyncio
+import time
+from config.setting import Config
+from utils.deadline import DeadlineExceeded, remaining, within_deadline
+from utils.metrics import LLM_COALESCED, LLM_QUEUE_DEPTH, LLM_QUEUE_WAIT_SECONDS, LLM_ACTIVE_CALLS, add_stage
+
+# Work started under the current slot that keeps it after the holder leaves, see hold_until
+_outliving: ContextVar[Optional[List[asyncio.Future]]] = ContextVar("llm_slot_outliving", default=None)
+
+
+class LLMGovernor:
+    """Caps concurrent upstream LLM calls, hands free slots to waiting users round-robin,
+    and lets identical in-flight prompts share one call"""
+
+    def __init__(self, max_concurrency: int = 8):
+        self.max_concurrency = max_concurrency
+        self.active = 0
+        # user_id -> waiters in arrival order; the first user is served next, then moved to the back
+        self._waiting: "OrderedDict[str, Deque[asyncio.Future]]" = OrderedDict()
+        # cache key -> result of the call currently in flight for it
+        self._inflight: Dict[str, asyncio.Future] = {}
+
+    async def run(self, key: str, user_id: Optional[str], method: str, call: Callable[[], Awaitable[str]]) -> str:
+        """Return call()'s result, run under a slot, or the result of an identical call already in flight"""
+        while key in self._inflight:
+            shared = self._inflight[key]
+            LLM_COALESCED.labels(method).inc()
+            started = time.perf_counter()
+            try:
+                return await within_deadline(asyncio.shield(shared))
+            except asyncio.CancelledError:
+                if not shared.cancelled():
+                    raise
+                # The leading request was cancelled; the next caller in line takes over
+            except DeadlineExceeded:
+                if not shared.done() or not isinstance(shared.exception(), DeadlineExceeded):
+                    raise
+                # The leader ran out of its own request's time, not ours; take over as with a cancel
+            finally:
+                add_stage("llm_wait", time.perf_counter() - started)
+
+        future = asyncio.get_running_loop().create_future()
+        self._inflight[key] = future
+        try:
+            async with self.slot(user_id, method):
+                result = await call()
+        except asyncio.CancelledError:
+            future.cancel()
+            raise
+        except Exception as e:
+            future.set_exception(e)
+            future.exception()  # mark retrieved; with no followers nobody else reads it
+            raise
+        else:
+            future.set_result(result)
+            return result
+        finally:
+            del self._inflight[key]
+
+    @asynccontextmanager
+    async def slot(self, user_id: Optional[str], method: str) -> AsyncIterator[None]:
+        """Hold one of the max_concurrency upstream slots, waiting in the user's queue if none is free"""
+        await self._acquire(user_id or "", method)
+        outliving: List[asyncio.Future] = []
+        token = _outliving.set(outliving)
+        try:
+            yield
+        finally:
+            _outliving.reset(token)
+            pending = [future for future in outliving if not future.done()]
+            if pending:
+                asyncio.gather(*pending, return_exceptions=True).add_done_callback(lambda _: self._release())
+            else:
+                self._release()
+
+    def hold_until(self, future: asyncio.Future) -> None:
+        """Keep the current slot, even after its holder gives up, until future finishes; for upstream
+        work that cannot be cancelled, such as a call running in a thread"""
+        outliving = _outliving.get()
+        if outliving is not None:
+            outliving.append(future)
+
+    async def _acquire(self, user_id: str, method: str) -> None:
+        if self.active < self.max_concurrency and not self._waiting:
+            self.active += 1
+            return
+
+        waiter = asyncio.get_running_loop().create_future()
+        self._waiting.setdefault(user_id, deque()).append(waiter)
+        LLM_QUEUE_DEPTH.inc()
+        started = time.perf_counter()
+        left = remaining()
+        try:
+            await (waiter if left is None else asyncio.wait_for(waiter, max(left, 0)))
+        except (asyncio.CancelledError, asyncio.TimeoutError) as e:
+            # Granted just before the cancel arrived: pass the slot on instead of leaking it
+            if waiter.done() and not waiter.cancelled():
+                self._release()
+            if isinstance(e, asyncio.TimeoutError):
+                raise DeadlineExceeded(f"Deadline passed waiting {time.perf_counter() - started:.2f}s for an LLM slot") from None
+            raise
+        finally:
+            LLM_QUEUE_DEPTH.dec()
+            waited = time.perf_counter() - started
+            LLM_QUEUE_WAIT_SECONDS.labels(method).observe(waited)
+            add_stage("llm_wait", waited)
+
+    def has_capacity(self) -> bool:
+        """Whether a call could start right now without queueing anyone"""
+        return self.active < self.max_concurrency and not self._waiting
+
+    def try_acquire(self) -> bool:
+        """Take a slot only if one is free right now; whoever gets True must call release()"""
+        if not self.has_capacity():
+            return False
+        self.active += 1
+        return True
+
+    def release(self) -> None:
+        """Give back a slot taken with try_acquire()"""
+        self._release()
+
+    def _release(self) -> None:
+        # The slot moves straight to the next waiter, so active only drops when nobody is queued
+        while self._waiting:
+            user_id, waiters = next(iter(self._waiting.items()))
+            waiter = waiters.popleft()
+            if waiters:
+                self._waiting.move_to_end(user_id)
+            else:
+                del self._waiting[user_id]
+            if not waiter.done():
+                waiter.set_result(None)
+                return
+        self.active -= 1
+
+
+# Shared by every FinanceCrew so the cap holds across requests
+llm_governor = LLMGovernor(max_concurrency=Config.llm_max_concurrency)
+LLM_ACTIVE_CALLS.set_function(lambda: llm_governor.active)
@@ -0,0 +1,102 @@
+from collections import deque
+from typing import Awaitable, Callable, Deque, Dict, Optional, TypeVar
+import asyncio
+import time
+from config.setting import Config
+from config.logger import logger
+from utils.deadline import DeadlineExceeded, remaining
+from utils.metrics import LLM_HEDGES, current_llm_call
+
+T = TypeVar("T")
+
+
+class LLMHedger:
+    """Runs an LLM call within the request deadline, sending one duplicate once the call has taken
+    longer than the method's recent p95; whichever answer arrives first wins"""
+
+    def __init__(self, enabled: bool = True, percentile: float = 0.95, window: int = 200,
+                 min_samples: int = 20, default_delay: float = 3.0):
+        self.enabled = enabled
+        self.percentile = percentile
+        self.min_samples = min_samples
+        self.default_delay = default_delay
+        self.window = window
+        # method -> recent successful call latencies from the first attempt's start, in seconds
+        self._latencies: Dict[str, Deque[float]] = {}
+
+    def hedge_delay(self, method: str) -> float:
+        return self._quantile(method, self.percentile) or self.default_delay
+
+    async def run(self, method: str, call: Callable[[], Awaitable[T]],
+                  acquire_hedge_slot: Callable[[], bool] = lambda: True,
+                  release_hedge_slot: Callable[[], None] = lambda: None) -> T:
+        """Return the first successful attempt's result; raise DeadlineExceeded when the deadline cannot be met.
+        A hedge is only sent when acquire_hedge_slot() grants it a slot, released when the hedge finishes or is cancelled"""
+        left = remaining()
+        typical = self._quantile(method, 0.5)
+        if left is not None and (left <= 0 or (typical and left < typical)):
+            # Not enough time for even a typical call; fail over now rather than at the deadline
+            raise DeadlineExceeded(f"{left:.2f}s left for {method}, typical call takes {typical or 0:.2f}s")
+
+        started = time.perf_counter()
+        attempts = {asyncio.ensure_future(call()): "primary"}
+        hedge_at = self.hedge_delay(method) if self.enabled else None
+        error: Optional[BaseException] = None
+        try:
+            while attempts:
+                elapsed = time.perf_counter() - started
+                waits = [w for w in (None if left is None else left - elapsed,
+                                     hedge_at - elapsed if hedge_at is not None else None) if w is not None]
+                done, _ = await asyncio.wait(attempts, timeout=max(min(waits), 0) if waits else None,
+                                             return_when=asyncio.FIRST_COMPLETED)
+                for attempt in done:
+                    kind = attempts.pop(attempt)
+                    if attempt.exception() is None:
+                        # Measured from the primary's start: what the caller waited, which is what the
+                        # hedge delay has to beat, rather than the winning attempt's own duration
+                        self._observe(method, time.perf_counter() - started)
+                        if kind == "hedge":
+                            LLM_HEDGES.labels(method, "won").inc()
+                        return attempt.result()
+                    error = attempt.exception()
+                if done:
+                    continue
+
+                elapsed = time.perf_counter() - started
+                if left is not None and elapsed >= left:
+                    raise DeadlineExceeded(f"{method} did not answer within {left:.2f}s")
+                if hedge_at is not None and elapsed >= hedge_at:
+                    hedge_at = None  # at most one duplicate per call
+                    if acquire_hedge_slot():
+                        LLM_HEDGES.labels(method, "sent").inc()
+                        llm_call = current_llm_call()
+                        if llm_call:
+                            llm_call.attempts += 1
+                        logger.debug(f"Hedging {method} after {elapsed:.2f}s")
+                        hedge = asyncio.ensure_future(call())
+                        # A done-callback also runs when the hedge is cancelled before it starts
+                        hedge.add_done_callback(lambda _: release_hedge_slot())
+                        attempts[hedge] = "hedge"
+            raise error
+        finally:
+            for attempt in attempts:
+                attempt.cancel()
+
+    def _observe(self, method: str, seconds: float) -> None:
+        self._latencies.setdefault(method, deque(maxlen=self.window)).append(seconds)
+
+    def _quantile(self, method: str, q: float) -> Optional[float]:
+        samples = self._latencies.get(method)
+        if not samples or len(samples) < self.min_samples:
+            return None
+        ordered = sorted(samples)
+        return ordered[min(int(len(ordered) * q), len(ordered) - 1)]
+
+
+# Shared so latency history accumulates across requests
+llm_hedger = LLMHedger(
+    enabled=Config.llm_hedging,
+    percentile=Config.llm_hedge_percentile,
+    min_samples=Config.llm_hedge_min_samples,
+    default_delay=Config.llm_hedge_default_delay_seconds,
+)
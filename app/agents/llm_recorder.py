@@ -0,0 +1,232 @@
+from datetime import date
+from typing import Any, AsyncIterator, Awaitable, Callable, Dict, List, Optional
+import asyncio
+import hashlib
+import json
+import os
+import time
+from langchain_core.callbacks import AsyncCallbackManagerForLLMRun, CallbackManagerForLLMRun
+from langchain_core.language_models.chat_models import BaseChatModel
+from langchain_core.messages import AIMessage, AIMessageChunk, BaseMessage
+from langchain_core.outputs import ChatGeneration, ChatGenerationChunk, ChatResult
+from config.setting import Config
+from config.logger import logger
+
+RECORD_MODES = ("off", "record", "replay")
+# Prompts embed today's date; storing it as a placeholder keeps recordings replayable on later days
+TODAY = "<today>"
+
+
+class ReplayMiss(LookupError):
+    """Raised in replay mode for a prompt that was never recorded"""
+
+
+class LLMRecorder:
+    """Records prompt -> completion pairs with timings to a JSONL file, or replays them instead of calling the model"""
+
+    def __init__(self, mode: str = "off", path: str = "llm_recordings.jsonl", replay_latency: bool = False):
+        self.configure(mode, path, replay_latency)
+
+    def configure(self, mode: str, path: str, replay_latency: bool = False) -> None:
+        if mode not in RECORD_MODES:
+            raise ValueError(f"LLM record mode must be one of: {', '.join(RECORD_MODES)}")
+        self.mode = mode
+        self.path = path
+        self.replay_latency = replay_latency
+        # key -> recorded calls in order; replay cycles through them so repeats keep their spread of timings
+        self._recordings: Dict[str, List[Dict]] = {}
+        self._next: Dict[str, int] = {}
+        self.recorded = 0
+        self.replayed = 0
+        self.misses = 0
+        if mode == "replay":
+            self._load()
+
+    @property
+    def enabled(self) -> bool:
+        return self.mode != "off"
+
+    def wrap(self, llm: BaseChatModel) -> BaseChatModel:
+        """Route a chat model's async calls through the recorder; returned unchanged when recording is off"""
+        if not self.enabled:
+            return llm
+        return RecordReplayChatModel(inner=llm, recorder=self, model_name=llm.model_name, temperature=llm.temperature)
+
+    async def complete(self, model: str, prompt: str, call: Callable[[], Awaitable[str]],
+                       usage: Optional[Dict] = None) -> str:
+        """Return call()'s completion, recording it, or the recorded completion for this model and prompt.
+        usage is the token usage call() fills in; it is recorded with the completion and refilled on replay"""
+        if not self.enabled:
+            return await call()
+        key, prompt = self._key(model, prompt)
+        if self.mode == "replay":
+            entry = self._replay(key, model, usage)
+            if self.replay_latency:
+                await asyncio.sleep(entry["latency"])
+            return entry["completion"].replace(TODAY, date.today().isoformat())
+
+        started = time.perf_counter()
+        completion = await call()
+        await self._record(key, model, prompt, completion, time.perf_counter() - started, usage=usage)
+        return completion
+
+    def complete_sync(self, model: str, prompt: str, call: Callable[[], str], usage: Optional[Dict] = None) -> str:
+        """Blocking variant of complete, for sync invoke() on a wrapped model"""
+        if not self.enabled:
+            return call()
+        key, prompt = self._key(model, prompt)
+        if self.mode == "replay":
+            entry = self._replay(key, model, usage)
+            if self.replay_latency:
+                time.sleep(entry["latency"])
+            return entry["completion"].replace(TODAY, date.today().isoformat())
+
+        started = time.perf_counter()
+        completion = call()
+        self._append(self._entry(key, model, prompt, completion, time.perf_counter() - started, usage=usage))
+        return completion
+
+    async def stream(self, model: str, prompt: str, stream: Callable[[], AsyncIterator[str]],
+                     usage: Optional[Dict] = None) -> AsyncIterator[str]:
+        """Like complete, for token streams; chunks are recorded with their offsets from the start of the call"""
+        if not self.enabled:
+            async for chunk in stream():
+                yield chunk
+            return
+        key, prompt = self._key(model, prompt)
+        if self.mode == "replay":
+            entry = self._replay(key, model, usage)
+            today = date.today().isoformat()
+            elapsed = 0.0
+            for offset, chunk in entry.get("chunks") or [[entry["latency"], entry["completion"]]]:
+                if self.replay_latency:
+                    await asyncio.sleep(max(offset - elapsed, 0.0))
+                    elapsed = offset
+                yield chunk.replace(TODAY, today)
+            return
+
+        started = time.perf_counter()
+        chunks = []
+        async for chunk in stream():
+            chunks.append([time.perf_counter() - started, chunk])
+            yield chunk
+        await self._record(key, model, prompt, "".join(chunk for _, chunk in chunks), time.perf_counter() - started,
+                           chunks, usage)
+
+    def stats(self) -> Dict:
+        return {"recorded": self.recorded, "replayed": self.replayed, "misses": self.misses,
+                "prompts": len(self._recordings)}
+
+    def _key(self, model: str, prompt: str):
+        prompt = prompt.replace(date.today().isoformat(), TODAY)
+        return hashlib.sha256(f"{model}\x00{prompt}".encode("utf-8")).hexdigest(), prompt
+
+    def _replay(self, key: str, model: str, usage: Optional[Dict] = None) -> Dict:
+        entries = self._recordings.get(key)
+        if not entries:
+            self.misses += 1
+            logger.warning(f"No recorded completion for {model} prompt {key[:12]}")
+            raise ReplayMiss(f"No recorded completion for {model} prompt {key[:12]}")
+        index = self._next.get(key, 0)
+        self._next[key] = (index + 1) % len(entries)
+        self.replayed += 1
+        if usage is not None:
+            usage.update(entries[index].get("usage") or {})
+        return entries[index]
+
+    async def _record(self, key: str, model: str, prompt: str, completion: str, latency: float,
+                      chunks: Optional[List] = None, usage: Optional[Dict] = None) -> None:
+        await asyncio.to_thread(self._append, self._entry(key, model, prompt, completion, latency, chunks, usage))
+
+    def _entry(self, key: str, model: str, prompt: str, completion: str, latency: float,
+               chunks: Optional[List] = None, usage: Optional[Dict] = None) -> Dict:
+        today = date.today().isoformat()
+        entry = {"key": key, "model": model, "prompt": prompt, "completion": completion.replace(today, TODAY),
+                 "latency": round(latency, 4)}
+        if chunks is not None:
+            entry["chunks"] = [[round(offset, 4), chunk.replace(today, TODAY)] for offset, chunk in chunks]
+        if usage:
+            entry["usage"] = dict(usage)
+        self._recordings.setdefault(key, []).append(entry)
+        self.recorded += 1
+        return entry
+
+    def _append(self, entry: Dict) -> None:
+        with open(self.path, "a", encoding="utf-8") as f:
+            f.write(json.dumps(entry, ensure_ascii=False) + "\n")
+
+    def _load(self) -> None:
+        if not os.path.exists(self.path):
+            logger.warning(f"LLM recording {self.path} not found; every call will miss")
+            return
+        with open(self.path, encoding="utf-8") as f:
+            for line in f:
+                if line.strip():
+                    entry = json.loads(line)
+                    self._recordings.setdefault(entry["key"], []).append(entry)
+        logger.info(f"Loaded {sum(map(len, self._recordings.values()))} recorded LLM calls from {self.path}")
+
+
+class RecordReplayChatModel(BaseChatModel):
+    """Chat model wrapper that sends calls through an LLMRecorder; model_name and temperature mirror the inner model"""
+
+    inner: BaseChatModel
+    recorder: Any
+    model_name: str
+    temperature: float
+
+    @property
+    def _llm_type(self) -> str:
+        return "record-replay"
+
+    def _prompt(self, messages: List[BaseMessage], kwargs: Dict) -> str:
+        # Bound options such as response_format change the completion, so they are part of the key
+        options = json.dumps(kwargs, sort_keys=True, default=str) if kwargs else ""
+        return options + "\n".join(f"{message.type}: {message.content}" for message in messages)
+
+    def _generate(self, messages: List[BaseMessage], stop: Optional[List[str]] = None,
+                  run_manager: Optional[CallbackManagerForLLMRun] = None, **kwargs: Any) -> ChatResult:
+        usage: Dict = {}
+
+        def call() -> str:
+            message = self.inner.invoke(messages, stop=stop, **kwargs)
+            usage.update(message.usage_metadata or {})
+            return str(message.content)
+
+        content = self.recorder.complete_sync(self.model_name, self._prompt(messages, kwargs), call, usage)
+        return ChatResult(generations=[ChatGeneration(message=AIMessage(content=content, usage_metadata=usage or None))])
+
+    async def _agenerate(self, messages: List[BaseMessage], stop: Optional[List[str]] = None,
+                         run_manager: Optional[AsyncCallbackManagerForLLMRun] = None, **kwargs: Any) -> ChatResult:
+        usage: Dict = {}
+
+        async def call() -> str:
+            message = await self.inner.ainvoke(messages, stop=stop, **kwargs)
+            usage.update(message.usage_metadata or {})
+            return str(message.content)
+
+        content = await self.recorder.complete(self.model_name, self._prompt(messages, kwargs), call, usage)
+        return ChatResult(generations=[ChatGeneration(message=AIMessage(content=content, usage_metadata=usage or None))])
+
+    async def _astream(self, messages: List[BaseMessage], stop: Optional[List[str]] = None,
+                       run_manager: Optional[AsyncCallbackManagerForLLMRun] = None, **kwargs: Any) -> AsyncIterator[ChatGenerationChunk]:
+        usage: Dict = {}
+
+        async def stream() -> AsyncIterator[str]:
+            async for message in self.inner.astream(messages, stop=stop, **kwargs):
+                usage.update(message.usage_metadata or {})
+                yield str(message.content)
+
+        async for chunk in self.recorder.stream(self.model_name, self._prompt(messages, kwargs), stream, usage):
+            yield ChatGenerationChunk(message=AIMessageChunk(content=chunk))
+        if usage:
+            # Providers report stream usage on the last chunk; it is sent as its own empty chunk here
+            yield ChatGenerationChunk(message=AIMessageChunk(content="", usage_metadata=usage))
+
+
+# Shared by every FinanceCrew; configured from settings, or by a benchmark before the crew is built
+llm_recorder = LLMRecorder(
+    mode=Config.llm_record_mode,
+    path=Config.llm_record_path,
+    replay_latency=Config.llm_replay_latency,
+)
@@ -0,0 +1,124 @@
+from collections import OrderedDict
+from datetime import date, timedelta
+from dateutil.relativedelta import relativedelta
+from typing import Callable, Dict, Optional, Tuple
+import re
+from config.setting import Config
+
+_RELATIVE_WORDS = re.compile(
+    r"\b(?:today|yesterday|tonight|this|last|past|previous|prev|recent|recently|ago|current|week|weekly|month|monthly|year|yearly|days)\b"
+)
+_CURRENCY_AMOUNT = re.compile(r"(?:[$₹€£]\s?(\d+(?:\.\d+)?))|(?:(\d+(?:\.\d+)?)\s?(?:[$₹€£]|dollars?|bucks?|usd|rupees?|rs\b))")
+_THOUSANDS = re.compile(r"(?<=\d),(?=\d{3}\b)")
+_TRAILING_ZEROS = re.compile(r"(\d+)\.0+\b")
+_YEAR = re.compile(r"\b(?:19|20)\d{2}\b")
+_LEADING_FILLER = re.compile(r"^(?:please\s+)?(?:show(?:\s+me)?|find|list|get|give me|display)\s+")
+
+
+def _month_start(day: date) -> date:
+    return day.replace(day=1)
+
+
+# Named date ranges the LLM resolves "this week", "last month" etc. to, recomputed against today on lookup
+PERIODS: Dict[str, Callable[[date], Tuple[date, date]]] = {
+    # Single days given as a range, so they are told apart from ranges that start today
+    "today": lambda t: (t, t),
+    "yesterday": lambda t: (t - timedelta(days=1), t - timedelta(days=1)),
+    "this_week_to_date": lambda t: (t - timedelta(days=t.weekday()), t),
+    "this_week": lambda t: (t - timedelta(days=t.weekday()), t - timedelta(days=t.weekday()) + timedelta(days=6)),
+    "previous_week": lambda t: (t - timedelta(days=t.weekday() + 7), t - timedelta(days=t.weekday() + 1)),
+    "last_7_days": lambda t: (t - timedelta(days=7), t),
+    "last_30_days": lambda t: (t - timedelta(days=30), t),
+    "this_month_to_date": lambda t: (_month_start(t), t),
+    "this_month": lambda t: (_month_start(t), _month_start(t) + relativedelta(months=1) - timedelta(days=1)),
+    "previous_month": lambda t: (_month_start(t) - relativedelta(months=1), _month_start(t) - timedelta(days=1)),
+    "this_year_to_date": lambda t: (date(t.year, 1, 1), t),
+    "previous_year": lambda t: (date(t.year - 1, 1, 1), date(t.year - 1, 12, 31)),
+}
+
+DAYS: Dict[str, Callable[[date], date]] = {
+    "today": lambda t: t,
+    "yesterday": lambda t: t - timedelta(days=1),
+    "day_before_yesterday": lambda t: t - timedelta(days=2),
+}
+
+
+class SearchQueryCache:
+    """Caches parsed search filters per canonical query, storing relative dates so entries stay valid across days"""
+
+    def __init__(self, max_entries: int = 1024):
+        self.max_entries = max_entries
+        self._entries: "OrderedDict[str, Dict]" = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+
+    def canonicalize(self, query: str) -> str:
+        text = " ".join(query.lower().split())
+        text = _THOUSANDS.sub("", text)
+        text = _CURRENCY_AMOUNT.sub(lambda m: f"{m.group(1) or m.group(2)}$", text)
+        text = _TRAILING_ZEROS.sub(r"\1", text)
+        text = _LEADING_FILLER.sub("", text)
+        return text.strip(" ?.!")
+
+    def get(self, query: str, today: Optional[date] = None) -> Optional[Dict]:
+        key = self.canonicalize(query)
+        entry = self._entries.get(key)
+        if entry is None:
+            self.misses += 1
+            return None
+        self._entries.move_to_end(key)
+        self.hits += 1
+        return self._resolve(entry, today or date.today())
+
+    def put(self, query: str, filters: Dict, today: Optional[date] = None) -> bool:
+        """Store cleaned filters; returns False when relative dates could not be expressed safely"""
+        key = self.canonicalize(query)
+        entry = self._relativize(key, filters, today or date.today())
+        if entry is None:
+            return False
+        self._entries[key] = entry
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+        return True
+
+    def _relativize(self, key: str, filters: Dict, today: date) -> Optional[Dict]:
+        entry = {k: v for k, v in filters.items() if k not in ("date", "start_date", "end_date")}
+        has_dates = any(filters.get(k) for k in ("date", "start_date", "end_date"))
+        if not has_dates:
+            return entry
+        if not _RELATIVE_WORDS.search(key):
+            if not _YEAR.search(key):
+                # "July 15th" or "the 5th" mean a different day next year or next month
+                return None
+            # Absolute dates ("July 15th 2025") are the same whenever they are looked up
+            entry.update({k: filters[k] for k in ("date", "start_date", "end_date") if filters.get(k)})
+            return entry
+
+        # The named range is inferred from today's bounds; when several ranges share them (on a Monday
+        # "this week to date" is just today, on the 1st so is "this month to date") the entry would
+        # replay the wrong one on later days, so it is not cached
+        if filters.get("date"):
+            names = [n for n, resolve in DAYS.items() if resolve(today) == filters["date"]]
+            if len(names) != 1:
+                return None
+            entry["day"] = names[0]
+        if filters.get("start_date") or filters.get("end_date"):
+            bounds = (filters.get("start_date"), filters.get("end_date"))
+            names = [n for n, resolve in PERIODS.items() if resolve(today) == bounds]
+            if len(names) != 1:
+                return None
+            entry["period"] = names[0]
+        return entry
+
+    def _resolve(self, entry: Dict, today: date) -> Dict:
+        filters = {k: v for k, v in entry.items() if k not in ("day", "period")}
+        if entry.get("day"):
+            filters["date"] = DAYS[entry["day"]](today)
+        if entry.get("period"):
+            filters["start_date"], filters["end_date"] = PERIODS[entry["period"]](today)
+        return filters
+
+
+# Shared across users, since parsed filters do not depend on who asked
+search_cache = SearchQueryCache(max_entries=Config.search_cache_size)
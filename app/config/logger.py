@@ -1,23 +1,125 @@
+import atexit
+import copy
 import logging
+import logging.handlers
 import os
+import queue
+from datetime import datetime, timezone
+from typing import Dict, Optional, Tuple
+from config.setting import Config
+from utils.serialization import dumps_str
+
+
+class JsonFormatter(logging.Formatter):
+    """One JSON object per line: time, level, module, function, line and message"""
+
+    def format(self, record: logging.LogRecord) -> str:
+        entry = {
+            "ts": datetime.fromtimestamp(record.created, timezone.utc).isoformat(timespec="milliseconds"),
+            "level": record.levelname,
+            "module": record.module,
+            "func": record.funcName,
+            "line": record.lineno,
+            "message": record.getMessage(),
+        }
+        if getattr(record, "sampled", None):
+            entry["sampled"] = record.sampled
+        if record.exc_info and not record.exc_text:
+            record.exc_text = self.formatException(record.exc_info)
+        if record.exc_text:
+            entry["exc"] = record.exc_text
+        return dumps_str(entry)
+
+
+class ModuleLevelFilter(logging.Filter):
+    """Per-module minimum levels, keyed by the calling module's name (e.g. "transaction_service")"""
+
+    def __init__(self, default_level: int, module_levels: Dict[str, int]):
+        super().__init__()
+        self.default_level = default_level
+        self.module_levels = module_levels
+
+    def filter(self, record: logging.LogRecord) -> bool:
+        return record.levelno >= self.module_levels.get(record.module, self.default_level)
+
+
+class InfoSampler(logging.Filter):
+    """Keeps the first and then every Nth INFO line per call site; other levels always pass"""
+
+    def __init__(self, every: int):
+        super().__init__()
+        self.every = every
+        self._seen: Dict[Tuple[str, int], int] = {}
+
+    def filter(self, record: logging.LogRecord) -> bool:
+        if self.every <= 1 or record.levelno != logging.INFO:
+            return True
+        site = (record.pathname, record.lineno)
+        count = self._seen.get(site, 0)
+        self._seen[site] = count + 1
+        if count % self.every:
+            return False
+        record.sampled = self.every
+        return True
+
+
+class PreparedQueueHandler(logging.handlers.QueueHandler):
+    """Renders the message and traceback on the caller's side but leaves formatting to the listener thread"""
+
+    def prepare(self, record: logging.LogRecord) -> logging.LogRecord:
+        record = copy.copy(record)
+        record.msg = record.getMessage()
+        record.args = None
+        if record.exc_info:
+            record.exc_text = logging.Formatter().formatException(record.exc_info)
+            record.exc_info = None
+        return record
+
+
+def build_logger(name: str, path: str, json_lines: bool = True, queued: bool = True, level: str = "DEBUG",
+                 module_levels: Optional[Dict[str, str]] = None,
+                 info_sample_every: int = 1) -> Tuple[logging.Logger, Optional[logging.handlers.QueueListener]]:
+    """File logger; when queued, the event loop only enqueues records and a listener thread does the writes"""
+    logger = logging.getLogger(name)
+    logger.propagate = False
+    if logger.hasHandlers():
+        return logger, None
+
+    default_level = logging.getLevelName(level.upper())
+    levels = {module: logging.getLevelName(module_level.upper()) for module, module_level in (module_levels or {}).items()}
+    # Records below every configured level are dropped before a LogRecord is even built
+    logger.setLevel(min([default_level, *levels.values()]))
+
+    os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+    file_handler = logging.FileHandler(path, encoding="utf-8")
+    file_handler.setFormatter(JsonFormatter() if json_lines else logging.Formatter('%(asctime)s - %(levelname)s - %(message)s'))
+
+    # Filters run on the caller's side, so dropped and sampled-out lines never reach the queue
+    handler = PreparedQueueHandler(queue.SimpleQueue()) if queued else file_handler
+    handler.addFilter(ModuleLevelFilter(default_level, levels))
+    handler.addFilter(InfoSampler(info_sample_every))
+    logger.addHandler(handler)
+
+    listener = None
+    if queued:
+        listener = logging.handlers.QueueListener(handler.queue, file_handler)
+        listener.start()
+    return logger, listener
+
 
 def setup_logger():
-    logger = logging.getLogger(__name__)
-    logger.setLevel(logging.DEBUG) 
-    logger.propagate = False 
-    
-    formatter = logging.Formatter('%(asctime)s - %(levelname)s - %(message)s')
-
-    log_dir = 'logs'
-    os.makedirs(log_dir, exist_ok=True)
-    file_handler = logging.FileHandler('logs/app.log', encoding='utf-8') 
-    file_handler.setLevel(logging.DEBUG)
-    file_handler.setFormatter(formatter)
-
-    if not logger.hasHandlers():
-        logger.addHandler(file_handler)
-    
+    logger, listener = build_logger(
+        __name__, 'logs/app.log',
+        json_lines=Config.log_json,
+        queued=Config.log_queue,
+        level=Config.log_level,
+        module_levels=Config.log_module_levels,
+        info_sample_every=Config.log_info_sample_every,
+    )
+    if listener:
+        # Drain what is still queued when the process exits
+        atexit.register(listener.stop)
     return logger
 
 # Initiate the logger instance
-logger = setup_logger()
\ No newline at end of file
+logger = setup_logger()
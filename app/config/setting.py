@@ -1,8 +1,75 @@
 from pydantic_settings import BaseSettings, SettingsConfigDict
+from typing import Dict, Optional
 class Settings(BaseSettings):
     
     groq_api_key: str
     database_url: str
+
+    # logs/app.log: JSON lines written by a background thread so request handlers never block on disk.
+    # log_module_levels raises or lowers the level per calling module, e.g. {"transaction_service": "WARNING"};
+    # log_info_sample_every keeps 1 in N INFO lines per call site (1 keeps all)
+    log_level: str = "DEBUG"
+    log_json: bool = True
+    log_queue: bool = True
+    log_module_levels: Dict[str, str] = {}
+    log_info_sample_every: int = 1
+
+    # Apply database/migrations.py (indexes, user_data_versions) from init_db; disable to run them out of band before starting
+    run_migrations_on_startup: bool = True
+
+    # Minimum confidence for the rule-based transaction parser to skip the LLM crew
+    fast_parse_min_confidence: float = 0.8
+    # "crew" (default) uses the parser + categorizer agents, "single_shot" parses with one JSON-mode LLM call
+    transaction_parse_mode: str = "crew"
+    # Prompt rendering per template, "full" (default) or "compact": no indentation, one few-shot example,
+    # JSON data with amounts in whole units. Keys are prompts.rendering.PROMPTS names, e.g. {"recommendation": "compact"}
+    prompt_modes: Dict[str, str] = {}
+    # Inputs per LLM call for batch ingestion
+    batch_parse_chunk_size: int = 20
+    # Statement import: rows per COPY and bytes read per upload chunk
+    import_batch_size: int = 5000
+    import_chunk_bytes: int = 65536
+    # GET /transactions paging and NDJSON export
+    transactions_page_size: int = 100
+    transactions_max_page_size: int = 1000
+    transactions_stream_batch_size: int = 1000
+    # Cached FinancialInsights entries, keyed by user, period and day
+    insights_cache_size: int = 2048
+    # How long the recommendations SSE stream waits for a background job
+    recommendation_stream_timeout_seconds: float = 120.0
+    # User records shared across requests; only a TTL bounds staleness for out-of-band edits
+    user_cache_size: int = 4096
+    user_cache_ttl_seconds: float = 300.0
+    # Number of users whose merchant -> category history is kept in memory
+    category_memo_max_users: int = 1000
+
+    # LLM response cache; set llm_cache_path to also keep entries on disk across restarts
+    llm_cache_size: int = 512
+    llm_cache_ttl_seconds: int = 86400
+    llm_cache_path: Optional[str] = None
+    # "record" appends every real LLM call (prompt, completion, timings) to llm_record_path; "replay" answers
+    # from that file instead of calling Groq, with the recorded latencies when llm_replay_latency is set
+    llm_record_mode: str = "off"
+    llm_record_path: str = "llm_recordings.jsonl"
+    llm_replay_latency: bool = False
+    # Canonical search query -> parsed filters
+    search_cache_size: int = 1024
+
+    # Groq HTTP pool shared by the plain LLM calls, created once at startup (crew runs use litellm's own client)
+    llm_max_connections: int = 20
+    llm_keepalive_seconds: float = 60.0
+    llm_timeout_seconds: float = 60.0
+    llm_warmup: bool = False
+    # Time budget of each HTTP request, carried down to LLM calls; clients may ask for less with X-Request-Timeout-Ms
+    request_deadline_seconds: float = 25.0
+    # Send one duplicate LLM request once a call runs past the method's recent p95 latency; until
+    # llm_hedge_min_samples calls have been seen, hedge after llm_hedge_default_delay_seconds
+    llm_hedging: bool = True
+    llm_hedge_percentile: float = 0.95
+    llm_hedge_min_samples: int = 20
+    llm_hedge_default_delay_seconds: float = 3.0
+    # Upstream LLM calls allowed at once; further calls queue per user and are served round-robin
+    llm_max_concurrency: int = 8
     
     model_config= SettingsConfigDict(
         env_file=".env",
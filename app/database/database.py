@@ -1,12 +1,14 @@
 from sqlalchemy.ext.asyncio import create_async_engine, AsyncSession, async_sessionmaker
 from sqlalchemy.orm import declarative_base
-from sqlalchemy import text
+from sqlalchemy import inspect, text
 from config.setting import Config
 from config.logger import logger
+from utils.metrics import TimedQueuePool, instrument_engine
 import sqlalchemy.exc
 
 engine = create_async_engine(
     Config.database_url,
+    poolclass=TimedQueuePool,
     pool_size=5,
     max_overflow=10,
     pool_timeout=30,
@@ -20,6 +22,9 @@ engine = create_async_engine(
     }
 )
 
+# Query timings and pool usage for /metrics
+instrument_engine(engine)
+
 AsyncSessionLocal = async_sessionmaker(
     engine,
     class_=AsyncSession,
@@ -44,6 +49,27 @@ async def init_db():
         async with engine.begin() as conn:
             await conn.execute(text("SELECT 1"))
             logger.info("Database connection successful")
+
+            # Rollup tables are derived data; create them if this database predates them
+            from database.models import MonthlyCategoryRollup, MonthlyMerchantRollup
+            rollup_tables = [MonthlyCategoryRollup.__table__, MonthlyMerchantRollup.__table__]
+            missing = await conn.run_sync(lambda sync_conn: [t.name for t in rollup_tables if not inspect(sync_conn).has_table(t.name)])
+            await conn.run_sync(Base.metadata.create_all, tables=rollup_tables)
+            if missing:
+                # Backfill from existing transactions in the same transaction that creates the tables,
+                # so an interrupted start never leaves them empty
+                from services.rollup_service import RollupService
+                async with AsyncSession(bind=conn) as session:
+                    await RollupService().rebuild(session)
+
+        if Config.run_migrations_on_startup:
+            from database.migrations import run_migrations
+            try:
+                await run_migrations(engine)
+            except Exception as e:
+                # Migrations create tables that writes need (user_data_versions), so do not start without them
+                logger.error(f"Schema migrations failed: {e}")
+                raise
     except sqlalchemy.exc.OperationalError as e:
         logger.error(f"Database connection error during init: {e}")
         raise
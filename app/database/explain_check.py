@@ -0,0 +1,175 @@
+"""EXPLAIN every query the services issue and fail if any table is read with a sequential scan.
+
+Run from app/ against a local Postgres:  python -m database.explain_check
+The service methods run for real against a throwaway user while their SELECTs are captured.
+Each one is then explained with enable_seqscan off, so the planner uses an index whenever one
+is usable and the result does not depend on how much data the database holds.
+The (user_id, category) btree keeps the search filter's category ILIKE off a sequential scan even
+without pg_trgm, so the trigram index is checked on its own and its absence fails the check.
+"""
+import asyncio
+import sys
+import uuid
+from datetime import date, datetime, timedelta
+from decimal import Decimal
+from typing import Dict, List, Tuple
+from sqlalchemy import delete, event, insert, text
+from config.logger import logger
+from database.database import engine, AsyncSessionLocal, init_db, dispose_engine
+from database.models import Transaction, User, MonthlyCategoryRollup, MonthlyMerchantRollup
+from schemas.analysis import Recommendation
+from schemas.transaction import TransactionSearch
+from services.rollup_service import RollupService
+from services.transaction_service import TransactionService
+from services.analysis import AnalysisService
+from services.category_memo import category_memo
+from services.insights_cache import insights_cache
+from agents.search_cache import search_cache
+
+# Filter shapes search_transactions builds, seeded into the search cache so no LLM call is made
+SEARCH_FILTERS = {
+    "food spending": {"category": "Food"},
+    "spending on 2025-01-15": {"date": date(2025, 1, 15)},
+    "spending from 2025-01-01 to 2025-03-31": {"start_date": date(2025, 1, 1), "end_date": date(2025, 3, 31)},
+    "spending over 100$": {"min_amount": 100.0},
+}
+
+# Added by migration 0002 for category ILIKE '%x%'
+TRIGRAM_INDEX = "ix_transactions_category_trgm"
+
+
+class QueryCapture:
+    """Collects the distinct SELECT statements sent to Postgres, labelled by the service call that issued them"""
+
+    def __init__(self):
+        self.label = ""
+        self.queries: Dict[str, Tuple[str, object]] = {}
+
+    def __call__(self, conn, cursor, statement, parameters, context, executemany):
+        if statement.lstrip().upper().startswith(("SELECT", "WITH")) and statement not in self.queries:
+            self.queries[statement] = (self.label, parameters)
+
+
+async def run_service_queries(capture: QueryCapture, user_id: str) -> None:
+    transaction_service = TransactionService()
+    rollup_service = RollupService()
+    today = date.today()
+    mid_month = today.replace(day=1) - timedelta(days=45)
+
+    async with AsyncSessionLocal() as db:
+        capture.label = "TransactionService.list_transactions"
+        _, next_cursor = await transaction_service.list_transactions(db, user_id, 2)
+        await transaction_service.list_transactions(db, user_id, 2, next_cursor)
+
+        capture.label = "TransactionService.stream_transactions"
+        async for _ in transaction_service.stream_transactions(user_id):
+            pass
+
+        for query, filters in SEARCH_FILTERS.items():
+            capture.label = f"TransactionService.search_transactions ({query})"
+            search_cache.put(query, filters, today)
+            await transaction_service.search_transactions(db, TransactionSearch(user_id=user_id, query=query))
+
+        capture.label = "TransactionService.get_total_spent_by_period"
+        await transaction_service.get_total_spent_by_period(db, user_id, mid_month, today)
+
+        capture.label = "RollupService totals"
+        await rollup_service.merchant_totals(db, user_id, mid_month, today, limit=5)
+        await rollup_service.monthly_category_totals(db, user_id, mid_month, today)
+
+        capture.label = "CategoryMemo.lookup"
+        category_memo.invalidate(user_id)
+        await category_memo.lookup(db, user_id, "Store 1", "coffee", ["Food", "Other"])
+
+        # Recommendations are pre-seeded so the insights path stays on the database
+        for period in ("this month", "last month", "all time"):
+            capture.label = f"AnalysisService.get_financial_insights ({period})"
+            insights_cache.put_recommendations(
+                user_id, period, None, await insights_cache.refresh(db, user_id),
+                [Recommendation(text="check", category="Other", priority="low")]
+            )
+            await AnalysisService().get_financial_insights(db, user_id, period)
+
+
+def seq_scans(plan: Dict) -> List[str]:
+    found = [plan["Relation Name"]] if plan.get("Node Type") == "Seq Scan" else []
+    for child in plan.get("Plans", []):
+        found += seq_scans(child)
+    return found
+
+
+def indexes_used(plan: Dict) -> List[str]:
+    found = [plan["Index Name"]] if "Index Name" in plan else []
+    for child in plan.get("Plans", []):
+        found += indexes_used(child)
+    return found
+
+
+async def check_trigram_index(conn) -> int:
+    label = "category ILIKE (trigram index)"
+    if not await conn.scalar(text("SELECT 1 FROM pg_indexes WHERE indexname = :name"), {"name": TRIGRAM_INDEX}):
+        print(f"FAIL  {label:<60} {TRIGRAM_INDEX} missing; install pg_trgm and run python -m database.migrations")
+        return 1
+    # Without a user_id condition the btree cannot serve the filter, so only the trigram index can
+    result = await conn.execute(text("EXPLAIN (FORMAT JSON) SELECT id FROM transactions WHERE category ILIKE '%food%'"))
+    used = indexes_used(result.scalar()[0]["Plan"])
+    print(f"{'ok  ' if TRIGRAM_INDEX in used else 'FAIL'}  {label:<60} {', '.join(sorted(set(used))) or 'no index'}")
+    return 0 if TRIGRAM_INDEX in used else 1
+
+
+async def explain(queries: Dict[str, Tuple[str, object]]) -> int:
+    failures = 0
+    async with engine.connect() as conn:
+        await conn.execute(text("SET enable_seqscan = off"))
+        failures += await check_trigram_index(conn)
+        for statement, (label, parameters) in queries.items():
+            result = await conn.exec_driver_sql("EXPLAIN (FORMAT JSON) " + statement, parameters)
+            plan = result.scalar()[0]["Plan"]
+            scans = seq_scans(plan)
+            detail = f"SEQ SCAN on {', '.join(sorted(set(scans)))}" if scans else ", ".join(sorted(set(indexes_used(plan))))
+            print(f"{'FAIL' if scans else 'ok  '}  {label:<60} {detail}")
+            if scans:
+                failures += 1
+                print(f"      {' '.join(statement.split())[:300]}")
+    return failures
+
+
+async def main() -> int:
+    await init_db()
+    user_id = f"X{uuid.uuid4().hex[:12].upper()}"
+    first_of_month = date.today().replace(day=1)
+    async with AsyncSessionLocal() as db:
+        await db.execute(insert(User).values(
+            user_id=user_id, monthly_income=Decimal("1000.00"), savings_goal="explain check",
+            target_amount=Decimal("100.00"), target_date=date.today() + timedelta(days=365),
+            created_at=datetime.utcnow() - timedelta(days=120)
+        ))
+        rows = [
+            dict(id=uuid.uuid4(), user_id=user_id, amount=Decimal("10.00") + i, description=f"coffee {i}",
+                 category="Food", merchant=f"Store {i % 3}", transaction_date=first_of_month - timedelta(days=i * 9),
+                 created_at=datetime.utcnow())
+            for i in range(10)
+        ]
+        await db.execute(insert(Transaction).values(rows))
+        await RollupService().apply(db, [(r["user_id"], r["transaction_date"], r["category"], r["merchant"], r["amount"]) for r in rows])
+        await db.commit()
+
+    capture = QueryCapture()
+    event.listen(engine.sync_engine, "before_cursor_execute", capture)
+    try:
+        await run_service_queries(capture, user_id)
+    finally:
+        event.remove(engine.sync_engine, "before_cursor_execute", capture)
+        async with AsyncSessionLocal() as db:
+            for model in (Transaction, MonthlyCategoryRollup, MonthlyMerchantRollup, User):
+                await db.execute(delete(model).filter(model.user_id == user_id))
+            await db.commit()
+
+    failures = await explain(capture.queries)
+    logger.info(f"EXPLAIN check: {len(capture.queries)} queries and the trigram index, {failures} failed")
+    await dispose_engine()
+    return 1 if failures else 0
+
+
+if __name__ == "__main__":
+    sys.exit(asyncio.run(main()))
@@ -0,0 +1,78 @@
+from sqlalchemy import text
+from sqlalchemy.ext.asyncio import AsyncEngine
+from typing import List, Tuple
+from config.logger import logger
+
+# Applied in order and recorded in schema_migrations. Never edit a shipped entry; append a new one.
+# Index builds use CONCURRENTLY so existing tables stay writable, which needs autocommit.
+MIGRATIONS: List[Tuple[str, List[str]]] = [
+    ("0001_transaction_indexes", [
+        # Date ranges per user, and the (transaction_date, id) keyset order of GET /transactions
+        "CREATE INDEX CONCURRENTLY IF NOT EXISTS ix_transactions_user_date "
+        "ON transactions (user_id, transaction_date DESC, id DESC)",
+        "CREATE INDEX CONCURRENTLY IF NOT EXISTS ix_transactions_user_category ON transactions (user_id, category)",
+        "CREATE INDEX CONCURRENTLY IF NOT EXISTS ix_transactions_user_merchant ON transactions (user_id, merchant)",
+    ]),
+    ("0002_transaction_category_trigram", [
+        # search_transactions filters with category ILIKE '%x%', which a btree cannot serve
+        "CREATE EXTENSION IF NOT EXISTS pg_trgm",
+        "CREATE INDEX CONCURRENTLY IF NOT EXISTS ix_transactions_category_trgm "
+        "ON transactions USING gin (category gin_trgm_ops)",
+    ]),
+    ("0003_user_data_versions", [
+        # Per-user data version behind the insights cache, see UserDataVersion; no row means version 0
+        "CREATE TABLE IF NOT EXISTS user_data_versions ("
+        "user_id VARCHAR(20) PRIMARY KEY REFERENCES users (user_id), version BIGINT NOT NULL DEFAULT 0)",
+    ]),
+]
+
+
+async def run_migrations(engine: AsyncEngine) -> List[str]:
+    """Apply pending migrations and return the versions that ran"""
+    applied = []
+    async with engine.connect() as conn:
+        conn = await conn.execution_options(isolation_level="AUTOCOMMIT")
+        await conn.execute(text(
+            "CREATE TABLE IF NOT EXISTS schema_migrations ("
+            "version VARCHAR(100) PRIMARY KEY, applied_at TIMESTAMP NOT NULL DEFAULT now())"
+        ))
+        result = await conn.execute(text("SELECT version FROM schema_migrations"))
+        done = {row.version for row in result}
+
+        for version, statements in MIGRATIONS:
+            if version in done:
+                continue
+            for statement in statements:
+                await _drop_invalid_index(conn, statement)
+                await conn.execute(text(statement))
+            await conn.execute(text("INSERT INTO schema_migrations (version) VALUES (:version)"), {"version": version})
+            applied.append(version)
+            logger.info(f"Applied migration {version}")
+    return applied
+
+
+async def _drop_invalid_index(conn, statement: str) -> None:
+    # An interrupted CREATE INDEX CONCURRENTLY leaves an invalid index that IF NOT EXISTS would keep
+    if "CREATE INDEX CONCURRENTLY IF NOT EXISTS" not in statement:
+        return
+    name = statement.split("IF NOT EXISTS", 1)[1].split()[0]
+    result = await conn.execute(text(
+        "SELECT 1 FROM pg_index i JOIN pg_class c ON c.oid = i.indexrelid "
+        "WHERE c.relname = :name AND NOT i.indisvalid"
+    ), {"name": name})
+    if result.first():
+        logger.warning(f"Dropping invalid index {name} left by an interrupted build")
+        await conn.execute(text(f"DROP INDEX CONCURRENTLY IF EXISTS {name}"))
+
+
+if __name__ == "__main__":
+    # python -m database.migrations
+    import asyncio
+    from database.database import engine, dispose_engine
+
+    async def _main() -> None:
+        applied = await run_migrations(engine)
+        logger.info(f"Migrations applied: {', '.join(applied) if applied else 'none pending'}")
+        await dispose_engine()
+
+    asyncio.run(_main())
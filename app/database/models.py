@@ -1,4 +1,4 @@
-from sqlalchemy import Column, String, DECIMAL, Text, Date, DateTime, ForeignKey
+from sqlalchemy import Column, String, DECIMAL, Text, Date, DateTime, ForeignKey, Integer, BigInteger
 from sqlalchemy.dialects.postgresql import UUID, JSONB
 from sqlalchemy.orm import relationship
 from datetime import datetime
@@ -42,3 +42,33 @@ class UserPreference(Base):
     updated_at = Column(DateTime,default=lambda: datetime.utcnow(), onupdate=lambda: datetime.utcnow())
 
     user = relationship("User", back_populates="preferences")
+
+
+# Monthly aggregates kept in step with transactions, so insights scale with months instead of rows
+class MonthlyCategoryRollup(Base):
+    __tablename__ = "monthly_category_rollups"
+
+    user_id = Column(String(20), ForeignKey("users.user_id"), primary_key=True)
+    month = Column(Date, primary_key=True)
+    category = Column(String(100), primary_key=True)
+    total_amount = Column(DECIMAL(14, 2), nullable=False, default=0)
+    transaction_count = Column(Integer, nullable=False, default=0)
+    sum_of_squares = Column(DECIMAL(24, 4), nullable=False, default=0)
+
+class MonthlyMerchantRollup(Base):
+    __tablename__ = "monthly_merchant_rollups"
+
+    user_id = Column(String(20), ForeignKey("users.user_id"), primary_key=True)
+    month = Column(Date, primary_key=True)
+    merchant = Column(String(255), primary_key=True)
+    total_amount = Column(DECIMAL(14, 2), nullable=False, default=0)
+    transaction_count = Column(Integer, nullable=False, default=0)
+    sum_of_squares = Column(DECIMAL(24, 4), nullable=False, default=0)
+
+# Bumped in the same transaction as every transaction write, so each worker's insights cache can tell
+# when another worker changed the user's data; no row means version 0
+class UserDataVersion(Base):
+    __tablename__ = "user_data_versions"
+
+    user_id = Column(String(20), ForeignKey("users.user_id"), primary_key=True)
+    version = Column(BigInteger, nullable=False, default=0)
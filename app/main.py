@@ -1,19 +1,25 @@
 import os
-from fastapi import FastAPI
+from fastapi import FastAPI, Response
 from fastapi.middleware.cors import CORSMiddleware
 import uvicorn 
 from typing import Dict, Any,  AsyncContextManager
 from database.database import init_db, dispose_engine
+from agents.finance_crew import init_finance_crew, close_finance_crew
 from routes.api_endpoints import router
+from utils.serialization import FastJSONResponse
+from utils.metrics import CONTENT_TYPE_LATEST, MetricsMiddleware, render
+from utils.deadline import DeadlineMiddleware
 from config.logger import logger
 
 async def lifespan(app: FastAPI) -> AsyncContextManager:
     
     await init_db()
+    await init_finance_crew()
     yield
+    await close_finance_crew()
     await dispose_engine()
 
-app= FastAPI(title="Personal Finance Agent", version="1.0.0", lifespan=lifespan)
+app= FastAPI(title="Personal Finance Agent", version="1.0.0", lifespan=lifespan, default_response_class=FastJSONResponse)
 
 allowed_origins = [
     "*"
@@ -25,14 +31,22 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["GET", "POST", "PUT", "DELETE", "OPTIONS"],
     allow_headers=["*"],
+    expose_headers=["X-Next-Cursor"],
 )
 
+app.add_middleware(MetricsMiddleware)
+app.add_middleware(DeadlineMiddleware)
+
 app.include_router(router)
 
 @app.get("/", response_model=Dict[str, str])
 async def root() -> Dict[str,Any]:
     return {"message": "AI Personal Finance Agent is running"}
 
+@app.get("/metrics", include_in_schema=False)
+async def metrics() -> Response:
+    return Response(render(), media_type=CONTENT_TYPE_LATEST)
+
 port = int(os.environ.get("PORT", 10000))
 
 if __name__ == "__main__":
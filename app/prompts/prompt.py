@@ -49,6 +49,56 @@ TRANSACTION_CATEGORIZATION_PROMPT = """
             Output:
             """            
 
+TRANSACTION_SINGLE_SHOT_PROMPT = """
+            Parse and categorize this transaction input: "{input_text}"
+
+            User-Defined Categories: {categories}
+
+            Return ONLY a JSON object:
+            {{
+                "amount": decimal_number,
+                "merchant": "store_name_or_null",
+                "transaction_date": "YYYY-MM-DD",
+                "category": "one_of_the_categories_or_Other"
+            }}
+
+            Rules:
+            - Use today's date ({current_date}) if no date is mentioned.
+            - Set merchant to null if not mentioned.
+            - Amount must be a positive number.
+            - Handle varied phrasings (e.g., "300 dollars", "300 bucks", "300$").
+            - Match the category from the merchant and description keywords (e.g., "groceries", "dinner", "Starbucks" → "Food"; "electricity", "bill" → "Bills"). If no clear match, use "Other".
+
+            Examples:
+            - "bought groceries of 300$ today from walmart" → {{"amount": 300.00, "merchant": "walmart", "transaction_date": "{current_date}", "category": "Food"}}
+            - "paid 100$ for bills on July 5th 2025" → {{"amount": 100.00, "merchant": null, "transaction_date": "2025-07-05", "category": "Bills"}}
+
+            Output:
+            """
+
+TRANSACTION_BATCH_PARSE_PROMPT = """
+            Parse and categorize each of these transaction inputs: {inputs}
+
+            User-Defined Categories: {categories}
+
+            Return ONLY a JSON object with one entry per input, keeping its index:
+            {{
+                "transactions": [
+                    {{"index": 0, "amount": decimal_number, "merchant": "store_name_or_null", "transaction_date": "YYYY-MM-DD", "category": "one_of_the_categories_or_Other"}}
+                ]
+            }}
+
+            Rules:
+            - Use today's date ({current_date}) if no date is mentioned.
+            - Set merchant to null if not mentioned.
+            - Amount must be a positive number.
+            - Handle varied phrasings (e.g., "300 dollars", "300 bucks", "300$").
+            - Match the category from the merchant and description keywords (e.g., "groceries", "dinner", "Starbucks" → "Food"; "electricity", "bill" → "Bills"). If no clear match, use "Other".
+            - Parse each input on its own; never merge or skip inputs.
+
+            Output:
+            """
+
 SEARCH_PARSE_PROMPT = """
             Parse this search query: "{query}"
 
@@ -116,4 +166,59 @@ RECOMMENDATION_PROMPT = """
               ]
 
             Output:
-            """
\ No newline at end of file
+            """
+
+# Compact variants: same placeholders and output contract, no indentation, one few-shot example.
+# Selected per template with Config.prompt_modes, see prompts/rendering.py
+
+TRANSACTION_PARSE_PROMPT_COMPACT = """Parse this transaction input: "{input_text}"
+Return ONLY JSON: {{"amount": number, "merchant": string|null, "transaction_date": "YYYY-MM-DD"}}
+- Today is {current_date}; use it if no date is mentioned.
+- merchant is null if not mentioned; amount is positive ("300 dollars", "300 bucks", "300$" -> 300).
+Example: "bought dinner for 75.50 at Chipotle" -> {{"amount": 75.50, "merchant": "Chipotle", "transaction_date": "{current_date}"}}
+"""
+
+TRANSACTION_CATEGORIZATION_PROMPT_COMPACT = """Also categorize the transaction into one of: {categories}; use "Other" if nothing fits.
+Match merchant and description keywords ("groceries", "dinner", "Starbucks" -> Food; "electricity", "bill" -> Bills).
+Return the parsed JSON with "category" added. Today is {current_date}.
+Example: "took a ride to downtown for 25$", categories Food, Travel, Leisure -> {{"amount": 25.00, "merchant": null, "transaction_date": "{current_date}", "category": "Travel"}}
+"""
+
+TRANSACTION_SINGLE_SHOT_PROMPT_COMPACT = """Parse and categorize this transaction input: "{input_text}"
+Categories: {categories}
+Return ONLY JSON: {{"amount": number, "merchant": string|null, "transaction_date": "YYYY-MM-DD", "category": one of the categories or "Other"}}
+- Today is {current_date}; use it if no date is mentioned.
+- merchant is null if not mentioned; amount is positive ("300 dollars", "300 bucks", "300$" -> 300).
+- Category from merchant and description keywords ("groceries", "dinner", "Starbucks" -> Food; "electricity", "bill" -> Bills), else "Other".
+Example: "paid 100$ for bills on July 5th 2025" -> {{"amount": 100.00, "merchant": null, "transaction_date": "2025-07-05", "category": "Bills"}}
+"""
+
+TRANSACTION_BATCH_PARSE_PROMPT_COMPACT = """Parse and categorize each of these transaction inputs: {inputs}
+Categories: {categories}
+Return ONLY JSON: {{"transactions": [{{"index": input index, "amount": number, "merchant": string|null, "transaction_date": "YYYY-MM-DD", "category": one of the categories or "Other"}}]}}
+- One entry per input, keeping its index; never merge or skip inputs.
+- Today is {current_date}; use it if no date is mentioned.
+- merchant is null if not mentioned; amount is positive ("300 dollars", "300 bucks", "300$" -> 300).
+- Category from merchant and description keywords ("groceries", "dinner", "Starbucks" -> Food; "electricity", "bill" -> Bills), else "Other".
+"""
+
+SEARCH_PARSE_PROMPT_COMPACT = """Parse this search query: "{query}"
+Return ONLY JSON with the fields that apply: category, date, start_date, end_date (YYYY-MM-DD), min_amount, max_amount (numbers). Never merchant.
+- Today is {current_date}; resolve relative dates ("this week", "last month").
+- A single day -> "date"; a range -> "start_date" <= "end_date".
+- Keywords map to categories ("grocery", "dinner", "coffee", "Starbucks" -> Food; "electricity", "bill" -> Bills).
+Example: "show my expensive dining last month" -> {{"category": "Food", "start_date": "2025-06-01", "end_date": "2025-06-30", "min_amount": 50.0}}
+"""
+
+RECOMMENDATION_PROMPT_COMPACT = """Generate 2-5 personalized financial recommendations for user {user_id}. Return ONLY a JSON array of {{"text": string, "category": string, "priority": "high"|"medium"|"low"}}.
+Spending: {spending_analysis}
+Trend: {monthly_trend}
+Goal: {goal_progress}
+Budget: {budget_comparison}
+Top merchants: {top_merchants}
+- Overspending -> a high-priority budget alert.
+- Specific actions to cut the highest-spend categories and merchants.
+- If goal progress is low, predict when the goal will be met.
+- Use category names from Spending.
+Example: [{{"text": "Reduce coffee spending by $30/month by brewing at home", "category": "Food", "priority": "high"}}]
+"""
@@ -0,0 +1,78 @@
+from decimal import Decimal, ROUND_HALF_UP
+from typing import Any, Dict, Optional, Tuple
+import re
+from pydantic import BaseModel
+from config.setting import Config
+from prompts.prompt import (
+    TRANSACTION_PARSE_PROMPT, TRANSACTION_PARSE_PROMPT_COMPACT,
+    TRANSACTION_CATEGORIZATION_PROMPT, TRANSACTION_CATEGORIZATION_PROMPT_COMPACT,
+    TRANSACTION_SINGLE_SHOT_PROMPT, TRANSACTION_SINGLE_SHOT_PROMPT_COMPACT,
+    TRANSACTION_BATCH_PARSE_PROMPT, TRANSACTION_BATCH_PARSE_PROMPT_COMPACT,
+    SEARCH_PARSE_PROMPT, SEARCH_PARSE_PROMPT_COMPACT,
+    RECOMMENDATION_PROMPT, RECOMMENDATION_PROMPT_COMPACT,
+)
+from utils.serialization import dumps_str
+
+PROMPT_MODES = ("full", "compact")
+
+# Template name -> (full, compact); names are the keys of Config.prompt_modes
+PROMPTS: Dict[str, Tuple[str, str]] = {
+    "transaction_parse": (TRANSACTION_PARSE_PROMPT, TRANSACTION_PARSE_PROMPT_COMPACT),
+    "transaction_categorization": (TRANSACTION_CATEGORIZATION_PROMPT, TRANSACTION_CATEGORIZATION_PROMPT_COMPACT),
+    "transaction_single_shot": (TRANSACTION_SINGLE_SHOT_PROMPT, TRANSACTION_SINGLE_SHOT_PROMPT_COMPACT),
+    "transaction_batch": (TRANSACTION_BATCH_PARSE_PROMPT, TRANSACTION_BATCH_PARSE_PROMPT_COMPACT),
+    "search": (SEARCH_PARSE_PROMPT, SEARCH_PARSE_PROMPT_COMPACT),
+    "recommendation": (RECOMMENDATION_PROMPT, RECOMMENDATION_PROMPT_COMPACT),
+}
+
+# "$1,234.56" in pre-rendered text such as the monthly trend
+_MONEY = re.compile(r"\$(\d[\d,]*\.\d+)")
+
+
+def compact_data(value: Any) -> Any:
+    """Money and percentages rounded to whole units, other floats to one decimal, None fields dropped"""
+    if isinstance(value, BaseModel):
+        value = value.model_dump()
+    if isinstance(value, dict):
+        return {key: compact_data(item) for key, item in value.items() if item is not None}
+    if isinstance(value, (list, tuple)):
+        return [compact_data(item) for item in value]
+    if isinstance(value, Decimal):
+        return int(value.quantize(Decimal("1"), rounding=ROUND_HALF_UP))
+    if isinstance(value, float):
+        return round(value, 1)
+    return value
+
+
+def compact_text(text: str) -> str:
+    """Pre-rendered data text without indentation, bullets or cents"""
+    lines = (line.strip().lstrip("-•").strip() for line in text.splitlines())
+    text = "\n".join(line for line in lines if line)
+    return _MONEY.sub(lambda match: f"${Decimal(match.group(1).replace(',', '')).quantize(Decimal('1'), rounding=ROUND_HALF_UP)}", text)
+
+
+class PromptRenderer:
+    """Formats one named template in its configured mode; structured values are rendered as JSON,
+    and in compact mode also shrunk with compact_data"""
+
+    def __init__(self, name: str, mode: Optional[str] = None):
+        self.name = name
+        self.mode = mode or Config.prompt_modes.get(name, "full")
+        if self.mode not in PROMPT_MODES:
+            raise ValueError(f"Prompt mode for {name} must be one of: {', '.join(PROMPT_MODES)}")
+        self.template = PROMPTS[name][PROMPT_MODES.index(self.mode)]
+
+    @property
+    def compact(self) -> bool:
+        return self.mode == "compact"
+
+    def format(self, **values: Any) -> str:
+        return self.template.format(**{key: self._render(value) for key, value in values.items()})
+
+    def _render(self, value: Any) -> Any:
+        # Lists of plain strings (categories) keep their Python form in full mode, as before
+        if isinstance(value, (list, tuple)) and value and all(isinstance(item, str) for item in value):
+            return ", ".join(value) if self.compact else value
+        if isinstance(value, (BaseModel, dict, list, tuple)):
+            return dumps_str(compact_data(value) if self.compact else value)
+        return value
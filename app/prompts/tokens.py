@@ -0,0 +1,59 @@
+"""Prompt token accounting.
+
+Counts use tiktoken's cl100k_base encoding, the closest tokenizer available offline to Llama 3's
+(also a tiktoken BPE, with a larger vocabulary, so it yields slightly fewer tokens). When tiktoken or
+its encoding file is unavailable, a word/number/punctuation approximation is used instead and
+tokenizer_name() says so. Exact per-call input tokens come from the provider, see llm_tokens_total.
+"""
+from string import Formatter
+from typing import Dict, Optional
+import re
+from config.logger import logger
+from prompts.rendering import PROMPT_MODES, PROMPTS
+
+try:
+    import tiktoken
+except ImportError:  # pragma: no cover - tiktoken comes with crewai's dependencies
+    tiktoken = None
+
+# Roughly how BPE vocabularies split English, numbers and JSON: short words, 1-3 digit groups,
+# single punctuation marks, and each run of whitespace that is not a single space
+_APPROXIMATE = re.compile(r" ?[A-Za-z]{1,8}|\d{1,3}|\s{2,}|\n|[^\sA-Za-z\d]")
+
+_encoding = None
+_encoding_failed = False
+
+
+def _get_encoding():
+    global _encoding, _encoding_failed
+    if _encoding is None and not _encoding_failed:
+        try:
+            _encoding = tiktoken.get_encoding("cl100k_base")
+        except Exception as e:
+            _encoding_failed = True
+            logger.warning(f"tiktoken encoding unavailable ({e}), approximating token counts")
+    return _encoding
+
+
+def tokenizer_name() -> str:
+    return "cl100k_base" if tiktoken is not None and _get_encoding() is not None else "approximate"
+
+
+def count_tokens(text: str) -> int:
+    encoding = _get_encoding() if tiktoken is not None else None
+    if encoding is not None:
+        return len(encoding.encode(text, disallowed_special=()))
+    return len(_APPROXIMATE.findall(text))
+
+
+def template_tokens(mode: Optional[str] = None) -> Dict[str, Dict[str, int]]:
+    """Tokens of each template's fixed text (placeholders left empty) per mode: what every call pays before any data"""
+    modes = [mode] if mode else list(PROMPT_MODES)
+    report = {}
+    for name, templates in PROMPTS.items():
+        report[name] = {}
+        for current in modes:
+            template = templates[PROMPT_MODES.index(current)]
+            fields = {field: "" for _, field, _, _ in Formatter().parse(template) if field}
+            report[name][current] = count_tokens(template.format(**fields))
+    return report
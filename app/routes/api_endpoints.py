@@ -1,20 +1,29 @@
-from fastapi import APIRouter, Depends, HTTPException, status
+from fastapi import APIRouter, Depends, HTTPException, status, UploadFile, File, Form, Query, Response
+from fastapi.responses import StreamingResponse
 from sqlalchemy.ext.asyncio import AsyncSession
-from sqlalchemy import select
-from typing import Dict, List
+from typing import Dict, List, Optional
+import json
+import time
 from schemas.user import UserRegister, UserLogin, UserResponse, UserPreferences
-from schemas.transaction import NaturalLanguageInput, TransactionResponse, TransactionSearch
-from schemas.analysis import FinancialInsights
+from schemas.transaction import NaturalLanguageInput, TransactionResponse, TransactionSearch, BatchTransactionInput, BatchTransactionResponse
+from schemas.analysis import FinancialInsights, RecommendationStatus
 from database.database import get_db 
 from services.user_service import UserService
 from services.transaction_service import TransactionService
 from services.analysis import AnalysisService
+from services.import_service import ImportService
+from agents.llm_cache import llm_cache
+from services.recommendation_jobs import recommendation_jobs
+from services.insights_cache import insights_cache
+from config.setting import Config
+from utils.serialization import dumps, dumps_str
 
 router= APIRouter(prefix="/api", tags=['Finance'])
 
 user_service = UserService()
 transaction_service = TransactionService()
 analysis_service = AnalysisService()
+import_service = ImportService()
 
 @router.post("/register", response_model=UserResponse)
 async def register_user(user_data: UserRegister, db: AsyncSession = Depends(get_db)):
@@ -41,49 +50,121 @@ async def update_preferences(user_id: str, preferences_data: Dict, db: AsyncSess
         raise HTTPException(status_code= status.HTTP_500_INTERNAL_SERVER_ERROR, detail=str(e))
 """    
 
-@router.get("/user/{user_id}", response_model= UserResponse)
-async def get_user(user_id: str, db: AsyncSession = Depends(get_db)):
-    user= await user_service.get_user_by_id(db, user_id)
+async def get_request_user(user_id: str, db: AsyncSession = Depends(get_db)) -> UserResponse:
+    """Load the path's user once per request; FastAPI shares the result with every dependant"""
+    user = await user_service.get_user(db, user_id)
     if not user:
         raise HTTPException(status_code= status.HTTP_404_NOT_FOUND, detail="User not found")
-    return UserResponse.model_validate(user)
+    return user
+
+@router.get("/user/{user_id}", response_model= UserResponse)
+async def get_user(user: UserResponse = Depends(get_request_user)):
+    return user
 
 @router.post("/transactions", response_model= TransactionResponse)
 async def create_transaction(input_data: NaturalLanguageInput, db: AsyncSession= Depends(get_db)):
     return await transaction_service.create_transaction(db, input_data)
 
-@router.get("/transactions/{user_id}", response_model= List[TransactionResponse])
-async def get_transactions(user_id: str, db: AsyncSession = Depends(get_db)):
+@router.post("/transactions/batch", response_model= BatchTransactionResponse)
+async def create_transactions_batch(batch_data: BatchTransactionInput, db: AsyncSession= Depends(get_db)):
+    return await transaction_service.create_transactions_batch(db, batch_data)
+
+@router.post("/transactions/import")
+async def import_transactions(
+    user_id: str = Form(..., max_length=20),
+    file: UploadFile = File(..., description="CSV or OFX bank statement"),
+    column_map: Optional[str] = Form(None, description='JSON mapping of fields to CSV headers, e.g. {"amount": "Debit Amount"}'),
+    negative_is_expense: bool = Form(True, description="Treat negative amounts as spending and skip positive credits"),
+):
     try:
-        from database.models import Transaction
-        
-        if not await user_service.user_exists(db, user_id):
-            raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="User not found")
-        
-        result = await db.execute(
-            select(Transaction)
-            .filter_by(user_id=user_id)
-            .order_by(Transaction.transaction_date.desc())
+        mapping = json.loads(column_map) if column_map else None
+    except json.JSONDecodeError:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="column_map must be valid JSON")
+    file_format = "ofx" if (file.filename or "").lower().endswith((".ofx", ".qfx")) else "csv"
+    return StreamingResponse(
+        import_service.import_statement(file, user_id, file_format, mapping, negative_is_expense),
+        media_type="application/x-ndjson"
+    )
+
+def transactions_json(transactions, headers: Optional[Dict[str, str]] = None) -> Response:
+    """Serialize plain transaction rows in one pass; response_model above still documents the shape"""
+    return Response(dumps(transactions), media_type="application/json", headers=headers)
+
+@router.get("/transactions/{user_id}", response_model= List[TransactionResponse])
+async def get_transactions(user_id: str,
+                           limit: Optional[int] = Query(None, ge=1, le=Config.transactions_max_page_size, description="Page size; the next page's cursor is returned in X-Next-Cursor"),
+                           cursor: Optional[str] = Query(None, description="X-Next-Cursor value from the previous page"),
+                           stream: bool = Query(False, description="Stream all transactions (after cursor, if given) as NDJSON"),
+                           user: UserResponse = Depends(get_request_user),
+                           db: AsyncSession = Depends(get_db)):
+    if stream:
+        transaction_service.decode_cursor(cursor)  # reject a bad cursor before the 200 is sent
+        return StreamingResponse(transaction_service.stream_transactions(user_id, cursor), media_type="application/x-ndjson")
+
+    if limit or cursor:
+        transactions, next_cursor = await transaction_service.list_transactions(
+            db, user_id, limit or Config.transactions_page_size, cursor, user
         )
-        transactions = result.scalars().all()
-        return [TransactionResponse.model_validate(t) for t in transactions]
-    except HTTPException:
-        raise
-    except Exception as e:
-        raise HTTPException(status_code=status.HTTP_500_INTERNAL_SERVER_ERROR, detail="Failed to fetch transactions")
+        return transactions_json(transactions, {"X-Next-Cursor": next_cursor} if next_cursor else None)
+
+    return transactions_json(await transaction_service.get_transactions(db, user_id, user))
 
 @router.get("/search", response_model= List[TransactionResponse])
 async def search_transactions(user_id: str, query: str, db: AsyncSession = Depends(get_db)):
     search_data = TransactionSearch(user_id=user_id, query=query)
-    return await transaction_service.search_transactions(db, search_data)
+    return transactions_json(await transaction_service.search_transactions(db, search_data))
 
-@router.get("/insights/{user_id}", response_model= FinancialInsights)
-async def get_financial_insights(user_id: str, period: str = "this month", db: AsyncSession = Depends(get_db)):
+VALID_PERIODS = ["this month", "last month", "all time"]
 
-    valid_periods = ["this month", "last month", "all time"]
-    if period not in valid_periods:
+def validate_period(period: str) -> str:
+    if period not in VALID_PERIODS:
         raise HTTPException(
             status_code=status.HTTP_400_BAD_REQUEST, 
-            detail=f"Invalid period. Must be one of: {', '.join(valid_periods)}"
+            detail=f"Invalid period. Must be one of: {', '.join(VALID_PERIODS)}"
         )
-    return await analysis_service.get_financial_insights(db, user_id, period)
\ No newline at end of file
+    return period
+
+@router.get("/insights/{user_id}", response_model= FinancialInsights)
+async def get_financial_insights(user_id: str, period: str = "this month",
+                                 trend_months: Optional[int] = Query(None, ge=1, description="Limit the all-time trend to the most recent N months"),
+                                 async_recommendations: bool = Query(False, description="Return aggregates immediately and generate recommendations in the background"),
+                                 user: UserResponse = Depends(get_request_user),
+                                 db: AsyncSession = Depends(get_db)):
+    validate_period(period)
+    return await analysis_service.get_financial_insights(db, user_id, period, trend_months, async_recommendations, user)
+
+@router.get("/insights/{user_id}/recommendations", response_model= RecommendationStatus)
+async def get_recommendation_status(user_id: str, period: str = "this month", trend_months: Optional[int] = Query(None, ge=1),
+                                    db: AsyncSession = Depends(get_db)):
+    validate_period(period)
+    await insights_cache.refresh(db, user_id)
+    job_status, recommendations = recommendation_jobs.status(user_id, period, trend_months)
+    return RecommendationStatus(user_id=user_id, period=period, status=job_status, recommendations=recommendations)
+
+@router.get("/insights/{user_id}/recommendations/stream")
+async def stream_recommendations(user_id: str, period: str = "this month", trend_months: Optional[int] = Query(None, ge=1),
+                                 db: AsyncSession = Depends(get_db)):
+    """Server-Sent Events: a recommendation event per item as it streams, then recommendations or error"""
+    validate_period(period)
+    await insights_cache.refresh(db, user_id)
+
+    async def events():
+        deadline = time.monotonic() + Config.recommendation_stream_timeout_seconds
+        async for kind, payload in recommendation_jobs.follow(user_id, period, trend_months, keep_alive=15):
+            if kind == "recommendation":
+                yield f"event: recommendation\ndata: {payload.model_dump_json()}\n\n"
+            elif kind == "pending":
+                if time.monotonic() > deadline:
+                    yield f"event: error\ndata: {dumps_str({'status': 'timeout'})}\n\n"
+                    return
+                yield ": keep-alive\n\n"
+            else:
+                final = RecommendationStatus(user_id=user_id, period=period, status=kind, recommendations=payload)
+                event = "recommendations" if kind == "ready" else "error"
+                yield f"event: {event}\ndata: {final.model_dump_json()}\n\n"
+
+    return StreamingResponse(events(), media_type="text/event-stream", headers={"Cache-Control": "no-cache"})
+
+@router.get("/llm-cache/stats", response_model= Dict[str, float])
+async def get_llm_cache_stats():
+    return llm_cache.stats()
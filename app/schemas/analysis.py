@@ -26,4 +26,12 @@ class FinancialInsights(BaseModel):
     user_id: str
     spending_analysis: SpendingAnalysis
     recommendations: List[Recommendation]
+    recommendations_status: str = "ready"  # "pending" while generated in the background, "fallback" when rule-based
     generated_at: datetime
+
+# Background recommendation generation status
+class RecommendationStatus(BaseModel):
+    user_id: str
+    period: str
+    status: str  # ready, pending, failed or not_started
+    recommendations: List[Recommendation]
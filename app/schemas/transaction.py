@@ -1,7 +1,8 @@
 from pydantic import BaseModel, Field
+from typing_extensions import TypedDict
 from decimal import Decimal
 from datetime import date, datetime
-from typing import Optional
+from typing import List, Optional
 from uuid import UUID
 
 # Natural language input from user
@@ -30,7 +31,36 @@ class TransactionResponse(BaseModel):
     class Config:
         from_attributes = True
 
+# Plain row for read paths: Core rows encode straight to TransactionResponse JSON without a model per row
+class TransactionRecord(TypedDict):
+    id: UUID
+    user_id: str
+    amount: Decimal
+    description: str
+    category: str
+    merchant: Optional[str]
+    transaction_date: date
+    created_at: datetime
+
 # Search with natural language
 class TransactionSearch(BaseModel):
     user_id: str
-    query: str = Field(..., description="Natural language search: 'show me grocery expenses last month' or 'transactions above 200$ this week'")
\ No newline at end of file
+    query: str = Field(..., description="Natural language search: 'show me grocery expenses last month' or 'transactions above 200$ this week'")
+
+# Several natural language transactions at once
+class BatchTransactionInput(BaseModel):
+    user_id: str = Field(..., max_length=20)
+    texts: List[str] = Field(..., min_length=1, max_length=100, description="One natural language transaction per entry")
+
+# Outcome for one entry of a batch
+class BatchTransactionResult(BaseModel):
+    index: int
+    text: str
+    status: str  # "created" or "failed"
+    transaction: Optional[TransactionResponse] = None
+    error: Optional[str] = None
+
+class BatchTransactionResponse(BaseModel):
+    created: int
+    failed: int
+    results: List[BatchTransactionResult]
@@ -1,28 +1,42 @@
 from sqlalchemy.ext.asyncio import AsyncSession
-from sqlalchemy import select, func, and_
 from fastapi import HTTPException, status
 from datetime import datetime, date
 from dateutil.relativedelta import relativedelta
 from decimal import Decimal
-from typing import List, Dict
+from typing import List, Dict, Optional, Tuple
 from config.logger import logger
-from database.models import Transaction
 from schemas.user import UserResponse
 from schemas.analysis import FinancialInsights, SpendingAnalysis, CategorySpending, Recommendation
 from services.user_service import UserService
-from services.transaction_service import TransactionService
-from agents.finance_crew import FinanceCrew 
+from services.rollup_service import RollupService
+from services.insights_cache import insights_cache
+from services.recommendation_jobs import recommendation_jobs
+from agents.finance_crew import get_finance_crew
+from utils.deadline import DeadlineExceeded
+from utils.metrics import LLM_DEADLINE_FALLBACKS
 
 class AnalysisService:
-    async def get_financial_insights(self, db: AsyncSession, user_id: str, period: str = "this month") -> FinancialInsights:
+
+    user_service = UserService()
+    rollup_service = RollupService()
+
+    async def get_financial_insights(self, db: AsyncSession, user_id: str, period: str = "this month",
+                                     trend_months: Optional[int] = None, async_recommendations: bool = False,
+                                     user: Optional[UserResponse] = None) -> FinancialInsights:
         """Generate automated financial insights for a user based on transaction history and savings goals"""
         try:
-            user = await UserService().get_user_by_id(db, user_id)
+            # Routes pass the user loaded by their dependency; other callers fall back to the cache
+            user = user or await self.user_service.get_user(db, user_id)
             if not user:
                 raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="User not found")
-            user_response = UserResponse.model_validate(user)
 
             today = date.today()
+            version = await insights_cache.refresh(db, user_id)
+            cached = insights_cache.get(user_id, period, trend_months, today)
+            if cached:
+                logger.info(f"Served cached financial insights for user {user_id} for {period}")
+                return cached
+
             if period == "this month":
                 start_date = today.replace(day=1)
                 end_date = today
@@ -40,37 +54,77 @@ class AnalysisService:
             # Get spending breakdown by category
             category_spending = await self._get_category_spending(db, user_id, start_date, end_date)
             # Calculate total spent
-            total_spent = await TransactionService().get_total_spent_by_period(db, user_id, start_date, end_date)
+            total_spent = sum((c.total_spent for c in category_spending), Decimal('0.00'))
             # Get monthly trends
-            monthly_trend = await self._get_monthly_trend(db, user_id, today, period)  
+            creation_date = user.created_at.date() if user.created_at else today
+            monthly_trend = await self._get_monthly_trend(db, user_id, today, period, creation_date, trend_months)
             # Get top merchants
             top_merchants = await self._get_top_merchants(db, user_id, start_date, end_date)
             # Calculate goal progress
-            goal_progress = await self._calculate_goal_progress(user_response, total_spent, today)
+            goal_progress = await self._calculate_goal_progress(user, total_spent, today)
             # Budget vs actual comparison
-            budget_comparison = await self._budget_comparison(user_response.monthly_income, total_spent)
+            budget_comparison = await self._budget_comparison(user.monthly_income, total_spent)
 
             spending_analysis = SpendingAnalysis(user_id=user_id, analysis_period=period,
                                     total_spent=total_spent, categories=category_spending )
 
-            finance_crew= FinanceCrew()
-            recommendations = await finance_crew.generate_recommendations(
-                user_id=user_id,
-                spending_analysis=spending_analysis,
-                monthly_trend=monthly_trend,
-                goal_progress=goal_progress,
-                budget_comparison=budget_comparison,
-                top_merchants=top_merchants,
-                db=db
-            )
+            # Recommendations only change when the user's data does
+            recommendations = insights_cache.get_recommendations(user_id, period, trend_months)
+            recommendations_status = "ready"
+            if recommendations is None:
+                finance_crew= get_finance_crew()
+
+                if async_recommendations:
+                    # Return the aggregates now; recommendations stream in via the status or stream endpoint
+                    recommendation_jobs.start(
+                        user_id, period, trend_months, version,
+                        lambda: finance_crew.stream_recommendations(
+                            user_id=user_id,
+                            spending_analysis=spending_analysis,
+                            monthly_trend=monthly_trend,
+                            goal_progress=goal_progress,
+                            budget_comparison=budget_comparison,
+                            top_merchants=top_merchants
+                        )
+                    )
+                    logger.info(f"Generated financial insights for user {user_id} for {period}, recommendations pending")
+                    return FinancialInsights(
+                        user_id=user_id,
+                        spending_analysis=spending_analysis,
+                        recommendations=[],
+                        recommendations_status="pending",
+                        generated_at=datetime.utcnow()
+                    )
+
+                try:
+                    recommendations = await finance_crew.generate_recommendations(
+                        user_id=user_id,
+                        spending_analysis=spending_analysis,
+                        monthly_trend=monthly_trend,
+                        goal_progress=goal_progress,
+                        budget_comparison=budget_comparison,
+                        top_merchants=top_merchants,
+                        db=db
+                    )
+                except DeadlineExceeded as e:
+                    LLM_DEADLINE_FALLBACKS.labels("generate_recommendations").inc()
+                    logger.warning(f"Recommendations out of time for user {user_id} ({e}), using local rules")
+                    recommendations = self._local_recommendations(spending_analysis, goal_progress, budget_comparison)
+                    recommendations_status = "fallback"
+                if recommendations and recommendations_status == "ready":
+                    insights_cache.put_recommendations(user_id, period, trend_months, version, recommendations)
 
             insights = FinancialInsights(
                 user_id=user_id,
                 spending_analysis=spending_analysis,
                 recommendations=recommendations,
+                recommendations_status=recommendations_status,
                 generated_at=datetime.utcnow()
             )
 
+            # An empty list means generation failed and fallback ones are stand-ins; leave both uncached so the next load retries
+            if recommendations and recommendations_status == "ready":
+                insights_cache.put(user_id, period, trend_months, today, version, insights)
             logger.info(f"Generated financial insights for user {user_id} for {period}")
             return insights
 
@@ -82,101 +136,68 @@ class AnalysisService:
 
     async def _get_category_spending(self, db: AsyncSession, user_id: str, start_date: date, end_date: date) -> List[CategorySpending]:
         """Get spending breakdown by category"""
-        result = await db.execute(
-            select(Transaction.category, func.sum(Transaction.amount).label("total_spent"), func.avg(Transaction.amount).label("average_spend"))
-            .filter(and_(
-                Transaction.user_id == user_id,
-                Transaction.transaction_date >= start_date,
-                Transaction.transaction_date <= end_date
-            ))
-            .group_by(Transaction.category)
-        )
+        rows = await self.rollup_service.category_totals(db, user_id, start_date, end_date)
         categories = [
             CategorySpending(
-                category=row.category,
-                total_spent=row.total_spent or Decimal('0.00'),
-                average_spend=row.average_spend or Decimal('0.00')
+                category=category,
+                total_spent=total_spent or Decimal('0.00'),
+                average_spend=(total_spent / count).quantize(Decimal('0.01')) if count else Decimal('0.00')
             )
-            for row in result.fetchall()
+            for category, total_spent, count in rows
         ]
         return categories
 
-    async def _get_monthly_trend(self, db: AsyncSession, user_id: str, today: date, period: str) -> str:
-        """Get detailed monthly trend for the past few months"""
-        trend_data = []
-    
+    async def _get_monthly_trend(self, db: AsyncSession, user_id: str, today: date, period: str,
+                                 creation_date: date = None, trend_months: Optional[int] = None) -> str:
+        """Get monthly totals and top categories from a single grouped query"""
         if period == "this month":
-            # Just current month data
             start_date = today.replace(day=1)
-            month_total = await TransactionService().get_total_spent_by_period(db, user_id, start_date, today)
-            categories = await self._get_category_spending(db, user_id, start_date, today)
-            top_categories = sorted(categories, key=lambda x: x.total_spent, reverse=True)[:3]
-            
+            monthly = await self._get_monthly_breakdown(db, user_id, start_date, today)
+            month_total = monthly.get(start_date, (Decimal('0.00'), []))[0]
             return f"Current month ({start_date.strftime('%B %Y')}): ${month_total} total spending"
-            
+
         elif period == "last month":
-            # Just last month data
             end_date = today.replace(day=1) - relativedelta(days=1)
             start_date = end_date.replace(day=1)
-            month_total = await TransactionService().get_total_spent_by_period(db, user_id, start_date, end_date)
-            
+            monthly = await self._get_monthly_breakdown(db, user_id, start_date, end_date)
+            month_total = monthly.get(start_date, (Decimal('0.00'), []))[0]
             return f"Last month ({start_date.strftime('%B %Y')}): ${month_total} total spending"
-        elif period == "all time":
-            # Get user creation date
-            user = await UserService().get_user_by_id(db, user_id)
-            creation_date = user.created_at.date() if user.created_at else today.replace(day=1)
-            start_date = creation_date.replace(day=1)
-            # Calculate number of months from creation to now
-            months_diff = (today.year - creation_date.year) * 12 + (today.month - creation_date.month) + 1
-            months_to_show = min(months_diff, 6)  # Limit to last 6 months for performance
-            
-            for i in range(months_to_show):
-                if i == 0:
-                    # Current month (partial)
-                    start_date = today.replace(day=1)
-                    end_date = today
-                else:
-                    # Previous months
-                    end_date = today.replace(day=1) - relativedelta(months=i) - relativedelta(days=1)
-                    start_date = end_date.replace(day=1)
-
-                month_total = await TransactionService().get_total_spent_by_period(db, user_id, start_date, end_date)
-                categories = await self._get_category_spending(db, user_id, start_date, end_date)
-                top_categories = sorted(categories, key=lambda x: x.total_spent, reverse=True)[:2]
-                
-                trend_data.append({
-                    "month": start_date.strftime("%B %Y"),
-                    "total_spent": str(month_total),
-                    "top_categories": [f"{cat.category}: ${cat.total_spent}" for cat in top_categories]
-                })
-
-            # Build trend string
-        creation_month = creation_date.replace(day=1)
+
+        # All time: every month since signup, or the most recent trend_months of them
+        creation_month = (creation_date or today).replace(day=1)
+        current_month = today.replace(day=1)
+        months_diff = (today.year - creation_month.year) * 12 + (today.month - creation_month.month) + 1
+        months_to_show = min(months_diff, trend_months) if trend_months else months_diff
+        first_month = current_month - relativedelta(months=months_to_show - 1)
+        monthly = await self._get_monthly_breakdown(db, user_id, first_month, today)
+
         trend_str = f"Spending trends (since {creation_month.strftime('%B %Y')}):\n"
-        for month in trend_data:
-            trend_str += f"- {month['month']}: ${month['total_spent']}\n"
-            for cat in month.get("top_categories", [])[:2]:
-                trend_str += f"  • {cat}\n"
-        
+        for i in range(months_to_show):
+            month = current_month - relativedelta(months=i)
+            month_total, categories = monthly.get(month, (Decimal('0.00'), []))
+            trend_str += f"- {month.strftime('%B %Y')}: ${month_total}\n"
+            for category, total_spent in categories[:2]:
+                trend_str += f"  • {category}: ${total_spent}\n"
+
         return trend_str
-    
+
+    async def _get_monthly_breakdown(self, db: AsyncSession, user_id: str, start_date: date, end_date: date) -> Dict[date, Tuple[Decimal, List[Tuple[str, Decimal]]]]:
+        """Month -> (total, categories by spend desc)"""
+        monthly_totals = await self.rollup_service.monthly_category_totals(db, user_id, start_date, end_date)
+        return {
+            month: (
+                sum(totals.values(), Decimal('0.00')),
+                sorted(totals.items(), key=lambda item: item[1], reverse=True)
+            )
+            for month, totals in monthly_totals.items()
+        }
+
     async def _get_top_merchants(self, db: AsyncSession, user_id: str, start_date: date, end_date: date) -> List[Dict]:
         """Get top merchants by spending amount and frequency"""
-        result = await db.execute(
-            select(Transaction.merchant, func.sum(Transaction.amount).label("total_spent"), func.count().label("frequency"))
-            .filter(and_(
-                Transaction.user_id == user_id,
-                Transaction.transaction_date >= start_date,
-                Transaction.transaction_date <= end_date,
-                Transaction.merchant != None
-            ))
-            .group_by(Transaction.merchant)
-            .order_by(func.sum(Transaction.amount).desc())
-            .limit(5)
-        )
+        rows = await self.rollup_service.merchant_totals(db, user_id, start_date, end_date, limit=5)
         return [
-            {"name": row.merchant, "amount": row.total_spent or Decimal('0.00'), "frequency": row.frequency}
-            for row in result.fetchall()
+            {"name": merchant, "amount": total_spent or Decimal('0.00'), "frequency": frequency}
+            for merchant, total_spent, frequency in rows
         ]
 
     async def _calculate_goal_progress(self, user: UserResponse, total_spent: Decimal, today: date) -> Dict:
@@ -198,4 +219,24 @@ class AnalysisService:
             "total_spent": total_spent,
             "spending_ratio": spending_ratio,
             "status": "overspending" if spending_ratio > 80 else "within budget"
-        }
\ No newline at end of file
+        }
+
+    def _local_recommendations(self, spending_analysis: SpendingAnalysis, goal_progress: Dict,
+                               budget_comparison: Dict) -> List[Recommendation]:
+        """Rule-based advice from the aggregates, served when the LLM cannot answer within the deadline"""
+        recommendations = []
+        if budget_comparison["status"] == "overspending":
+            recommendations.append(Recommendation(
+                text=f"Spending is at {budget_comparison['spending_ratio']}% of income; cut discretionary spending to stay under 80%",
+                category="General", priority="high"))
+        if spending_analysis.categories:
+            top = max(spending_analysis.categories, key=lambda c: c.total_spent)
+            recommendations.append(Recommendation(
+                text=f"{top.category} is your largest expense at {top.total_spent}; review it first for savings",
+                category=top.category, priority="medium"))
+        if goal_progress["progress_percentage"] < 100:
+            recommendations.append(Recommendation(
+                text=f"You are {goal_progress['progress_percentage']}% of the way to your savings goal; "
+                     f"set aside a fixed amount each month to reach it",
+                category="Savings", priority="medium" if goal_progress["months_to_goal"] > 3 else "high"))
+        return recommendations
@@ -0,0 +1,104 @@
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy import select
+from collections import Counter, OrderedDict
+from typing import Dict, List, Optional
+import re
+from config.setting import Config
+from config.logger import logger
+from database.models import Transaction
+
+_TOKEN = re.compile(r"[a-z][a-z&'-]{2,}")
+_STOP_WORDS = {
+    "the", "and", "for", "from", "with", "bought", "buy", "paid", "pay", "spent", "spend", "got",
+    "today", "yesterday", "last", "this", "week", "month", "ago", "days", "dollars", "dollar",
+    "bucks", "usd", "rupees", "some", "worth", "into", "out", "our", "my", "was", "were",
+}
+
+
+class CategoryMemo:
+    """Per-user merchant/keyword -> category index learned from the user's own transactions"""
+
+    def __init__(self, max_users: int = 1000, max_rows_per_user: int = 1000, min_count: int = 2, min_share: float = 0.8):
+        self.max_users = max_users
+        self.max_rows_per_user = max_rows_per_user
+        self.min_count = min_count
+        self.min_share = min_share
+        # user_id -> {key -> Counter(category -> count)}, least recently used first
+        self._users: "OrderedDict[str, Dict[str, Counter]]" = OrderedDict()
+
+    async def lookup(self, db: AsyncSession, user_id: str, merchant: Optional[str], description: str, categories: List[str]) -> Optional[str]:
+        """Return a category when the user's history agrees on one, otherwise None"""
+        index = await self._get_index(db, user_id)
+        allowed = set(categories)
+
+        if merchant:
+            category = self._decisive(index.get(self._merchant_key(merchant)))
+            if category in allowed:
+                return category
+
+        votes = {self._decisive(index.get(token)) for token in self._tokens(description)}
+        votes.discard(None)
+        if len(votes) == 1:
+            category = votes.pop()
+            if category in allowed:
+                return category
+        return None
+
+    def record(self, user_id: str, merchant: Optional[str], description: str, category: str) -> None:
+        """Add a newly stored transaction to the user's index if it is loaded"""
+        index = self._users.get(user_id)
+        if index is None:
+            # Not loaded yet; the next lookup rebuilds from the DB and will include this row
+            return
+        self._add(index, merchant, description, category)
+        self._users.move_to_end(user_id)
+
+    def invalidate(self, user_id: str) -> None:
+        self._users.pop(user_id, None)
+
+    async def _get_index(self, db: AsyncSession, user_id: str) -> Dict[str, Counter]:
+        index = self._users.get(user_id)
+        if index is not None:
+            self._users.move_to_end(user_id)
+            return index
+
+        result = await db.execute(
+            select(Transaction.merchant, Transaction.description, Transaction.category)
+            .filter_by(user_id=user_id)
+            .order_by(Transaction.created_at.desc())
+            .limit(self.max_rows_per_user)
+        )
+        index = {}
+        for row in result.fetchall():
+            self._add(index, row.merchant, row.description, row.category)
+
+        self._users[user_id] = index
+        while len(self._users) > self.max_users:
+            self._users.popitem(last=False)
+        logger.debug(f"Built category memo for user {user_id} with {len(index)} keys")
+        return index
+
+    def _add(self, index: Dict[str, Counter], merchant: Optional[str], description: str, category: str) -> None:
+        keys = set(self._tokens(description))
+        if merchant:
+            keys.add(self._merchant_key(merchant))
+        for key in keys:
+            index.setdefault(key, Counter())[category] += 1
+
+    def _decisive(self, counts: Optional[Counter]) -> Optional[str]:
+        if not counts:
+            return None
+        category, count = counts.most_common(1)[0]
+        if count >= self.min_count and count / sum(counts.values()) >= self.min_share:
+            return category
+        return None
+
+    def _merchant_key(self, merchant: str) -> str:
+        return "merchant:" + " ".join(merchant.lower().split())
+
+    def _tokens(self, description: str) -> List[str]:
+        return [t for t in _TOKEN.findall(description.lower()) if t not in _STOP_WORDS]
+
+
+# Shared across requests so the index survives between calls
+category_memo = CategoryMemo(max_users=Config.category_memo_max_users)
@@ -0,0 +1,275 @@
+from sqlalchemy.ext.asyncio import AsyncSession
+from fastapi import UploadFile
+from collections import deque
+from typing import AsyncIterator, Deque, Dict, List, Optional, Tuple
+from datetime import date, datetime
+from decimal import Decimal, InvalidOperation
+import codecs
+import csv
+import re
+import uuid
+from config.setting import Config
+from config.logger import logger
+from database.database import AsyncSessionLocal
+from utils.serialization import dumps_str
+from agents.fast_parser import FastTransactionParser
+from services.user_service import UserService
+from services.category_memo import category_memo
+from services.rollup_service import RollupService
+from services.insights_cache import insights_cache
+
+# Header aliases for common bank exports, matched case-insensitively
+COLUMN_ALIASES = {
+    "transaction_date": ["date", "transaction date", "posted date", "posting date", "value date", "txn date", "booking date"],
+    "amount": ["amount", "transaction amount", "amt", "value"],
+    "debit": ["debit", "withdrawal", "withdrawals", "paid out", "money out"],
+    "description": ["description", "memo", "narration", "details", "transaction description", "particulars"],
+    "merchant": ["merchant", "payee", "name", "counterparty"],
+    "category": ["category"],
+}
+DATE_FORMATS = ["%Y-%m-%d", "%m/%d/%Y", "%d/%m/%Y", "%m/%d/%y", "%d-%m-%Y", "%d %b %Y", "%b %d, %Y", "%Y%m%d"]
+COPY_COLUMNS = ["id", "user_id", "amount", "description", "category", "merchant", "transaction_date", "created_at"]
+
+_OFX_TAG = re.compile(r"<(/?)([A-Z0-9.]+)>([^<\r\n]*)")
+
+
+class RowError(ValueError):
+    """A single statement row that cannot be imported; the rest of the file continues"""
+
+
+class ImportFormatError(ValueError):
+    """The file as a whole cannot be read, e.g. missing required columns"""
+
+
+class _LineFeed:
+    """Iterator for csv.reader that is topped up between reads; it only ever holds whole records"""
+
+    def __init__(self):
+        self.lines: Deque[str] = deque()
+
+    def __iter__(self):
+        return self
+
+    def __next__(self) -> str:
+        if not self.lines:
+            raise StopIteration
+        return self.lines.popleft()
+
+
+class ImportService:
+    """Streams CSV/OFX bank statements into the transactions table with PostgreSQL COPY"""
+
+    user_service = UserService()
+    rollup_service = RollupService()
+    fast_parser = FastTransactionParser()
+
+    async def import_statement(self, upload: UploadFile, user_id: str, file_format: str,
+                               column_map: Optional[Dict[str, str]] = None, negative_is_expense: bool = True) -> AsyncIterator[str]:
+        """Yield NDJSON progress, row error and summary lines while loading the file.
+
+        Each batch of import_batch_size rows is committed on its own, so progress counts are rows
+        already stored; if the import fails midway, the error line says how many were kept.
+        """
+        imported = skipped = rows_read = 0
+        async with AsyncSessionLocal() as db:
+            try:
+                user = await self.user_service.get_user(db, user_id)
+                if not user:
+                    yield self._line(type="error", error="User not found")
+                    return
+                created_date = user.created_at.date() if hasattr(user.created_at, 'date') else user.created_at
+                first_allowed_date = date(created_date.year, created_date.month, 1)
+                categories = await self.user_service.get_categories(db, user_id)
+
+                records = []
+                reader = self._read_ofx(upload) if file_format == "ofx" else self._read_csv(upload, column_map or {})
+                async for line_number, fields in reader:
+                    rows_read += 1
+                    try:
+                        record = await self._to_record(db, fields, user_id, categories, first_allowed_date, negative_is_expense)
+                    except RowError as e:
+                        skipped += 1
+                        yield self._line(type="row_error", line=line_number, error=str(e))
+                        continue
+                    records.append(record)
+
+                    if len(records) >= Config.import_batch_size:
+                        await self._copy(db, records)
+                        imported += len(records)
+                        records = []
+                        yield self._line(type="progress", rows_read=rows_read, imported=imported, skipped=skipped)
+
+                if records:
+                    await self._copy(db, records)
+                    imported += len(records)
+                logger.info(f"Imported {imported} transactions for user {user_id} ({skipped} skipped of {rows_read})")
+                yield self._line(type="summary", rows_read=rows_read, imported=imported, skipped=skipped)
+
+            except ImportFormatError as e:
+                await db.rollback()
+                yield self._line(type="error", error=str(e), rows_read=rows_read, imported=imported)
+            except Exception as e:
+                await db.rollback()
+                logger.error(f"Error importing statement for user {user_id} after {imported} rows: {e}")
+                yield self._line(type="error", error=f"Import failed; the first {imported} imported rows were stored",
+                                 rows_read=rows_read, imported=imported)
+            finally:
+                if imported:
+                    # Bulk rows bypass record(); rebuild the memo from the DB on next lookup
+                    category_memo.invalidate(user_id)
+
+    async def _copy(self, db: AsyncSession, records: List[Tuple]) -> None:
+        """COPY one batch, its rollups and the data version bump, then commit them together"""
+        connection = await db.connection()
+        raw_connection = await connection.get_raw_connection()
+        await raw_connection.driver_connection.copy_records_to_table("transactions", records=records, columns=COPY_COLUMNS)
+        # record layout follows COPY_COLUMNS
+        await self.rollup_service.apply(db, [(r[1], r[6], r[4], r[5], r[2]) for r in records])
+        await insights_cache.bump(db, records[0][1])
+        await db.commit()
+
+    async def _to_record(self, db: AsyncSession, fields: Dict[str, str], user_id: str, categories: List[str],
+                         first_allowed_date: date, negative_is_expense: bool) -> Tuple:
+        transaction_date = self._parse_date(fields.get("transaction_date", ""))
+        if transaction_date < first_allowed_date:
+            raise RowError(f"Transactions before {first_allowed_date.strftime('%B %Y')} are not allowed")
+
+        if "debit" in fields:
+            if not fields["debit"].strip():
+                raise RowError("Credit or zero amount skipped")
+            amount = self._parse_amount(fields["debit"]).copy_abs()
+        else:
+            amount = self._parse_amount(fields.get("amount", ""))
+            if negative_is_expense:
+                if amount >= 0:
+                    raise RowError("Credit or zero amount skipped")
+                amount = -amount
+            elif amount <= 0:
+                raise RowError("Credit or zero amount skipped")
+        if amount == 0:
+            raise RowError("Zero amount skipped")
+
+        merchant = (fields.get("merchant") or "").strip()[:255] or None
+        description = (fields.get("description") or "").strip() or merchant
+        if not description:
+            raise RowError("Missing description")
+
+        category = await self._categorize(db, user_id, fields.get("category"), merchant, description, categories)
+        return (uuid.uuid4(), user_id, amount, description, category, merchant, transaction_date, datetime.utcnow())
+
+    async def _categorize(self, db: AsyncSession, user_id: str, given: Optional[str], merchant: Optional[str],
+                          description: str, categories: List[str]) -> str:
+        """Local rules only: statement column, then the user's history, then keywords"""
+        if given:
+            match = next((c for c in categories if c.lower() == given.strip().lower()), None)
+            if match:
+                return match
+        memo_category = await category_memo.lookup(db, user_id, merchant, description, categories)
+        if memo_category:
+            return memo_category
+        text = f"{merchant or ''} {description}".lower()
+        return self.fast_parser.match_category(text, categories) or "Other"
+
+    def _parse_date(self, raw: str) -> date:
+        raw = raw.strip()
+        for date_format in DATE_FORMATS:
+            try:
+                return datetime.strptime(raw, date_format).date()
+            except ValueError:
+                continue
+        raise RowError(f"Unrecognized date '{raw}'")
+
+    def _parse_amount(self, raw: str) -> Decimal:
+        cleaned = raw.strip().replace(",", "").replace("$", "").replace(" ", "")
+        if cleaned.startswith("(") and cleaned.endswith(")"):
+            cleaned = "-" + cleaned[1:-1]
+        try:
+            return Decimal(cleaned).quantize(Decimal("0.01"))
+        except InvalidOperation:
+            raise RowError(f"Unrecognized amount '{raw}'")
+
+    async def _read_lines(self, upload: UploadFile) -> AsyncIterator[str]:
+        """Decode the upload chunk by chunk so the file is never held in memory"""
+        decoder = codecs.getincrementaldecoder("utf-8-sig")(errors="replace")
+        pending = ""
+        while True:
+            chunk = await upload.read(Config.import_chunk_bytes)
+            if not chunk:
+                break
+            pending += decoder.decode(chunk)
+            # Only \n ends a line: a \r\n split across chunks stays one line ending, and the other
+            # characters str.splitlines() breaks on may appear inside quoted CSV fields
+            *lines, pending = pending.split("\n")
+            for line in lines:
+                yield line + "\n"
+        pending += decoder.decode(b"", final=True)
+        if pending:
+            yield pending
+
+    async def _read_csv(self, upload: UploadFile, column_map: Dict[str, str]) -> AsyncIterator[Tuple[int, Dict[str, str]]]:
+        """One csv.reader over the whole upload, so quoted fields may span lines (e.g. multi-line memos)"""
+        header = None
+        feed = _LineFeed()
+        reader = csv.reader(feed)
+        line_number = start_line = 0
+        quotes = 0
+        async for line in self._read_lines(upload):
+            line_number += 1
+            if not feed.lines:
+                if not line.strip():
+                    continue
+                start_line = line_number
+            feed.lines.append(line)
+            # Escaped quotes come in pairs, so an odd running count means a quoted field is still open
+            quotes += line.count('"')
+            if quotes % 2:
+                continue
+            quotes = 0
+            values = next(reader)
+            if header is None:
+                header = self._map_header(values, column_map)
+                continue
+            yield start_line, {field: values[i] for field, i in header.items() if i < len(values)}
+        if feed.lines:
+            # Unterminated quote at end of file: let the reader parse what is there
+            values = next(reader, None)
+            if header is not None and values:
+                yield start_line, {field: values[i] for field, i in header.items() if i < len(values)}
+
+    def _map_header(self, values: List[str], column_map: Dict[str, str]) -> Dict[str, int]:
+        names = [v.strip().lower() for v in values]
+        header = {}
+        for field, aliases in COLUMN_ALIASES.items():
+            wanted = [column_map[field].strip().lower()] if field in column_map else aliases
+            index = next((names.index(a) for a in wanted if a in names), None)
+            if index is not None:
+                header[field] = index
+        if "transaction_date" not in header or not ({"amount", "debit"} & header.keys()):
+            raise ImportFormatError(f"CSV header must include a date and an amount column, got {values}")
+        return header
+
+    async def _read_ofx(self, upload: UploadFile) -> AsyncIterator[Tuple[int, Dict[str, str]]]:
+        """Tolerates both SGML (unclosed tags) and XML OFX"""
+        current = None
+        line_number = start_line = 0
+        async for line in self._read_lines(upload):
+            line_number += 1
+            for closing, tag, value in _OFX_TAG.findall(line):
+                if tag == "STMTTRN":
+                    if closing and current is not None:
+                        yield start_line, current
+                        current = None
+                    elif not closing:
+                        current, start_line = {}, line_number
+                elif current is not None and not closing and value.strip():
+                    if tag == "DTPOSTED":
+                        current["transaction_date"] = value.strip()[:8]
+                    elif tag == "TRNAMT":
+                        current["amount"] = value
+                    elif tag == "NAME":
+                        current["merchant"] = value
+                    elif tag == "MEMO":
+                        current["description"] = value
+
+    def _line(self, **payload) -> str:
+        return dumps_str(payload) + "\n"
@@ -0,0 +1,75 @@
+from collections import OrderedDict
+from datetime import date
+from typing import Dict, Hashable, List, Optional, Tuple
+from sqlalchemy import select
+from sqlalchemy.dialects.postgresql import insert
+from sqlalchemy.ext.asyncio import AsyncSession
+from config.setting import Config
+from database.models import UserDataVersion
+from schemas.analysis import FinancialInsights, Recommendation
+
+
+class InsightsCache:
+    """Per-user FinancialInsights cache, invalidated by a data version that every write path bumps.
+    The version lives in the database so that writes through any worker invalidate every worker's entries"""
+
+    def __init__(self, max_entries: int = 2048):
+        self.max_entries = max_entries
+        # Last version this process read from or wrote to the database
+        self._versions: Dict[str, int] = {}
+        # (user_id, period, trend_months, day) -> (version, insights)
+        self._insights: "OrderedDict[Hashable, Tuple[int, FinancialInsights]]" = OrderedDict()
+        # (user_id, period, trend_months) -> (version, recommendations); survives day changes
+        self._recommendations: "OrderedDict[Hashable, Tuple[int, List[Recommendation]]]" = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+
+    def version(self, user_id: str) -> int:
+        return self._versions.get(user_id, 0)
+
+    async def refresh(self, db: AsyncSession, user_id: str) -> int:
+        """Read the user's current data version; call before serving cached entries"""
+        version = await db.scalar(select(UserDataVersion.version).where(UserDataVersion.user_id == user_id))
+        self._versions[user_id] = version or 0
+        return self._versions[user_id]
+
+    async def bump(self, db: AsyncSession, user_id: str) -> None:
+        """Mark the user's data as changed; call inside the transaction that writes it, before commit"""
+        stmt = insert(UserDataVersion).values(user_id=user_id, version=1)
+        stmt = stmt.on_conflict_do_update(index_elements=[UserDataVersion.user_id],
+                                          set_={"version": UserDataVersion.version + 1})
+        self._versions[user_id] = await db.scalar(stmt.returning(UserDataVersion.version))
+
+    def get(self, user_id: str, period: str, trend_months: Optional[int], today: date) -> Optional[FinancialInsights]:
+        entry = self._insights.get((user_id, period, trend_months, today))
+        if entry and entry[0] == self.version(user_id):
+            self._insights.move_to_end((user_id, period, trend_months, today))
+            self.hits += 1
+            return entry[1]
+        self.misses += 1
+        return None
+
+    def put(self, user_id: str, period: str, trend_months: Optional[int], today: date, version: int, insights: FinancialInsights) -> None:
+        """Store insights computed from data at version, which the caller read before computing"""
+        self._store(self._insights, (user_id, period, trend_months, today), (version, insights))
+
+    def get_recommendations(self, user_id: str, period: str, trend_months: Optional[int]) -> Optional[List[Recommendation]]:
+        """Recommendations are reused across days until the user's data changes"""
+        entry = self._recommendations.get((user_id, period, trend_months))
+        if entry and entry[0] == self.version(user_id):
+            return entry[1]
+        return None
+
+    def put_recommendations(self, user_id: str, period: str, trend_months: Optional[int], version: int,
+                            recommendations: List[Recommendation]) -> None:
+        self._store(self._recommendations, (user_id, period, trend_months), (version, recommendations))
+
+    def _store(self, entries: OrderedDict, key: Hashable, value: Tuple) -> None:
+        entries[key] = value
+        entries.move_to_end(key)
+        while len(entries) > self.max_entries:
+            entries.popitem(last=False)
+
+
+# Shared so write paths and the insights endpoint see the same entries
+insights_cache = InsightsCache(max_entries=Config.insights_cache_size)
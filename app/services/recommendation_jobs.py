@@ -0,0 +1,124 @@
+from typing import AsyncIterator, Callable, Dict, List, Optional, Tuple
+import asyncio
+from config.setting import Config
+from config.logger import logger
+from schemas.analysis import Recommendation
+from services.insights_cache import insights_cache
+from utils.deadline import deadline_after
+
+
+class RecommendationJob:
+    """One background generation; recommendations fill in as the LLM streams them"""
+
+    def __init__(self, version: int):
+        self.version = version
+        self.recommendations: List[Recommendation] = []
+        self.updated = asyncio.Event()
+        self.task: Optional[asyncio.Task] = None
+
+    def add(self, recommendation: Recommendation) -> None:
+        self.recommendations.append(recommendation)
+        # Wake current followers, then re-arm for the next one
+        self.updated.set()
+        self.updated = asyncio.Event()
+
+
+class RecommendationJobs:
+    """Generates recommendations in the background so /insights can return aggregates immediately"""
+
+    def __init__(self):
+        # (user_id, period, trend_months) -> job for the data version it was started at
+        self._jobs: Dict[Tuple, RecommendationJob] = {}
+
+    def start(self, user_id: str, period: str, trend_months: Optional[int], version: int,
+              generate: Callable[[], AsyncIterator[Recommendation]]) -> None:
+        """Start generation unless a job for the same data version is already running or done"""
+        self._purge()
+        key = (user_id, period, trend_months)
+        job = self._jobs.get(key)
+        if job and job.version == version and not self._failed(job):
+            return
+        job = RecommendationJob(version)
+        job.task = asyncio.create_task(self._run(key, job, generate))
+        self._jobs[key] = job
+
+    def status(self, user_id: str, period: str, trend_months: Optional[int]) -> Tuple[str, List[Recommendation]]:
+        """One of ready, pending, failed or not_started; pending includes what has streamed so far"""
+        recommendations = insights_cache.get_recommendations(user_id, period, trend_months)
+        if recommendations is not None:
+            return "ready", recommendations
+
+        job = self._current(user_id, period, trend_months)
+        if not job:
+            return "not_started", []
+        if not job.task.done():
+            return "pending", list(job.recommendations)
+        return "failed", list(job.recommendations)
+
+    async def wait(self, user_id: str, period: str, trend_months: Optional[int], timeout: float) -> Tuple[str, List[Recommendation]]:
+        """Wait up to timeout seconds for a pending job, then report its status"""
+        job = self._current(user_id, period, trend_months)
+        if job and not job.task.done():
+            try:
+                await asyncio.wait_for(asyncio.shield(job.task), timeout)
+            except Exception:
+                # Timeouts and generation errors are both reported through status()
+                pass
+        return self.status(user_id, period, trend_months)
+
+    async def follow(self, user_id: str, period: str, trend_months: Optional[int],
+                     keep_alive: float) -> AsyncIterator[Tuple[str, object]]:
+        """Yield each recommendation as it arrives, ("pending", None) while idle, then the final status"""
+        sent = 0
+        while True:
+            job_status, recommendations = self.status(user_id, period, trend_months)
+            for recommendation in recommendations[sent:]:
+                yield "recommendation", recommendation
+            sent = max(sent, len(recommendations))
+            if job_status != "pending":
+                yield job_status, recommendations
+                return
+
+            job = self._current(user_id, period, trend_months)
+            updated = asyncio.ensure_future(job.updated.wait())
+            try:
+                done, _ = await asyncio.wait({updated, job.task}, timeout=keep_alive, return_when=asyncio.FIRST_COMPLETED)
+            finally:
+                updated.cancel()
+            if not done:
+                yield "pending", None
+
+    async def _run(self, key: Tuple, job: RecommendationJob,
+                   generate: Callable[[], AsyncIterator[Recommendation]]) -> List[Recommendation]:
+        user_id, period, trend_months = key
+        try:
+            # The task inherited the /insights request's deadline; give it the stream's own budget instead
+            with deadline_after(Config.recommendation_stream_timeout_seconds, replace=True):
+                async for recommendation in generate():
+                    job.add(recommendation)
+        except Exception as e:
+            logger.error(f"Background recommendation generation failed for user {user_id}: {e}")
+            raise
+        if job.recommendations:
+            insights_cache.put_recommendations(user_id, period, trend_months, job.version, job.recommendations)
+        logger.info(f"Background recommendations ready for user {user_id} for {period}: {len(job.recommendations)}")
+        return job.recommendations
+
+    def _current(self, user_id: str, period: str, trend_months: Optional[int]) -> Optional[RecommendationJob]:
+        job = self._jobs.get((user_id, period, trend_months))
+        return job if job and job.version == insights_cache.version(user_id) else None
+
+    def _failed(self, job: RecommendationJob) -> bool:
+        task = job.task
+        return task.done() and (task.cancelled() or task.exception() is not None or not task.result())
+
+    def _purge(self) -> None:
+        # Finished jobs are only needed to report failures for the current version
+        stale = [key for key, job in self._jobs.items()
+                 if job.task.done() and job.version != insights_cache.version(key[0])]
+        for key in stale:
+            del self._jobs[key]
+
+
+# Shared so the status and stream endpoints see jobs started by /insights
+recommendation_jobs = RecommendationJobs()
@@ -0,0 +1,193 @@
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy import select, delete, func, and_, or_, union_all, text, Date
+from sqlalchemy.dialects.postgresql import insert
+from datetime import date, timedelta
+from dateutil.relativedelta import relativedelta
+from decimal import Decimal
+from typing import Dict, Iterable, List, Optional, Tuple
+from config.logger import logger
+from database.models import Transaction, MonthlyCategoryRollup, MonthlyMerchantRollup
+
+# (user_id, transaction_date, category, merchant, amount)
+RollupRow = Tuple[str, date, str, Optional[str], Decimal]
+
+# Advisory lock key: writers hold it shared until commit, rebuild holds it exclusively, so a rebuild
+# never runs alongside a transaction whose rows it might count twice or miss
+ROLLUP_LOCK = 7_310_001
+
+
+class RollupService:
+    """Maintains and queries the monthly per-category and per-merchant rollup tables"""
+
+    async def apply(self, db: AsyncSession, rows: Iterable[RollupRow]) -> None:
+        """Add new transactions to the rollups; call inside the transaction that inserts them"""
+        await db.execute(text("SELECT pg_advisory_xact_lock_shared(:key)"), {"key": ROLLUP_LOCK})
+        categories: Dict[Tuple, List] = {}
+        merchants: Dict[Tuple, List] = {}
+        for user_id, transaction_date, category, merchant, amount in rows:
+            month = transaction_date.replace(day=1)
+            self._accumulate(categories, (user_id, month, category), amount)
+            if merchant:
+                self._accumulate(merchants, (user_id, month, merchant), amount)
+
+        await self._upsert(db, MonthlyCategoryRollup, "category", categories)
+        await self._upsert(db, MonthlyMerchantRollup, "merchant", merchants)
+
+    async def rebuild(self, db: AsyncSession, user_id: Optional[str] = None) -> None:
+        """Recompute rollups from raw transactions, for backfill or repair; waits for in-flight writes and
+        holds new ones until it commits"""
+        await db.execute(text("SELECT pg_advisory_xact_lock(:key)"), {"key": ROLLUP_LOCK})
+        month = func.date_trunc('month', Transaction.transaction_date).cast(Date)
+        for model, key_column in ((MonthlyCategoryRollup, Transaction.category), (MonthlyMerchantRollup, Transaction.merchant)):
+            clear = delete(model)
+            source = select(
+                Transaction.user_id, month, key_column,
+                func.sum(Transaction.amount), func.count(), func.sum(Transaction.amount * Transaction.amount)
+            ).group_by(Transaction.user_id, month, key_column)
+            if key_column is Transaction.merchant:
+                source = source.filter(Transaction.merchant != None)
+            if user_id:
+                clear = clear.filter(model.user_id == user_id)
+                source = source.filter(Transaction.user_id == user_id)
+
+            await db.execute(clear)
+            await db.execute(
+                insert(model).from_select(
+                    ["user_id", "month", key_column.key, "total_amount", "transaction_count", "sum_of_squares"],
+                    source
+                )
+            )
+        await db.commit()
+        logger.info(f"Rebuilt rollups for {'user ' + user_id if user_id else 'all users'}")
+
+    async def category_totals(self, db: AsyncSession, user_id: str, start_date: date, end_date: date) -> List[Tuple[str, Decimal, int]]:
+        """(category, total, count) for the period"""
+        rows = await self._totals(db, MonthlyCategoryRollup.category, Transaction.category, user_id, start_date, end_date)
+        return [(row.key, row.total_amount, row.transaction_count) for row in rows]
+
+    async def merchant_totals(self, db: AsyncSession, user_id: str, start_date: date, end_date: date,
+                              limit: Optional[int] = None) -> List[Tuple[str, Decimal, int]]:
+        """(merchant, total, count) for the period, highest spend first"""
+        rows = await self._totals(db, MonthlyMerchantRollup.merchant, Transaction.merchant, user_id, start_date, end_date, limit)
+        return [(row.key, row.total_amount, row.transaction_count) for row in rows]
+
+    async def monthly_category_totals(self, db: AsyncSession, user_id: str, start_date: date, end_date: date) -> Dict[date, Dict[str, Decimal]]:
+        """Month -> {category: total} for the period"""
+        full_start, full_end, partial = self._split_range(start_date, end_date)
+        parts = []
+        if full_start < full_end:
+            parts.append(
+                select(MonthlyCategoryRollup.month.label("month"), MonthlyCategoryRollup.category.label("category"),
+                       MonthlyCategoryRollup.total_amount.label("total_amount"))
+                .filter(and_(
+                    MonthlyCategoryRollup.user_id == user_id,
+                    MonthlyCategoryRollup.month >= full_start,
+                    MonthlyCategoryRollup.month < full_end
+                ))
+            )
+        if partial:
+            month = func.date_trunc('month', Transaction.transaction_date).cast(Date)
+            parts.append(
+                select(month.label("month"), Transaction.category.label("category"), func.sum(Transaction.amount).label("total_amount"))
+                .filter(Transaction.user_id == user_id, self._in_ranges(partial))
+                .group_by(month, Transaction.category)
+            )
+
+        if not parts:
+            return {}
+        result = await db.execute(parts[0] if len(parts) == 1 else union_all(*parts))
+        monthly: Dict[date, Dict[str, Decimal]] = {}
+        for row in result.fetchall():
+            totals = monthly.setdefault(row.month, {})
+            totals[row.category] = totals.get(row.category, Decimal('0.00')) + row.total_amount
+        return monthly
+
+    async def _totals(self, db: AsyncSession, rollup_key, raw_key, user_id: str, start_date: date, end_date: date,
+                      limit: Optional[int] = None):
+        """Whole months come from the rollup table, leftover days from raw transactions, in one statement"""
+        rollup = rollup_key.class_
+        full_start, full_end, partial = self._split_range(start_date, end_date)
+        parts = []
+        if full_start < full_end:
+            parts.append(
+                select(rollup_key.label("key"), rollup.total_amount.label("total_amount"),
+                       rollup.transaction_count.label("transaction_count"))
+                .filter(and_(rollup.user_id == user_id, rollup.month >= full_start, rollup.month < full_end))
+            )
+        if partial:
+            parts.append(
+                select(raw_key.label("key"), func.sum(Transaction.amount).label("total_amount"),
+                       func.count().label("transaction_count"))
+                .filter(Transaction.user_id == user_id, raw_key != None, self._in_ranges(partial))
+                .group_by(raw_key)
+            )
+
+        if not parts:
+            return []
+        combined = (parts[0] if len(parts) == 1 else union_all(*parts)).subquery()
+        total = func.sum(combined.c.total_amount)
+        query = (
+            select(combined.c.key, total.label("total_amount"), func.sum(combined.c.transaction_count).label("transaction_count"))
+            .group_by(combined.c.key)
+            .order_by(total.desc())
+        )
+        if limit:
+            query = query.limit(limit)
+        result = await db.execute(query)
+        return result.fetchall()
+
+    def _split_range(self, start_date: date, end_date: date) -> Tuple[date, date, List[Tuple[date, date]]]:
+        """Split [start, end] into whole months [full_start, full_end) and partial day ranges"""
+        full_start = start_date if start_date.day == 1 else start_date.replace(day=1) + relativedelta(months=1)
+        full_end = (end_date + timedelta(days=1)).replace(day=1)
+        if full_start >= full_end:
+            return full_start, full_start, [(start_date, end_date)] if start_date <= end_date else []
+
+        partial = []
+        if start_date < full_start:
+            partial.append((start_date, full_start - timedelta(days=1)))
+        if full_end <= end_date:
+            partial.append((full_end, end_date))
+        return full_start, full_end, partial
+
+    def _in_ranges(self, ranges: List[Tuple[date, date]]):
+        return or_(*(Transaction.transaction_date.between(start, end) for start, end in ranges))
+
+    def _accumulate(self, deltas: Dict[Tuple, List], key: Tuple, amount: Decimal) -> None:
+        delta = deltas.setdefault(key, [Decimal('0.00'), 0, Decimal('0')])
+        delta[0] += amount
+        delta[1] += 1
+        delta[2] += amount * amount
+
+    async def _upsert(self, db: AsyncSession, model, key_name: str, deltas: Dict[Tuple, List]) -> None:
+        if not deltas:
+            return
+        statement = insert(model).values([
+            {"user_id": user_id, "month": month, key_name: key, "total_amount": total,
+             "transaction_count": count, "sum_of_squares": squares}
+            for (user_id, month, key), (total, count, squares) in deltas.items()
+        ])
+        statement = statement.on_conflict_do_update(
+            index_elements=["user_id", "month", key_name],
+            set_={
+                "total_amount": model.total_amount + statement.excluded.total_amount,
+                "transaction_count": model.transaction_count + statement.excluded.transaction_count,
+                "sum_of_squares": model.sum_of_squares + statement.excluded.sum_of_squares,
+            }
+        )
+        await db.execute(statement)
+
+
+if __name__ == "__main__":
+    # Backfill: python -m services.rollup_service [user_id]
+    import asyncio
+    import sys
+    from database.database import AsyncSessionLocal, init_db, dispose_engine
+
+    async def _main(user_id: Optional[str]) -> None:
+        await init_db()
+        async with AsyncSessionLocal() as db:
+            await RollupService().rebuild(db, user_id)
+        await dispose_engine()
+
+    asyncio.run(_main(sys.argv[1] if len(sys.argv) > 1 else None))
@@ -1,38 +1,50 @@
 from sqlalchemy.ext.asyncio import AsyncSession
-from sqlalchemy import select, and_, func
+from sqlalchemy import select, insert, and_, tuple_
 from fastapi import HTTPException, status
-from typing import List
+from typing import AsyncIterator, List, Optional, Tuple
 from decimal import Decimal
-from datetime import date
+from datetime import date, datetime
+import base64
+import uuid
+from config.setting import Config
 from config.logger import logger
+from database.database import AsyncSessionLocal
+from utils.serialization import dumps
+from utils.deadline import DeadlineExceeded
 from database.models import Transaction
-from schemas.transaction import NaturalLanguageInput, TransactionResponse, TransactionSearch
+from schemas.user import UserResponse
+from schemas.transaction import NaturalLanguageInput, TransactionResponse, TransactionRecord, TransactionSearch, BatchTransactionInput, BatchTransactionResult, BatchTransactionResponse
 from services.user_service import UserService
-from agents.finance_crew import FinanceCrew 
+from services.category_memo import category_memo
+from services.rollup_service import RollupService
+from services.insights_cache import insights_cache
+from agents.finance_crew import get_finance_crew
 
 class TransactionService:
     
     user_service = UserService()
+    rollup_service = RollupService()
     
     async def create_transaction(self, db: AsyncSession, input_data: NaturalLanguageInput) -> TransactionResponse:
         """Process natural language transaction, categorize, and store it"""
         try:
 
-            if not await self.user_service.user_exists(db, input_data.user_id):
+            user = await self.user_service.get_user(db, input_data.user_id)
+            if not user:
                 raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="User not found")
 
             # Parse and categorize natural language input
-            finance_crew = FinanceCrew()
-            parsed_data = await finance_crew.parse_transaction(input_data.text, input_data.user_id, db)
+            finance_crew = get_finance_crew()
+            try:
+                parsed_data = await finance_crew.parse_transaction(input_data.text, input_data.user_id, db)
+            except DeadlineExceeded:
+                raise HTTPException(status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+                                    detail="Transaction could not be parsed in time, please retry")
             if not parsed_data:
                 raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Failed to parse transaction")
 
             # transactions cannot be dated before the user's signup month
-            user = await self.user_service.get_user_by_id(db, input_data.user_id)
-            if not user:
-                raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="User not found")
-            created_date = user.created_at.date() if hasattr(user.created_at, 'date') else user.created_at
-            first_allowed_date = date(created_date.year, created_date.month, 1)
+            first_allowed_date = self._first_allowed_date(user)
             if parsed_data.transaction_date < first_allowed_date:
                 blocked_month = first_allowed_date.strftime('%B %Y')
                 raise HTTPException(
@@ -49,8 +61,13 @@ class TransactionService:
                 transaction_date=parsed_data.transaction_date
             )
             db.add(new_transaction)
+            await self.rollup_service.apply(db, [(
+                input_data.user_id, parsed_data.transaction_date, parsed_data.category, parsed_data.merchant, parsed_data.amount
+            )])
+            await insights_cache.bump(db, input_data.user_id)
             await db.commit()
             await db.refresh(new_transaction)
+            category_memo.record(input_data.user_id, parsed_data.merchant, input_data.text, parsed_data.category)
 
             logger.info(f"Transaction created for user {input_data.user_id}: {parsed_data.amount} ({parsed_data.category})")
             return TransactionResponse.model_validate(new_transaction)
@@ -62,18 +79,84 @@ class TransactionService:
             logger.error(f"Error creating transaction for user {input_data.user_id}: {e}")
             raise HTTPException(status_code=status.HTTP_500_INTERNAL_SERVER_ERROR, detail="Failed to create transaction")
 
-    async def search_transactions(self, db: AsyncSession, search_data: TransactionSearch) -> List[TransactionResponse]:
+    async def create_transactions_batch(self, db: AsyncSession, batch_data: BatchTransactionInput) -> BatchTransactionResponse:
+        """Parse a list of natural language transactions together and store the valid ones in one INSERT"""
+        try:
+            user = await self.user_service.get_user(db, batch_data.user_id)
+            if not user:
+                raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="User not found")
+
+            # Same minimum length as a single NaturalLanguageInput
+            valid = [i for i, text in enumerate(batch_data.texts) if len(text.strip()) >= 10]
+            finance_crew = get_finance_crew()
+            parsed_valid = await finance_crew.parse_transactions_batch([batch_data.texts[i] for i in valid], batch_data.user_id, db)
+            parsed_rows = [None] * len(batch_data.texts)
+            for i, parsed_data in zip(valid, parsed_valid):
+                parsed_rows[i] = parsed_data
+
+            # transactions cannot be dated before the user's signup month
+            first_allowed_date = self._first_allowed_date(user)
+            results = []
+            rows = []
+            for index, (text, parsed_data) in enumerate(zip(batch_data.texts, parsed_rows)):
+                result = BatchTransactionResult(index=index, text=text, status="failed")
+                results.append(result)
+                if len(text.strip()) < 10:
+                    result.error = "Transaction text must be at least 10 characters"
+                elif not parsed_data:
+                    result.error = "Failed to parse transaction"
+                elif parsed_data.transaction_date < first_allowed_date:
+                    result.error = f"Transactions before {first_allowed_date.strftime('%B %Y')} are not allowed"
+                else:
+                    rows.append({
+                        "id": uuid.uuid4(),
+                        "user_id": batch_data.user_id,
+                        "amount": parsed_data.amount,
+                        "description": text,
+                        "category": parsed_data.category,
+                        "merchant": parsed_data.merchant,
+                        "transaction_date": parsed_data.transaction_date,
+                        "created_at": datetime.utcnow(),
+                    })
+                    result.status = "created"
+                    result.transaction = TransactionResponse(**rows[-1])
+
+            if rows:
+                await db.execute(insert(Transaction).values(rows))
+                await self.rollup_service.apply(db, [
+                    (row["user_id"], row["transaction_date"], row["category"], row["merchant"], row["amount"]) for row in rows
+                ])
+                await insights_cache.bump(db, batch_data.user_id)
+                await db.commit()
+                for row in rows:
+                    category_memo.record(batch_data.user_id, row["merchant"], row["description"], row["category"])
+
+            logger.info(f"Batch created {len(rows)}/{len(results)} transactions for user {batch_data.user_id}")
+            return BatchTransactionResponse(created=len(rows), failed=len(results) - len(rows), results=results)
+
+        except HTTPException:
+            raise
+        except Exception as e:
+            await db.rollback()
+            logger.error(f"Error creating transaction batch for user {batch_data.user_id}: {e}")
+            raise HTTPException(status_code=status.HTTP_500_INTERNAL_SERVER_ERROR, detail="Failed to create transactions")
+
+    def _first_allowed_date(self, user: UserResponse) -> date:
+        created_date = user.created_at.date() if hasattr(user.created_at, 'date') else user.created_at
+        return date(created_date.year, created_date.month, 1)
+
+    async def search_transactions(self, db: AsyncSession, search_data: TransactionSearch) -> List[TransactionRecord]:
         """Search transactions by category, date, or amount from natural language query"""
         try:
             if not await self.user_service.user_exists(db, search_data.user_id):
                 raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="User not found")
 
-            finance_crew= FinanceCrew()
-            filters = await finance_crew.parse_search_query(search_data.query)
+            finance_crew= get_finance_crew()
+            filters = await finance_crew.parse_search_query(search_data.query, search_data.user_id)
             if not filters:
                 raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Failed to parse search query")
 
-            query = select(Transaction).filter_by(user_id=search_data.user_id)
+            query = select(*self._columns()).filter(Transaction.user_id == search_data.user_id)
             if filters.get("category"):
                 query = query.filter(Transaction.category.ilike(f"%{filters['category']}%"))
             if filters.get("date"):
@@ -90,10 +173,10 @@ class TransactionService:
 
             query = query.order_by(Transaction.transaction_date.desc())
             result = await db.execute(query)
-            transactions = result.scalars().all()
+            transactions = [row._asdict() for row in result]
 
             logger.info(f"Found {len(transactions)} transactions for user {search_data.user_id}")
-            return [TransactionResponse.model_validate(t) for t in transactions]
+            return transactions
 
         except HTTPException:
             raise
@@ -101,21 +184,94 @@ class TransactionService:
             logger.error(f"Error searching transactions for user {search_data.user_id}: {e}")
             raise HTTPException(status_code=status.HTTP_500_INTERNAL_SERVER_ERROR, detail="Failed to search transactions")
 
-    async def get_total_spent_by_period(self, db: AsyncSession, user_id: str, start_date: date, end_date: date) -> Decimal:
+    async def get_transactions(self, db: AsyncSession, user_id: str, user: Optional[UserResponse] = None) -> List[TransactionRecord]:
+        """All of the user's transactions, newest first"""
+        try:
+            if not (user or await self.user_service.get_user(db, user_id)):
+                raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="User not found")
+
+            result = await db.execute(self._newest_first(user_id, None))
+            return [row._asdict() for row in result]
+
+        except HTTPException:
+            raise
+        except Exception as e:
+            logger.error(f"Error fetching transactions for user {user_id}: {e}")
+            raise HTTPException(status_code=status.HTTP_500_INTERNAL_SERVER_ERROR, detail="Failed to fetch transactions")
+
+    async def list_transactions(self, db: AsyncSession, user_id: str, limit: int, cursor: Optional[str] = None,
+                                user: Optional[UserResponse] = None) -> Tuple[List[TransactionRecord], Optional[str]]:
+        """One page of transactions, newest first, plus the cursor for the next page (None on the last)"""
+        try:
+            if not (user or await self.user_service.get_user(db, user_id)):
+                raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="User not found")
+
+            # Fetch one extra row to learn whether another page follows
+            result = await db.execute(self._newest_first(user_id, self.decode_cursor(cursor)).limit(limit + 1))
+            transactions = [row._asdict() for row in result]
+            next_cursor = None
+            if len(transactions) > limit:
+                transactions = transactions[:limit]
+                next_cursor = self._encode_cursor(transactions[-1])
+            return transactions, next_cursor
+
+        except HTTPException:
+            raise
+        except Exception as e:
+            logger.error(f"Error fetching transactions for user {user_id}: {e}")
+            raise HTTPException(status_code=status.HTTP_500_INTERNAL_SERVER_ERROR, detail="Failed to fetch transactions")
+
+    async def stream_transactions(self, user_id: str, cursor: Optional[str] = None) -> AsyncIterator[bytes]:
+        """Yield NDJSON lines from a server-side cursor so exports run in constant memory"""
+        after = self.decode_cursor(cursor)
+        exported = 0
+        # Own session: the response body is produced after the request's dependencies have closed
+        async with AsyncSessionLocal() as db:
+            try:
+                result = await db.stream(
+                    self._newest_first(user_id, after).execution_options(yield_per=Config.transactions_stream_batch_size)
+                )
+                async for row in result:
+                    exported += 1
+                    yield dumps(row._asdict()) + b"\n"
+                logger.info(f"Streamed {exported} transactions for user {user_id}")
+            except Exception as e:
+                logger.error(f"Error streaming transactions for user {user_id} after {exported} rows: {e}")
+                yield dumps({"error": "Failed to stream transactions", "exported": exported}) + b"\n"
+
+    def decode_cursor(self, cursor: Optional[str]) -> Optional[Tuple[date, uuid.UUID]]:
+        if not cursor:
+            return None
+        try:
+            transaction_date, transaction_id = base64.urlsafe_b64decode(cursor.encode()).decode().split("|")
+            return date.fromisoformat(transaction_date), uuid.UUID(transaction_id)
+        except ValueError:
+            raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Invalid cursor")
+
+    def _encode_cursor(self, transaction: TransactionRecord) -> str:
+        return base64.urlsafe_b64encode(f"{transaction['transaction_date'].isoformat()}|{transaction['id']}".encode()).decode()
+
+    def _columns(self):
+        # Read paths select plain columns: no identity map, no per-row ORM object or response model
+        return (Transaction.id, Transaction.user_id, Transaction.amount, Transaction.description,
+                Transaction.category, Transaction.merchant, Transaction.transaction_date, Transaction.created_at)
+
+    def _newest_first(self, user_id: str, after: Optional[Tuple[date, uuid.UUID]]):
+        """Keyset order on (transaction_date, id): stable across inserts, no OFFSET scans"""
+        query = select(*self._columns()).filter(Transaction.user_id == user_id)
+        if after:
+            query = query.filter(tuple_(Transaction.transaction_date, Transaction.id) < after)
+        return query.order_by(Transaction.transaction_date.desc(), Transaction.id.desc())
+
+    async def get_total_spent_by_period(self, db: AsyncSession, user_id: str, start_date: date, end_date: date,
+                                        user: Optional[UserResponse] = None) -> Decimal:
         """Calculate total spent in a period for analysis"""
         try:
-            if not await self.user_service.user_exists(db, user_id):
+            if not (user or await self.user_service.get_user(db, user_id)):
                 raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="User not found")
 
-            result = await db.execute(
-                select(func.sum(Transaction.amount))
-                .filter(and_(
-                    Transaction.user_id == user_id,
-                    Transaction.transaction_date >= start_date,
-                    Transaction.transaction_date <= end_date
-                ))
-            )
-            total = result.scalar() or Decimal('0.00')
+            categories = await self.rollup_service.category_totals(db, user_id, start_date, end_date)
+            total = sum((total for _, total, _ in categories), Decimal('0.00'))
 
             logger.info(f"Total spent for user {user_id} from {start_date} to {end_date}: {total}")
             return total
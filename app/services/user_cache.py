@@ -0,0 +1,40 @@
+from collections import OrderedDict
+from typing import Optional, Tuple
+import time
+from config.setting import Config
+from schemas.user import UserResponse
+
+
+class UserCache:
+    """Process-wide TTL/LRU cache of user records; the fields read on hot paths never change after signup"""
+
+    def __init__(self, max_users: int = 4096, ttl_seconds: float = 300.0):
+        self.max_users = max_users
+        self.ttl_seconds = ttl_seconds
+        # user_id -> (stored_at, user), least recently used first
+        self._users: "OrderedDict[str, Tuple[float, UserResponse]]" = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, user_id: str) -> Optional[UserResponse]:
+        entry = self._users.get(user_id)
+        if entry is None or time.monotonic() - entry[0] > self.ttl_seconds:
+            self.misses += 1
+            return None
+        self._users.move_to_end(user_id)
+        self.hits += 1
+        return entry[1]
+
+    def put(self, user: UserResponse) -> None:
+        self._users[user.user_id] = (time.monotonic(), user)
+        self._users.move_to_end(user.user_id)
+        while len(self._users) > self.max_users:
+            self._users.popitem(last=False)
+
+    def invalidate(self, user_id: str) -> None:
+        """Drop the user; call after any write to their users row"""
+        self._users.pop(user_id, None)
+
+
+# Shared so every request and service sees the same entries
+user_cache = UserCache(max_users=Config.user_cache_size, ttl_seconds=Config.user_cache_ttl_seconds)
@@ -2,11 +2,12 @@ from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy import select
 import secrets
 import string
-from typing import Optional
+from typing import List, Optional
 from datetime import datetime
 from config.logger import logger
 from database.models import User, UserPreference
 from schemas.user import UserRegister, UserLogin, UserResponse, UserPreferences
+from services.user_cache import user_cache
 
 class UserService:
     
@@ -47,7 +48,9 @@ class UserService:
             await db.commit()
             
             logger.info(f"User registered successfully with ID: {user_id}")
-            return UserResponse.model_validate(new_user)
+            user_response = UserResponse.model_validate(new_user)
+            user_cache.put(user_response)
+            return user_response
             
         except Exception as e:
             await db.rollback()
@@ -57,10 +60,10 @@ class UserService:
     async def login_user(self, db: AsyncSession, login_data: UserLogin) -> Optional[UserResponse]:
         """Login existing user using UserLogin schema"""
         try:
-            user = await self.get_user_by_id(db, login_data.user_id)
+            user = await self.get_user(db, login_data.user_id)
             if user:
                 logger.info(f"User logged in: {login_data.user_id}")
-                return UserResponse.model_validate(user)
+                return user
             else:
                 logger.warning(f"Login attempt with invalid user_id: {login_data.user_id}")
                 return None
@@ -77,7 +80,18 @@ class UserService:
             logger.error(f"Error fetching user {user_id}: {e}")
             raise
     
-    """
+    async def get_user(self, db: AsyncSession, user_id: str) -> Optional[UserResponse]:
+        """User record through the process cache; use get_user_by_id when the ORM object is needed"""
+        user = user_cache.get(user_id)
+        if user is not None:
+            return user
+        db_user = await self.get_user_by_id(db, user_id)
+        if db_user is None:
+            return None
+        user = UserResponse.model_validate(db_user)
+        user_cache.put(user)
+        return user
+
     async def get_user_preferences(self, db: AsyncSession, user_id: str) -> Optional[UserPreferences]:
         try:
             result = await db.execute(
@@ -92,7 +106,16 @@ class UserService:
             logger.error(f"Error fetching preferences for user {user_id}: {e}")
             raise
     
-    
+    async def get_categories(self, db: AsyncSession, user_id: str) -> List[str]:
+        """User-defined spending categories, falling back to the defaults"""
+        user_prefs = await self.get_user_preferences(db, user_id)
+        return (
+            user_prefs.preferences.get("default_categories", ["Food", "Transportation", "Entertainment", "Shopping", "Bills"])
+            if user_prefs
+            else ["Food", "Transportation", "Entertainment", "Shopping", "Bills"]
+        )
+
+    """
     async def update_user_preferences(self, db: AsyncSession, user_id: str, preferences_data: dict) -> UserPreferences:
         try:
             result = await db.execute( select(UserPreference).where(UserPreference.user_id == user_id) )
@@ -121,7 +144,7 @@ class UserService:
     """
     async def user_exists(self, db: AsyncSession, user_id: str) -> bool:
         try:
-            user = await self.get_user_by_id(db, user_id)
+            user = await self.get_user(db, user_id)
             return user is not None
         except Exception as e:
             logger.error(f"Error checking user existence for {user_id}: {e}")
@@ -0,0 +1,79 @@
+"""Per-request deadlines, carried in a context variable from the HTTP middleware down to FinanceCrew.
+
+DeadlineMiddleware gives every request Config.request_deadline_seconds, or less if the client sends
+X-Request-Timeout-Ms. Code that waits on something slow asks remaining() how long it may wait and
+raises DeadlineExceeded when the budget is spent, so callers can switch to a local fallback.
+Tasks started by a request inherit its deadline; background work replaces it with deadline_after.
+"""
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Awaitable, Iterator, Optional, TypeVar
+import asyncio
+import time
+from starlette.types import ASGIApp, Receive, Scope, Send
+from config.setting import Config
+
+T = TypeVar("T")
+
+# time.monotonic() by which the current request must be answered
+_deadline: ContextVar[Optional[float]] = ContextVar("deadline", default=None)
+
+
+class DeadlineExceeded(TimeoutError):
+    """The request's time budget ran out, or is too short for the work about to start"""
+
+
+def remaining() -> Optional[float]:
+    """Seconds left before the current deadline, or None when there is none"""
+    deadline = _deadline.get()
+    return None if deadline is None else deadline - time.monotonic()
+
+
+@contextmanager
+def deadline_after(seconds: Optional[float], replace: bool = False) -> Iterator[None]:
+    """Run the block with a deadline seconds from now; an earlier existing deadline still applies unless replace"""
+    deadline = None if seconds is None else time.monotonic() + seconds
+    current = _deadline.get()
+    if not replace and current is not None:
+        deadline = current if deadline is None else min(deadline, current)
+    token = _deadline.set(deadline)
+    try:
+        yield
+    finally:
+        _deadline.reset(token)
+
+
+async def within_deadline(awaitable: Awaitable[T]) -> T:
+    """Await with whatever time is left, raising DeadlineExceeded instead of a bare timeout"""
+    left = remaining()
+    if left is None:
+        return await awaitable
+    if left <= 0:
+        # Close a coroutine that will never be awaited
+        getattr(awaitable, "close", lambda: None)()
+        raise DeadlineExceeded("Deadline already passed")
+    try:
+        return await asyncio.wait_for(awaitable, left)
+    except asyncio.TimeoutError:
+        raise DeadlineExceeded(f"Deadline exceeded after waiting {left:.2f}s") from None
+
+
+class DeadlineMiddleware:
+    """Starts each HTTP request's deadline clock"""
+
+    def __init__(self, app: ASGIApp):
+        self.app = app
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+        seconds = Config.request_deadline_seconds
+        for name, value in scope["headers"]:
+            if name == b"x-request-timeout-ms":
+                try:
+                    seconds = min(seconds, int(value) / 1000)
+                except ValueError:
+                    pass
+        with deadline_after(seconds, replace=True):
+            await self.app(scope, receive, send)
@@ -0,0 +1,199 @@
+"""Prometheus metrics for routes, database queries, pool checkouts and LLM calls, served on /metrics.
+
+Each request also carries a stage accumulator in a context variable: DB query time and LLM call
+time spent on its behalf are summed and observed per route as http_request_stage_seconds, so a
+slow /insights shows whether the queries or the crew took the time. SQLAlchemy's async greenlets
+and tasks started by the request inherit the context; work that outlives the response is not counted.
+"""
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Dict, Iterator, Optional
+import time
+from prometheus_client import CONTENT_TYPE_LATEST, Counter, Gauge, Histogram, generate_latest
+from sqlalchemy import event
+from sqlalchemy.ext.asyncio import AsyncEngine
+from sqlalchemy.pool import AsyncAdaptedQueuePool
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+DB_BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0)
+LLM_BUCKETS = (0.1, 0.25, 0.5, 1.0, 2.0, 4.0, 8.0, 15.0, 30.0, 60.0)
+
+HTTP_REQUEST_SECONDS = Histogram(
+    "http_request_duration_seconds", "Request latency until the response body is sent", ["method", "route", "status"]
+)
+HTTP_STAGE_SECONDS = Histogram(
+    "http_request_stage_seconds", "Per-request time spent in DB queries, LLM calls or waiting for an LLM slot", ["route", "stage"]
+)
+DB_QUERY_SECONDS = Histogram(
+    "db_query_duration_seconds", "Statement execution time, by leading SQL keyword", ["operation"], buckets=DB_BUCKETS
+)
+DB_QUERY_ERRORS = Counter("db_query_errors_total", "Statements that raised", ["operation"])
+DB_POOL_CHECKOUT_SECONDS = Histogram(
+    "db_pool_checkout_seconds", "Time to get a pooled connection: waiting for a slot, connecting, pre-ping",
+    buckets=DB_BUCKETS
+)
+DB_POOL_CHECKED_OUT = Gauge("db_pool_checked_out", "Connections currently checked out of the pool")
+LLM_CALLS = Counter("llm_calls_total", "LLM calls by FinanceCrew method; outcome is ok, error or cache_hit", ["method", "outcome"])
+LLM_CALL_SECONDS = Histogram(
+    "llm_call_duration_seconds", "Latency of LLM calls that reached the provider", ["method"], buckets=LLM_BUCKETS
+)
+LLM_TOKENS = Counter("llm_tokens_total", "Tokens reported by the provider; kind is prompt or completion", ["method", "kind"])
+LLM_UPSTREAM_REQUESTS = Counter(
+    "llm_upstream_requests_total", "Provider requests made for LLM calls, including client retries and crew agent steps", ["method"]
+)
+LLM_RETRIES = Counter("llm_retries_total", "Repeated Groq HTTP requests within one LLM call", ["method"])
+LLM_ACTIVE_CALLS = Gauge("llm_governor_active_calls", "Upstream LLM calls holding a governor slot")
+LLM_QUEUE_DEPTH = Gauge("llm_governor_queue_depth", "LLM calls waiting for a governor slot")
+LLM_QUEUE_WAIT_SECONDS = Histogram(
+    "llm_governor_wait_seconds", "Time LLM calls waited for a governor slot", ["method"], buckets=LLM_BUCKETS
+)
+LLM_HEDGES = Counter("llm_hedges_total", "Duplicate LLM requests sent after the p95 delay, and how many of them answered first", ["method", "outcome"])
+LLM_DEADLINE_FALLBACKS = Counter("llm_deadline_fallbacks_total", "Calls given up because the deadline could not be met; answered by a local fallback where one is safe", ["method"])
+LLM_COALESCED = Counter("llm_coalesced_total", "LLM calls that shared an identical call already in flight", ["method"])
+
+# Stage name -> seconds, for the request being served
+_stages: ContextVar[Optional[Dict[str, float]]] = ContextVar("request_stages", default=None)
+# The LLM call in progress: its method and how many HTTP requests it has made
+_llm_call: ContextVar[Optional["LLMCall"]] = ContextVar("llm_call", default=None)
+
+
+def add_stage(stage: str, seconds: float) -> None:
+    stages = _stages.get()
+    if stages is not None:
+        stages[stage] = stages.get(stage, 0.0) + seconds
+
+
+def render() -> bytes:
+    return generate_latest()
+
+
+class LLMCall:
+    """One LLM call to the provider, timed from construction until finish()"""
+
+    def __init__(self, method: str):
+        self.method = method
+        # Hedged duplicates add attempts; HTTP requests beyond the attempts are client retries
+        self.attempts = 1
+        self.http_requests = 0
+        self.started = time.perf_counter()
+
+    def usage(self, prompt_tokens: Optional[int], completion_tokens: Optional[int]) -> None:
+        if prompt_tokens:
+            LLM_TOKENS.labels(self.method, "prompt").inc(prompt_tokens)
+        if completion_tokens:
+            LLM_TOKENS.labels(self.method, "completion").inc(completion_tokens)
+
+    def upstream_requests(self, count: int) -> None:
+        LLM_UPSTREAM_REQUESTS.labels(self.method).inc(count)
+
+    def finish(self, outcome: str) -> None:
+        elapsed = time.perf_counter() - self.started
+        LLM_CALLS.labels(self.method, outcome).inc()
+        LLM_CALL_SECONDS.labels(self.method).observe(elapsed)
+        add_stage("llm", elapsed)
+
+
+@contextmanager
+def llm_call(method: str) -> Iterator[LLMCall]:
+    """Time an LLM call made on behalf of a FinanceCrew method; Groq HTTP requests inside it are attributed to method"""
+    call = LLMCall(method)
+    token = _llm_call.set(call)
+    outcome = "error"
+    try:
+        yield call
+        outcome = "ok"
+    finally:
+        _llm_call.reset(token)
+        call.finish(outcome)
+
+
+def current_llm_call() -> Optional[LLMCall]:
+    return _llm_call.get()
+
+
+def llm_cache_hit(method: str) -> None:
+    LLM_CALLS.labels(method, "cache_hit").inc()
+
+
+async def on_llm_http_request(request) -> None:
+    """httpx request hook for the shared Groq client: counts requests and retries per LLM call"""
+    call = _llm_call.get()
+    if call is None:
+        return
+    call.http_requests += 1
+    call.upstream_requests(1)
+    if call.http_requests > call.attempts:
+        LLM_RETRIES.labels(call.method).inc()
+
+
+class TimedQueuePool(AsyncAdaptedQueuePool):
+    """The engine's pool, timing each checkout"""
+
+    def connect(self):
+        started = time.perf_counter()
+        try:
+            return super().connect()
+        finally:
+            DB_POOL_CHECKOUT_SECONDS.observe(time.perf_counter() - started)
+
+
+def instrument_engine(engine: AsyncEngine) -> None:
+    """Time every statement through engine events and export the pool's checked-out count"""
+    sync_engine = engine.sync_engine
+
+    def operation(statement: str) -> str:
+        words = statement.split(None, 1)
+        return words[0].upper() if words else "UNKNOWN"
+
+    @event.listens_for(sync_engine, "before_cursor_execute")
+    def before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+        conn.info.setdefault("query_started", []).append(time.perf_counter())
+
+    @event.listens_for(sync_engine, "after_cursor_execute")
+    def after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+        elapsed = time.perf_counter() - conn.info["query_started"].pop()
+        DB_QUERY_SECONDS.labels(operation(statement)).observe(elapsed)
+        add_stage("db", elapsed)
+
+    @event.listens_for(sync_engine, "handle_error")
+    def handle_error(context):
+        started = context.connection.info.get("query_started") if context.connection is not None else None
+        if started:
+            add_stage("db", time.perf_counter() - started.pop())
+        DB_QUERY_ERRORS.labels(operation(context.statement or "")).inc()
+
+    DB_POOL_CHECKED_OUT.set_function(lambda: sync_engine.pool.checkedout())
+
+
+class MetricsMiddleware:
+    """Observes per-route latency and the DB/LLM stage totals of each HTTP request"""
+
+    def __init__(self, app: ASGIApp):
+        self.app = app
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        stages: Dict[str, float] = {}
+        token = _stages.set(stages)
+        status_code = 500
+        started = time.perf_counter()
+
+        async def send_with_status(message: Message) -> None:
+            nonlocal status_code
+            if message["type"] == "http.response.start":
+                status_code = message["status"]
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_with_status)
+        finally:
+            _stages.reset(token)
+            # The matched route's template, so path parameters do not multiply the series
+            route = getattr(scope.get("route"), "path", "unmatched")
+            HTTP_REQUEST_SECONDS.labels(scope["method"], route, str(status_code)).observe(time.perf_counter() - started)
+            for stage in ("db", "llm", "llm_wait"):
+                HTTP_STAGE_SECONDS.labels(route, stage).observe(stages.get(stage, 0.0))
+
@@ -0,0 +1,39 @@
+"""One JSON encoder for API responses, streamed lines and LLM prompt payloads.
+
+Decimal policy: amounts are money, so they are never converted to float. A Decimal is
+encoded as a JSON string holding its exact digits and stored scale ("12.50"), which is
+what pydantic emits for the same fields, so switching encoders does not change the API.
+UUID, date and datetime are encoded as strings, dates and datetimes in ISO 8601 form.
+"""
+from decimal import Decimal
+from typing import Any
+from uuid import UUID
+import orjson
+from fastapi.responses import JSONResponse
+from pydantic import BaseModel
+
+
+def _default(value: Any) -> Any:
+    if isinstance(value, Decimal):
+        return str(value)
+    if isinstance(value, UUID):
+        # asyncpg returns its own UUID subclass, which orjson only encodes natively as uuid.UUID
+        return str(value)
+    if isinstance(value, BaseModel):
+        return value.model_dump()
+    raise TypeError(f"Type is not JSON serializable: {type(value).__name__}")
+
+
+def dumps(value: Any) -> bytes:
+    return orjson.dumps(value, default=_default, option=orjson.OPT_NON_STR_KEYS)
+
+
+def dumps_str(value: Any) -> str:
+    return dumps(value).decode()
+
+
+class FastJSONResponse(JSONResponse):
+    """App-wide response class; content is rendered with dumps()"""
+
+    def render(self, content: Any) -> bytes:
+        return dumps(content)
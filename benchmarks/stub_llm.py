@@ -0,0 +1,110 @@
+"""Deterministic, offline stand-ins for ChatGroq and Crew.kickoff_async, used by the benchmarks.
+
+Completions are derived from the rendered prompt alone (same prompt, same answer) and are
+returned after a fixed latency per provider call (a crew makes one per task), so runs are
+repeatable and never touch the network.
+Import after app/ is on sys.path, then call install(finance_crew, latency_seconds).
+"""
+import asyncio
+import json
+import re
+from typing import Any, AsyncIterator, Iterator, List, Optional
+
+from crewai import Crew
+from langchain_core.callbacks import AsyncCallbackManagerForLLMRun, CallbackManagerForLLMRun
+from langchain_core.language_models.chat_models import BaseChatModel
+from langchain_core.messages import AIMessage, AIMessageChunk, BaseMessage
+from langchain_core.outputs import ChatGeneration, ChatGenerationChunk, ChatResult
+
+from agents.finance_crew import FinanceCrew
+
+RECOMMENDATIONS = [
+    {"text": "Cap dining out at $200/month to stay on budget", "category": "Food", "priority": "high"},
+    {"text": "Move $150/month to savings on payday", "category": "Savings", "priority": "medium"},
+    {"text": "Review recurring subscriptions for unused services", "category": "Bills", "priority": "low"},
+]
+_AMOUNT = re.compile(r"\d+(?:\.\d+)?")
+_QUOTED_INPUT = re.compile(r'(?:transaction input|search query): "(.*?)"')
+_BATCH_INPUTS = re.compile(r"each of these transaction inputs: (\[.*?\])\n")
+
+
+def respond(prompt: str) -> str:
+    """The completion a well-behaved model would give for one of the app's prompts"""
+    batch = _BATCH_INPUTS.search(prompt)
+    if batch:
+        return json.dumps({"transactions": [dict(_parsed(item["text"]), index=item["index"])
+                                            for item in json.loads(batch.group(1))]})
+    if "Parse this search query" in prompt:
+        return json.dumps({"category": "Food"})
+    if "financial recommendations" in prompt:
+        return json.dumps(RECOMMENDATIONS)
+    match = _QUOTED_INPUT.search(prompt)
+    if match:
+        return json.dumps(_parsed(match.group(1)))
+    return "{}"
+
+
+def _parsed(text: str) -> dict:
+    amount = _AMOUNT.search(text)
+    return {"amount": float(amount.group()) if amount else 10.0, "merchant": None,
+            "transaction_date": None, "category": "Other"}
+
+
+class StubChatModel(BaseChatModel):
+    """Chat model answering with respond(prompt) after latency seconds; streams in a few chunks"""
+
+    model_name: str = "stub-llm"
+    temperature: float = 0.1
+    latency: float = 0.0
+    chunks: int = 8
+    calls: int = 0
+
+    @property
+    def _llm_type(self) -> str:
+        return "stub"
+
+    def _prompt(self, messages: List[BaseMessage]) -> str:
+        self.calls += 1
+        return "\n".join(str(message.content) for message in messages)
+
+    def _generate(self, messages: List[BaseMessage], stop: Optional[List[str]] = None,
+                  run_manager: Optional[CallbackManagerForLLMRun] = None, **kwargs: Any) -> ChatResult:
+        return ChatResult(generations=[ChatGeneration(message=AIMessage(content=respond(self._prompt(messages))))])
+
+    async def _agenerate(self, messages: List[BaseMessage], stop: Optional[List[str]] = None,
+                         run_manager: Optional[AsyncCallbackManagerForLLMRun] = None, **kwargs: Any) -> ChatResult:
+        content = respond(self._prompt(messages))
+        await asyncio.sleep(self.latency)
+        return ChatResult(generations=[ChatGeneration(message=AIMessage(content=content))])
+
+    def _stream(self, messages: List[BaseMessage], stop: Optional[List[str]] = None,
+                run_manager: Optional[CallbackManagerForLLMRun] = None, **kwargs: Any) -> Iterator[ChatGenerationChunk]:
+        content = respond(self._prompt(messages))
+        yield ChatGenerationChunk(message=AIMessageChunk(content=content))
+
+    async def _astream(self, messages: List[BaseMessage], stop: Optional[List[str]] = None,
+                       run_manager: Optional[AsyncCallbackManagerForLLMRun] = None, **kwargs: Any) -> AsyncIterator[ChatGenerationChunk]:
+        # Total time matches a non-streamed call, spread evenly over the chunks
+        content = respond(self._prompt(messages))
+        size = max(len(content) // self.chunks, 1)
+        for start in range(0, len(content), size):
+            await asyncio.sleep(self.latency / self.chunks)
+            yield ChatGenerationChunk(message=AIMessageChunk(content=content[start:start + size]))
+
+
+def install(finance_crew: FinanceCrew, latency: float = 0.0) -> StubChatModel:
+    """Point the crew's LLM clients and every Crew.kickoff_async at one stub model"""
+    stub = StubChatModel(latency=latency)
+    finance_crew.llm = stub
+    finance_crew.crewai_llm = stub
+    finance_crew.json_llm = stub.bind(response_format={"type": "json_object"})
+
+    async def kickoff_async(crew: Crew, inputs: Optional[dict] = None) -> str:
+        # Agents call the model at least once per task, one task after another;
+        # the first task's description carries the quoted input
+        stub.calls += len(crew.tasks)
+        await asyncio.sleep(stub.latency * len(crew.tasks))
+        return respond("\n".join(task.description for task in crew.tasks))
+
+    Crew.kickoff_async = kickoff_async
+    return stub
@@ -1,4 +1,4 @@
-import React, { useState, useEffect, useCallback } from 'react';
+import React, { useState, useEffect, useCallback, useRef } from 'react';
 import { useAuthContext } from '../../context/AuthContext';
 import { analysisAPI, transactionAPI, authAPI } from '../../services/api';
 import { parseAmount, formatCurrency } from '../../utils/helpers';
@@ -12,12 +12,55 @@ const Insights = ({ refreshTrigger }) => {
     const [loading, setLoading] = useState(true);
     const [error, setError] = useState(null);
     const [selectedPeriod, setSelectedPeriod] = useState('this month');
+    const [recommendationsPending, setRecommendationsPending] = useState(false);
+    const recommendationStream = useRef(null);
+
+    const closeRecommendationStream = () => {
+        if (recommendationStream.current) {
+            recommendationStream.current.close();
+            recommendationStream.current = null;
+        }
+    };
+
+    // Fill in recommendations once the backend finishes generating them
+    const streamRecommendations = useCallback((userId, period) => {
+        closeRecommendationStream();
+        const unavailable = [{
+            title: "AI Analysis Unavailable",
+            description: "AI recommendations are currently unavailable. Please try refreshing later.",
+            impact: "Using basic calculation only"
+        }];
+        // Keep whatever already streamed in unless the final list replaces it
+        const finish = (recommendations) => {
+            closeRecommendationStream();
+            setRecommendationsPending(false);
+            setInsights(prev => prev && {
+                ...prev,
+                recommendations: recommendations === unavailable && prev.recommendations.length > 0 ? prev.recommendations : recommendations
+            });
+        };
+
+        const source = new EventSource(analysisAPI.recommendationsStreamUrl(userId, period));
+        recommendationStream.current = source;
+        // Each recommendation is pushed as soon as the model finishes writing it
+        source.addEventListener('recommendation', (event) => {
+            const recommendation = JSON.parse(event.data);
+            setInsights(prev => prev && { ...prev, recommendations: [...(prev.recommendations || []), recommendation] });
+        });
+        source.addEventListener('recommendations', (event) => {
+            const data = JSON.parse(event.data);
+            finish(data.recommendations && data.recommendations.length > 0 ? data.recommendations : unavailable);
+        });
+        source.addEventListener('error', () => finish(unavailable));
+    }, []);
 
     const fetchInsights = useCallback(async () => {
     if (!user?.user_id) return;
 
     setLoading(true);
     setError(null);
+    closeRecommendationStream();
+    setRecommendationsPending(false);
 
     try {
         // Always calculate basic metrics from frontend data
@@ -107,12 +150,15 @@ const Insights = ({ refreshTrigger }) => {
                 amount
             }));
 
-        // Try to get AI recommendations from backend
+        // Try to get AI recommendations from backend; they may still be generating
         let aiRecommendations = [];
+        let pending = false;
         try {
-            const aiResponse = await analysisAPI.getInsights(user.user_id, selectedPeriod);
+            const aiResponse = await analysisAPI.getInsights(user.user_id, selectedPeriod, true);
             
-            if (aiResponse.data && aiResponse.data.recommendations && Array.isArray(aiResponse.data.recommendations) && aiResponse.data.recommendations.length > 0) {
+            if (aiResponse.data && aiResponse.data.recommendations_status === 'pending') {
+                pending = true;
+            } else if (aiResponse.data && aiResponse.data.recommendations && Array.isArray(aiResponse.data.recommendations) && aiResponse.data.recommendations.length > 0) {
                 aiRecommendations = aiResponse.data.recommendations;
             } else {
                 aiRecommendations = [
@@ -145,15 +191,20 @@ const Insights = ({ refreshTrigger }) => {
         };
         
         setInsights(insightsData);
+        if (pending) {
+            setRecommendationsPending(true);
+            streamRecommendations(user.user_id, selectedPeriod);
+        }
     } catch (err) {
         setError(err.response?.data?.message || 'Failed to load insights');
     } finally {
         setLoading(false);
     }
-}, [user?.user_id, selectedPeriod, refreshTrigger]);
+}, [user?.user_id, selectedPeriod, refreshTrigger, streamRecommendations]);
 
     useEffect(() => {
         fetchInsights();
+        return closeRecommendationStream;
     }, [fetchInsights]);
 
     const getProgressColor = (percentage) => {
@@ -345,6 +396,12 @@ const Insights = ({ refreshTrigger }) => {
             </div>
 
             {/* AI Recommendations */}
+            {recommendationsPending && insights.recommendations.length === 0 && (
+                <div className="recommendations-section-small">
+                    <h5 className="section-title-small">💡 Recommendations</h5>
+                    <p className="recommendation-description-small">Generating personalized recommendations...</p>
+                </div>
+            )}
             {insights.recommendations && insights.recommendations.length > 0 && (
                 <div className="recommendations-section-small">
                     <h5 className="section-title-small">💡 Recommendations</h5>
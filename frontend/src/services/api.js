@@ -43,10 +43,19 @@ export const transactionAPI = {
         return api.get(`/search?user_id=${searchData.user_id}&query=${encodedQuery}`);
     },
     getTransactions: (userId) => api.get(`/transactions/${userId}`),
+    // Keyset paging: pass response.headers['x-next-cursor'] back as cursor; absent on the last page
+    getTransactionsPage: (userId, limit = 100, cursor = null) =>
+        api.get(`/transactions/${userId}?limit=${limit}${cursor ? `&cursor=${encodeURIComponent(cursor)}` : ''}`),
+    exportTransactionsUrl: (userId) => `${API_BASE_URL}/transactions/${userId}?stream=true`,
 };
 
 export const analysisAPI = {
-    getInsights: (userId, period = "this month") => api.get(`/insights/${userId}?period=${encodeURIComponent(period)}`),
+    getInsights: (userId, period = "this month", asyncRecommendations = false) =>
+        api.get(`/insights/${userId}?period=${encodeURIComponent(period)}&async_recommendations=${asyncRecommendations}`),
+    getRecommendations: (userId, period = "this month") => api.get(`/insights/${userId}/recommendations?period=${encodeURIComponent(period)}`),
+    // Server-Sent Events URL for EventSource; emits "recommendation" per item, then "recommendations" or "error"
+    recommendationsStreamUrl: (userId, period = "this month") =>
+        `${API_BASE_URL}/insights/${userId}/recommendations/stream?period=${encodeURIComponent(period)}`,
 };
 
 export default api;
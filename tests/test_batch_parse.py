@@ -0,0 +1,32 @@
+import json
+import pytest
+from agents.finance_crew import FinanceCrew
+
+TEXTS = ["coffee 4", "lunch 12", "taxi 30"]
+ITEMS = [{"index": 2, "amount": 30}, {"index": 0, "amount": 4}, {"index": 7, "amount": 1}, "junk"]
+
+
+@pytest.fixture(scope="module")
+def crew():
+    return FinanceCrew()
+
+
+async def parse_chunk(crew, monkeypatch, response):
+    async def invoke(prompt, method, json_mode=False, user_id=None):
+        return response
+
+    monkeypatch.setattr(crew, "_invoke_llm", invoke)
+    return await crew._parse_batch_chunk(TEXTS, ["Food", "Other"], "2025-07-10")
+
+
+@pytest.mark.asyncio
+@pytest.mark.parametrize("response", [json.dumps({"transactions": ITEMS}), json.dumps(ITEMS)])
+async def test_items_are_aligned_by_index(crew, monkeypatch, response):
+    aligned = await parse_chunk(crew, monkeypatch, response)
+    assert [item and item["amount"] for item in aligned] == [4, None, 30]
+
+
+@pytest.mark.asyncio
+@pytest.mark.parametrize("response", ['{"transactions": {"index": 0}}', '"no"', "{}", "[]"])
+async def test_unexpected_shapes_leave_the_chunk_unparsed(crew, monkeypatch, response):
+    assert await parse_chunk(crew, monkeypatch, response) == [None, None, None]
@@ -0,0 +1,118 @@
+from datetime import date
+from decimal import Decimal
+import pytest
+from agents.fast_parser import FastTransactionParser
+
+TODAY = date(2025, 7, 10)  # a Thursday
+CATEGORIES = ["Food", "Transportation", "Entertainment", "Shopping", "Bills", "Other"]
+THRESHOLD = 0.8  # Config.fast_parse_min_confidence default
+
+parser = FastTransactionParser()
+
+
+def parse(text):
+    return parser.parse(text, CATEGORIES, today=TODAY)
+
+
+@pytest.mark.parametrize("text, amount", [
+    ("coffee at starbucks $4.50", Decimal("4.50")),
+    ("paid 1,250 dollars rent", Decimal("1250.00")),
+    ("lunch 12 bucks", Decimal("12.00")),
+    ("groceries ₹300 today", Decimal("300.00")),
+    ("spent 45.5 on dinner yesterday", Decimal("45.50")),
+    ("uber ride 3 days ago for 18", Decimal("18.00")),
+    ("movie tickets 15 on 2025-07-01", Decimal("15.00")),
+])
+def test_amount(text, amount):
+    parsed, _ = parse(text)
+    assert parsed.amount == amount
+
+
+@pytest.mark.parametrize("text", [
+    "coffee and lunch",
+    "paid $5 and $7 for snacks",
+    "dinner 20 and 30",
+    "spent 0 on coffee",
+])
+def test_no_single_amount(text):
+    assert parse(text) is None
+
+
+@pytest.mark.parametrize("text, transaction_date", [
+    ("coffee $4 yesterday", date(2025, 7, 9)),
+    ("coffee $4 day before yesterday", date(2025, 7, 8)),
+    ("groceries $60 2 days ago", date(2025, 7, 8)),
+    ("groceries $60 on 2025-06-30", date(2025, 6, 30)),
+    ("groceries $60 on 6/30/2025", date(2025, 6, 30)),
+    ("groceries $60 on 6/30/25", date(2025, 6, 30)),
+    ("paid $12 at starbucks on 5/13", date(2025, 5, 13)),
+    ("paid $12 at starbucks on 12/24", date(2024, 12, 24)),
+    ("dinner $30 on march 3rd", date(2025, 3, 3)),
+    ("dinner $30 on 3 august", date(2024, 8, 3)),
+    ("dinner $30 on aug 3, 2023", date(2023, 8, 3)),
+    ("gas $40 last monday", date(2025, 7, 7)),
+    ("gas $40 on thursday", date(2025, 7, 10)),
+])
+def test_date(text, transaction_date):
+    parsed, confidence = parse(text)
+    assert parsed.transaction_date == transaction_date
+    assert confidence >= THRESHOLD
+
+
+@pytest.mark.parametrize("text", [
+    "spent 100 on groceries on the 5th",
+    "paid $12 at starbucks on 2/30",
+    "groceries $60 next friday",
+    "dinner $30 in june",
+])
+def test_unresolved_date_goes_to_the_llm(text):
+    parsed, confidence = parse(text)
+    assert parsed.transaction_date == TODAY
+    assert confidence < THRESHOLD
+
+
+@pytest.mark.parametrize("text, category, merchant", [
+    ("coffee at starbucks $4.50", "Food", "starbucks"),
+    ("phone bill $45 today", "Bills", None),
+    ("new phone from Best Buy for $600", "Shopping", "Best Buy"),
+    ("uber to the airport $32 today", "Transportation", None),
+    ("netflix $15 yesterday", "Entertainment", None),
+])
+def test_category_and_merchant(text, category, merchant):
+    parsed, confidence = parse(text)
+    assert parsed.category == category
+    assert parsed.merchant == merchant
+    assert confidence >= THRESHOLD
+
+
+def test_unknown_category_falls_back_to_other():
+    parsed, confidence = parse("paid $20 to john today")
+    assert parsed.category == "Other"
+    assert confidence < THRESHOLD
+
+
+def test_category_outside_the_users_list_is_not_used():
+    parsed, _ = parser.parse("netflix $15 today", ["Food", "Other"], today=TODAY)
+    assert parsed.category == "Other"
+
+
+def test_known_category_wins_over_keywords():
+    parsed, _ = parser.parse("netflix $15 today", CATEGORIES, today=TODAY, known_category="Bills")
+    assert parsed.category == "Bills"
+
+
+@pytest.mark.parametrize("text", [
+    "got refund of 30 from amazon",
+    "amazon refunded $30 today",
+    "$25 cashback on groceries",
+    "account credited with $100 from uber",
+    "returned shoes for $80 today",
+])
+def test_money_coming_in_goes_to_the_llm(text):
+    _, confidence = parse(text)
+    assert confidence < THRESHOLD
+
+
+def test_credit_card_is_still_an_expense():
+    _, confidence = parse("paid $40 for dinner with my credit card today")
+    assert confidence >= THRESHOLD
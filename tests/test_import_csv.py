@@ -0,0 +1,48 @@
+import pytest
+from config.setting import Config
+from services.import_service import ImportService
+
+
+class Upload:
+    """Just the read() of an UploadFile, over bytes"""
+
+    def __init__(self, data: bytes):
+        self.data = data
+
+    async def read(self, size: int) -> bytes:
+        chunk, self.data = self.data[:size], self.data[size:]
+        return chunk
+
+
+async def read_csv(data: bytes):
+    return [row async for row in ImportService()._read_csv(Upload(data), {})]
+
+
+CSV = (
+    "Date,Description,Amount\r\n"
+    "2025-07-01,Coffee,-4.50\r\n"
+    "2025-07-02,\"Groceries\r\nweekly \"\"big\"\" shop\",-82.10\r\n"
+    "2025-07-03,Rent,-1200.00\r\n"
+    "\r\n"
+    "2025-07-04,\"Form\x0cfeed\x1cand separators\",-3.00\r\n"
+).encode()
+
+
+@pytest.mark.asyncio
+@pytest.mark.parametrize("chunk_bytes", [1, 2, 7, 25, 26, 4096])
+async def test_line_numbers_and_fields_do_not_depend_on_chunking(monkeypatch, chunk_bytes):
+    monkeypatch.setattr(Config, "import_chunk_bytes", chunk_bytes)
+    rows = await read_csv(CSV)
+    assert [line for line, _ in rows] == [2, 3, 5, 7]
+    assert [fields["description"] for _, fields in rows] == [
+        "Coffee", "Groceries\r\nweekly \"big\" shop", "Rent", "Form\x0cfeed\x1cand separators",
+    ]
+    assert [fields["amount"] for _, fields in rows] == ["-4.50", "-82.10", "-1200.00", "-3.00"]
+
+
+@pytest.mark.asyncio
+async def test_last_line_without_newline_and_unterminated_quote():
+    rows = await read_csv(b"date,amount,description\n2025-07-01,5,\"open quote\n2025-07-02,6,x")
+    assert len(rows) == 1
+    assert rows[0][0] == 2
+    assert rows[0][1]["amount"] == "5"
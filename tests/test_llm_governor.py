@@ -0,0 +1,218 @@
+import asyncio
+import pytest
+from agents.llm_governor import LLMGovernor
+from utils.deadline import DeadlineExceeded, deadline_after, within_deadline
+
+
+async def hold(governor: LLMGovernor, user_id: str, release: asyncio.Event, order: list = None) -> None:
+    async with governor.slot(user_id, "test"):
+        if order is not None:
+            order.append(user_id)
+        await release.wait()
+
+
+async def settle() -> None:
+    for _ in range(5):
+        await asyncio.sleep(0)
+
+
+@pytest.mark.asyncio
+async def test_caps_concurrent_calls():
+    governor = LLMGovernor(max_concurrency=2)
+    peak = 0
+
+    async def call():
+        nonlocal peak
+        peak = max(peak, governor.active)
+        await asyncio.sleep(0.01)
+        return "ok"
+
+    results = await asyncio.gather(*(governor.run(f"key-{i}", "u", "test", call) for i in range(6)))
+    assert results == ["ok"] * 6
+    assert peak == 2
+    assert governor.active == 0
+
+
+@pytest.mark.asyncio
+async def test_free_slots_go_to_waiting_users_round_robin():
+    governor = LLMGovernor(max_concurrency=1)
+    release = asyncio.Event()
+    blocker = asyncio.ensure_future(hold(governor, "first", release))
+    await settle()
+
+    order = []
+    waiters = []
+    for user_id in ["a", "a", "a", "b"]:
+        waiters.append(asyncio.ensure_future(hold(governor, user_id, release, order)))
+        await settle()
+    release.set()
+    await asyncio.gather(blocker, *waiters)
+    assert order == ["a", "b", "a", "a"]
+    assert governor.active == 0
+
+
+@pytest.mark.asyncio
+async def test_identical_calls_in_flight_share_one_call():
+    governor = LLMGovernor(max_concurrency=4)
+    calls = 0
+
+    async def call():
+        nonlocal calls
+        calls += 1
+        await asyncio.sleep(0.01)
+        return "answer"
+
+    results = await asyncio.gather(*(governor.run("same", f"user-{i}", "test", call) for i in range(3)))
+    assert results == ["answer"] * 3
+    assert calls == 1
+
+
+@pytest.mark.asyncio
+async def test_followers_receive_the_leaders_error():
+    governor = LLMGovernor(max_concurrency=4)
+    calls = 0
+
+    async def call():
+        nonlocal calls
+        calls += 1
+        await asyncio.sleep(0.01)
+        raise ValueError("upstream failed")
+
+    results = await asyncio.gather(*(governor.run("same", "u", "test", call) for _ in range(2)), return_exceptions=True)
+    assert [type(result) for result in results] == [ValueError, ValueError]
+    assert calls == 1
+
+
+@pytest.mark.asyncio
+async def test_follower_takes_over_when_leader_is_cancelled():
+    governor = LLMGovernor(max_concurrency=4)
+    calls = 0
+
+    async def call():
+        nonlocal calls
+        calls += 1
+        await asyncio.sleep(0.05)
+        return "answer"
+
+    leader = asyncio.ensure_future(governor.run("same", "u", "test", call))
+    await settle()
+    follower = asyncio.ensure_future(governor.run("same", "v", "test", call))
+    await settle()
+    leader.cancel()
+    assert await follower == "answer"
+    assert calls == 2
+    assert governor.active == 0
+
+
+@pytest.mark.asyncio
+async def test_follower_takes_over_when_leaders_deadline_passes():
+    governor = LLMGovernor(max_concurrency=4)
+    calls = 0
+
+    async def call():
+        nonlocal calls
+        calls += 1
+        return await within_deadline(asyncio.sleep(0.05, result="answer"))
+
+    async def leader():
+        with deadline_after(0.01):
+            return await governor.run("same", "u", "test", call)
+
+    leading = asyncio.ensure_future(leader())
+    await settle()
+    follower = asyncio.ensure_future(governor.run("same", "v", "test", call))
+    with pytest.raises(DeadlineExceeded):
+        await leading
+    assert await follower == "answer"
+    assert calls == 2
+
+
+@pytest.mark.asyncio
+async def test_cancelled_waiter_passes_its_slot_on():
+    governor = LLMGovernor(max_concurrency=1)
+    release = asyncio.Event()
+    blocker = asyncio.ensure_future(hold(governor, "first", release))
+    await settle()
+    order = []
+    cancelled = asyncio.ensure_future(hold(governor, "a", release, order))
+    await settle()
+    waiting = asyncio.ensure_future(hold(governor, "b", release, order))
+    await settle()
+
+    cancelled.cancel()
+    release.set()
+    await asyncio.gather(blocker, waiting)
+    assert cancelled.cancelled()
+    assert order == ["b"]
+    assert governor.active == 0
+
+
+@pytest.mark.asyncio
+async def test_slot_granted_during_cancellation_is_released():
+    governor = LLMGovernor(max_concurrency=1)
+    release = asyncio.Event()
+    blocker = asyncio.ensure_future(hold(governor, "first", release))
+    await settle()
+    waiter = asyncio.ensure_future(hold(governor, "a", release))
+    await settle()
+
+    # The blocker hands its slot to the waiter, which is cancelled before it gets to run
+    release.set()
+    await blocker
+    waiter.cancel()
+    await asyncio.gather(waiter, return_exceptions=True)
+    assert governor.active == 0
+    assert governor.has_capacity()
+
+
+@pytest.mark.asyncio
+async def test_waiting_past_the_deadline_raises_and_leaves_the_queue():
+    governor = LLMGovernor(max_concurrency=1)
+    release = asyncio.Event()
+    blocker = asyncio.ensure_future(hold(governor, "first", release))
+    await settle()
+
+    with deadline_after(0.01):
+        with pytest.raises(DeadlineExceeded):
+            async with governor.slot("a", "test"):
+                pass
+    release.set()
+    await blocker
+    assert governor.active == 0
+    assert governor.has_capacity()
+
+
+@pytest.mark.asyncio
+async def test_try_acquire_never_queues():
+    governor = LLMGovernor(max_concurrency=1)
+    assert governor.try_acquire()
+    assert not governor.try_acquire()
+    governor.release()
+    assert governor.active == 0
+
+
+@pytest.mark.asyncio
+async def test_slot_is_kept_until_held_work_finishes():
+    governor = LLMGovernor(max_concurrency=1)
+    finish = asyncio.Event()
+
+    async def call():
+        work = asyncio.ensure_future(finish.wait())
+        governor.hold_until(work)
+        return await within_deadline(asyncio.shield(work))
+
+    with deadline_after(0.01):
+        with pytest.raises(DeadlineExceeded):
+            await governor.run("thread", "u", "test", call)
+    assert governor.active == 1
+    assert not governor.has_capacity()
+
+    order = []
+    waiter = asyncio.ensure_future(hold(governor, "a", asyncio.Event(), order))
+    await settle()
+    assert order == []
+    finish.set()
+    await settle()
+    assert order == ["a"]
+    waiter.cancel()
+    await asyncio.gather(waiter, return_exceptions=True)
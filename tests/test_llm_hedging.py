@@ -0,0 +1,122 @@
+import asyncio
+import pytest
+from agents.llm_governor import LLMGovernor
+from agents.llm_hedging import LLMHedger
+from utils.deadline import DeadlineExceeded, deadline_after
+
+
+def slow_then_fast(delays):
+    """A call whose successive attempts take the given delays"""
+    started = []
+
+    async def call():
+        index = len(started)
+        started.append(index)
+        await asyncio.sleep(delays[index])
+        return f"attempt {index}"
+
+    return call, started
+
+
+@pytest.mark.asyncio
+async def test_fast_call_is_not_hedged():
+    hedger = LLMHedger(default_delay=0.05)
+    call, started = slow_then_fast([0.01])
+    assert await hedger.run("test", call) == "attempt 0"
+    assert len(started) == 1
+
+
+@pytest.mark.asyncio
+async def test_slow_call_is_hedged_and_first_answer_wins():
+    hedger = LLMHedger(default_delay=0.02)
+    call, started = slow_then_fast([1.0, 0.01])
+    assert await hedger.run("test", call) == "attempt 1"
+    assert len(started) == 2
+
+
+@pytest.mark.asyncio
+async def test_no_hedge_without_a_free_slot():
+    hedger = LLMHedger(default_delay=0.01)
+    call, started = slow_then_fast([0.05])
+    assert await hedger.run("test", call, acquire_hedge_slot=lambda: False) == "attempt 0"
+    assert len(started) == 1
+
+
+@pytest.mark.asyncio
+@pytest.mark.parametrize("delays, winner", [([1.0, 0.01], "attempt 1"), ([0.04, 1.0], "attempt 0")])
+async def test_hedge_holds_a_governor_slot_until_it_finishes_or_is_cancelled(delays, winner):
+    governor = LLMGovernor(max_concurrency=2)
+    hedger = LLMHedger(default_delay=0.02)
+    call, started = slow_then_fast(delays)
+    peak = 0
+
+    async def primary():
+        nonlocal peak
+        result = asyncio.ensure_future(hedger.run("test", call, governor.try_acquire, governor.release))
+        while not result.done():
+            peak = max(peak, governor.active)
+            await asyncio.sleep(0.005)
+        return await result
+
+    async with governor.slot("u", "test"):
+        assert await primary() == winner
+    await asyncio.sleep(0)
+    assert len(started) == 2
+    assert peak == 2
+    assert governor.active == 0
+
+
+@pytest.mark.asyncio
+async def test_hedge_waits_when_the_governor_is_full():
+    governor = LLMGovernor(max_concurrency=1)
+    hedger = LLMHedger(default_delay=0.01)
+    call, started = slow_then_fast([0.05])
+    async with governor.slot("u", "test"):
+        assert await hedger.run("test", call, governor.try_acquire, governor.release) == "attempt 0"
+    assert len(started) == 1
+    assert governor.active == 0
+
+
+@pytest.mark.asyncio
+async def test_latency_of_a_hedged_call_is_measured_from_the_primarys_start():
+    hedger = LLMHedger(default_delay=0.05)
+    call, _ = slow_then_fast([1.0, 0.01])
+    await hedger.run("test", call)
+    assert hedger._latencies["test"][-1] >= 0.05
+
+
+@pytest.mark.asyncio
+async def test_disabled_hedger_sends_one_attempt():
+    hedger = LLMHedger(enabled=False, default_delay=0.01)
+    call, started = slow_then_fast([0.05])
+    assert await hedger.run("test", call) == "attempt 0"
+    assert len(started) == 1
+
+
+@pytest.mark.asyncio
+async def test_deadline_cancels_attempts():
+    hedger = LLMHedger(default_delay=1.0)
+    cancelled = asyncio.Event()
+
+    async def call():
+        try:
+            await asyncio.sleep(1.0)
+        except asyncio.CancelledError:
+            cancelled.set()
+            raise
+
+    with deadline_after(0.02):
+        with pytest.raises(DeadlineExceeded):
+            await hedger.run("test", call)
+    await asyncio.wait_for(cancelled.wait(), 1.0)
+
+
+@pytest.mark.asyncio
+async def test_fails_fast_when_typical_call_exceeds_the_time_left():
+    hedger = LLMHedger(min_samples=1)
+    hedger._observe("test", 0.5)
+    call, started = slow_then_fast([0.01])
+    with deadline_after(0.1):
+        with pytest.raises(DeadlineExceeded):
+            await hedger.run("test", call)
+    assert started == []
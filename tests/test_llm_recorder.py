@@ -0,0 +1,78 @@
+from typing import Any, AsyncIterator, List, Optional
+import pytest
+from langchain_core.language_models.chat_models import BaseChatModel
+from langchain_core.messages import AIMessage, AIMessageChunk, BaseMessage
+from langchain_core.outputs import ChatGeneration, ChatGenerationChunk, ChatResult
+from agents.llm_recorder import LLMRecorder, ReplayMiss
+
+USAGE = {"input_tokens": 12, "output_tokens": 3, "total_tokens": 15}
+
+
+class UsageModel(BaseChatModel):
+    """Answers every prompt with its length and reports fixed token usage, like ChatGroq does"""
+
+    model_name: str = "usage-model"
+    temperature: float = 0.0
+    calls: int = 0
+
+    @property
+    def _llm_type(self) -> str:
+        return "usage-model"
+
+    def _generate(self, messages: List[BaseMessage], stop: Optional[List[str]] = None, run_manager=None, **kwargs: Any) -> ChatResult:
+        self.calls += 1
+        message = AIMessage(content=f"answer {len(messages[-1].content)}", usage_metadata=USAGE)
+        return ChatResult(generations=[ChatGeneration(message=message)])
+
+    async def _astream(self, messages: List[BaseMessage], stop: Optional[List[str]] = None, run_manager=None,
+                       **kwargs: Any) -> AsyncIterator[ChatGenerationChunk]:
+        self.calls += 1
+        yield ChatGenerationChunk(message=AIMessageChunk(content="ans"))
+        yield ChatGenerationChunk(message=AIMessageChunk(content="wer", usage_metadata=USAGE))
+
+
+def recorded(tmp_path, mode):
+    recorder = LLMRecorder(mode, str(tmp_path / "recording.jsonl"))
+    inner = UsageModel()
+    return recorder.wrap(inner), inner
+
+
+async def streamed(llm, prompt):
+    message = None
+    async for chunk in llm.astream(prompt):
+        message = chunk if message is None else message + chunk
+    return message
+
+
+@pytest.mark.asyncio
+async def test_usage_survives_record_and_replay(tmp_path):
+    llm, inner = recorded(tmp_path, "record")
+    recorded_messages = [await llm.ainvoke("async prompt"), llm.invoke("sync prompt"), await streamed(llm, "stream prompt")]
+
+    llm, inner = recorded(tmp_path, "replay")
+    replayed_messages = [await llm.ainvoke("async prompt"), llm.invoke("sync prompt"), await streamed(llm, "stream prompt")]
+
+    assert inner.calls == 0
+    for before, after in zip(recorded_messages, replayed_messages):
+        assert after.content == before.content
+        assert before.usage_metadata == USAGE
+        assert after.usage_metadata == USAGE
+
+
+@pytest.mark.asyncio
+async def test_complete_records_usage_filled_in_by_the_call(tmp_path):
+    recorder = LLMRecorder("record", str(tmp_path / "recording.jsonl"))
+    usage = {}
+
+    async def call():
+        usage.update(input_tokens=100, output_tokens=20, upstream_requests=2)
+        return "crew output"
+
+    assert await recorder.complete("crew-model", "prompt", call, usage) == "crew output"
+
+    recorder = LLMRecorder("replay", str(tmp_path / "recording.jsonl"))
+    replayed = {}
+    assert await recorder.complete("crew-model", "prompt", call, replayed) == "crew output"
+    assert replayed == {"input_tokens": 100, "output_tokens": 20, "upstream_requests": 2}
+    with pytest.raises(ReplayMiss):
+        await recorder.complete("crew-model", "other prompt", call, {})